@@ -0,0 +1,93 @@
+"""Compact ABI bundle generated from the Hardhat artifacts.
+
+Full artifacts carry bytecode, deployed bytecode and link references that the backend never
+uses; the bundle keeps only each ABI and its content hash, so startup reads one small file
+instead of parsing five large ones. Regenerate it after `npx hardhat compile`:
+
+    python backend/abi_bundle.py
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+ARTIFACTS_DIR = Path(__file__).parent.parent / 'artifacts' / 'contracts'
+BUNDLE_PATH = Path(os.getenv('ABI_BUNDLE_PATH', Path(__file__).parent.parent / 'artifacts' / 'abi-bundle.json'))
+BUNDLE_VERSION = 1
+
+CONTRACT_ARTIFACTS = {
+    'UniversityAccessControl': 'upgradeable/UniversityAccessControlUpgradeable.sol/UniversityAccessControlUpgradeable.json',
+    'CourseManagement': 'upgradeable/CourseManagementUpgradeable.sol/CourseManagementUpgradeable.json',
+    'GradeManagement': 'upgradeable/GradeManagementUpgradeable.sol/GradeManagementUpgradeable.json',
+    # V2 ABI is a superset of V1 and adds the date-indexed range lookups
+    'ScheduleManagement': 'upgradeable/ScheduleManagementV2Upgradeable.sol/ScheduleManagementV2Upgradeable.json',
+    'StatisticsTracker': 'upgradeable/StatisticsTrackerUpgradeable.sol/StatisticsTrackerUpgradeable.json'
+}
+
+
+def abi_hash(abi):
+    return hashlib.sha256(json.dumps(abi, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+
+def read_artifacts(artifacts_dir=ARTIFACTS_DIR, contracts=CONTRACT_ARTIFACTS):
+    bundle = {'version': BUNDLE_VERSION, 'contracts': {}}
+    for contract_name, file_path in contracts.items():
+        with open(Path(artifacts_dir) / file_path) as f:
+            abi = json.load(f)['abi']
+        bundle['contracts'][contract_name] = {'hash': abi_hash(abi), 'abi': abi}
+    return bundle
+
+
+def write_bundle(bundle, bundle_path=BUNDLE_PATH):
+    # Write to a temporary file first so concurrent workers never read a half-written bundle
+    bundle_path = Path(bundle_path)
+    tmp_path = bundle_path.with_name(f'{bundle_path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(bundle, f, separators=(',', ':'))
+    os.replace(tmp_path, bundle_path)
+
+
+def build_bundle(artifacts_dir=ARTIFACTS_DIR, bundle_path=BUNDLE_PATH, contracts=CONTRACT_ARTIFACTS):
+    bundle = read_artifacts(artifacts_dir, contracts)
+    write_bundle(bundle, bundle_path)
+    return bundle
+
+
+def is_fresh(artifacts_dir=ARTIFACTS_DIR, bundle_path=BUNDLE_PATH, contracts=CONTRACT_ARTIFACTS):
+    # Only stat() calls: a bundle older than any artifact was built before the last compile
+    try:
+        bundle_mtime = os.stat(bundle_path).st_mtime
+    except FileNotFoundError:
+        return False
+    for file_path in contracts.values():
+        try:
+            if os.stat(Path(artifacts_dir) / file_path).st_mtime > bundle_mtime:
+                return False
+        except FileNotFoundError:
+            # Deployments may ship the bundle without the artifacts
+            continue
+    return True
+
+
+def load_abis(artifacts_dir=ARTIFACTS_DIR, bundle_path=BUNDLE_PATH, contracts=CONTRACT_ARTIFACTS):
+    bundle = None
+    if is_fresh(artifacts_dir, bundle_path, contracts):
+        with open(bundle_path) as f:
+            bundle = json.load(f)
+        if bundle.get('version') != BUNDLE_VERSION or set(contracts) - set(bundle['contracts']):
+            bundle = None
+    if bundle is None:
+        bundle = read_artifacts(artifacts_dir, contracts)
+        try:
+            write_bundle(bundle, bundle_path)
+        except OSError:
+            # Read-only deployments keep working, just without the fast path
+            pass
+    return {name: bundle['contracts'][name]['abi'] for name in contracts}
+
+
+if __name__ == '__main__':
+    built = build_bundle()
+    for name, entry in built['contracts'].items():
+        print(f"{name}: {entry['hash'][:16]}")
+    print(f'Wrote {BUNDLE_PATH}')
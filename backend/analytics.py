@@ -0,0 +1,255 @@
+import numpy as np
+
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+# Grades are uint8 0..100 on chain; the last bin is closed so 100 is counted
+DEFAULT_BINS = 10
+GRADE_RANGE = (0, 100)
+
+
+def grade_bins(bins=DEFAULT_BINS):
+    return np.linspace(GRADE_RANGE[0], GRADE_RANGE[1], bins + 1)
+
+
+# Course ids bound per IN (...) query, well below SQLite's host parameter limit
+SQL_CHUNK_SIZE = 500
+
+
+def _rows_for_courses(db, query, course_ids):
+    rows = []
+    for start in range(0, len(course_ids), SQL_CHUNK_SIZE):
+        chunk = course_ids[start:start + SQL_CHUNK_SIZE]
+        rows += db.execute(f'{query} WHERE course_id IN ({", ".join("?" * len(chunk))})', chunk).fetchall()
+    return rows
+
+
+class CourseData:
+    """Grade and attendance records of many courses as flat parallel arrays.
+
+    Courses and students are replaced by dense indices (into course_ids and students), so every
+    statistic below is a bincount or a sort over the whole data set instead of a loop per course.
+    """
+
+    def __init__(self, grade_courses, grade_students, grades, attendance_courses, attendance_students, attended,
+                 course_ids=None):
+        grade_courses = np.asarray(grade_courses, dtype=np.int64)
+        attendance_courses = np.asarray(attendance_courses, dtype=np.int64)
+        if course_ids is None:
+            course_ids = np.union1d(grade_courses, attendance_courses)
+        self.course_ids = np.unique(np.asarray(course_ids, dtype=np.int64))
+
+        # Records of courses that were not asked for are dropped
+        keep_grades = np.isin(grade_courses, self.course_ids)
+        keep_attendance = np.isin(attendance_courses, self.course_ids)
+        self.grade_course = np.searchsorted(self.course_ids, grade_courses[keep_grades])
+        self.attendance_course = np.searchsorted(self.course_ids, attendance_courses[keep_attendance])
+        self.grades = np.asarray(grades, dtype=np.float64)[keep_grades]
+        self.attended = np.asarray(attended, dtype=bool)[keep_attendance]
+
+        grade_students = np.asarray(grade_students, dtype=str)[keep_grades]
+        attendance_students = np.asarray(attendance_students, dtype=str)[keep_attendance]
+        self.students, student_index = np.unique(
+            np.concatenate((grade_students, attendance_students)), return_inverse=True
+        )
+        student_index = student_index.reshape(-1)
+        self.grade_student = student_index[:len(grade_students)]
+        self.attendance_student = student_index[len(grade_students):]
+
+    @classmethod
+    def from_records(cls, grade_records, attendance_records, course_ids=None):
+        # Grade tuples are (courseId, student, grade, date), attendance tuples (courseId, student, attended)
+        grade_columns = list(zip(*grade_records)) or [(), (), ()]
+        attendance_columns = list(zip(*attendance_records)) or [(), (), ()]
+        return cls(*grade_columns[:3], *attendance_columns[:3], course_ids=course_ids)
+
+    @classmethod
+    def from_event_index(cls, db, course_ids=None):
+        # Reads the GradeRecorded / AttendanceMarked tables of an EventIndexer database; given
+        # course_ids, only their rows are read through the (course_id, student) indexes
+        if course_ids is None:
+            grade_rows = db.execute('SELECT course_id, student, grade FROM grades').fetchall()
+            attendance_rows = db.execute('SELECT course_id, student, attended FROM attendance').fetchall()
+            return cls.from_records(grade_rows, attendance_rows)
+        course_ids = sorted({int(course_id) for course_id in course_ids})
+        grade_rows = _rows_for_courses(db, 'SELECT course_id, student, grade FROM grades', course_ids)
+        attendance_rows = _rows_for_courses(db, 'SELECT course_id, student, attended FROM attendance', course_ids)
+        return cls.from_records(grade_rows, attendance_rows, course_ids=course_ids)
+
+    @property
+    def course_count(self):
+        return len(self.course_ids)
+
+    @property
+    def student_count(self):
+        return len(self.students)
+
+
+def group_percentiles(groups, values, group_count, percentiles):
+    # Per-group percentiles with the same linear interpolation as np.percentile; NaN for empty groups
+    percentiles = np.asarray(percentiles, dtype=np.float64)
+    if len(values) == 0:
+        return np.full((group_count, len(percentiles)), np.nan)
+    sorted_values = values[np.lexsort((values, groups))]
+    counts = np.bincount(groups, minlength=group_count)
+    starts = np.cumsum(counts) - counts
+    positions = np.maximum(counts - 1, 0)[:, None] * (percentiles / 100)[None, :]
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    last = len(sorted_values) - 1
+    low_values = sorted_values[np.minimum(starts[:, None] + lower, last)]
+    high_values = sorted_values[np.minimum(starts[:, None] + upper, last)]
+    result = low_values + (high_values - low_values) * (positions - lower)
+    result[counts == 0] = np.nan
+    return result
+
+
+def _group_mean(groups, values, group_count):
+    counts = np.bincount(groups, minlength=group_count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.bincount(groups, weights=values, minlength=group_count) / counts, counts
+
+
+def _group_correlation(groups, x, y, group_count):
+    # Pearson r per group; NaN when a group has fewer than two points or no variance
+    mean_x, counts = _group_mean(groups, x, group_count)
+    mean_y, _ = _group_mean(groups, y, group_count)
+    dx = x - mean_x[groups]
+    dy = y - mean_y[groups]
+    sxy = np.bincount(groups, weights=dx * dy, minlength=group_count)
+    sxx = np.bincount(groups, weights=dx * dx, minlength=group_count)
+    syy = np.bincount(groups, weights=dy * dy, minlength=group_count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = sxy / np.sqrt(sxx * syy)
+    r[(counts < 2) | ~np.isfinite(r)] = np.nan
+    return r
+
+
+def course_statistics(data, percentiles=DEFAULT_PERCENTILES, bins=DEFAULT_BINS):
+    n = data.course_count
+    groups, values = data.grade_course, data.grades
+    mean, counts = _group_mean(groups, values, n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(np.bincount(groups, weights=(values - mean[groups]) ** 2, minlength=n) / counts)
+    # 0th and 100th percentiles are the exact min and max
+    quantiles = group_percentiles(groups, values, n, (0, 50, 100, *percentiles))
+
+    edges = grade_bins(bins)
+    in_range = (values >= edges[0]) & (values <= edges[-1])
+    bin_index = np.minimum(np.searchsorted(edges, values[in_range], side='right') - 1, bins - 1)
+    histogram = np.bincount(groups[in_range] * bins + bin_index, minlength=n * bins).reshape(n, bins)
+
+    attendance_rate, attendance_counts = _group_mean(data.attendance_course, data.attended.astype(np.float64), n)
+    return {
+        'course_id': data.course_ids,
+        'grade_count': counts,
+        'mean': mean,
+        'std': std,
+        'min': quantiles[:, 0],
+        'median': quantiles[:, 1],
+        'max': quantiles[:, 2],
+        'percentiles': quantiles[:, 3:],
+        'histogram': histogram,
+        'bin_edges': edges,
+        'attendance_count': attendance_counts,
+        'attendance_rate': attendance_rate * 100,
+    }
+
+
+def _pair_means(courses, students, values, student_count):
+    # Mean value per (course, student) pair, keyed by course * student_count + student
+    keys, inverse = np.unique(courses * student_count + students, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    means = np.bincount(inverse, weights=values) / np.bincount(inverse)
+    return keys, means
+
+
+def student_gpa(data, scale=4.0):
+    # Each course counts once: the GPA averages a student's per-course mean grades
+    keys, course_means = _pair_means(data.grade_course, data.grade_student, data.grades, data.student_count)
+    students = keys % max(data.student_count, 1)
+    average, course_counts = _group_mean(students, course_means, data.student_count)
+    return {
+        'student': data.students,
+        'course_count': course_counts,
+        'average': average,
+        'gpa': average / GRADE_RANGE[1] * scale,
+    }
+
+
+def attendance_grade_correlation(data):
+    # Attendance rate against mean grade over (course, student) pairs that have both
+    n = data.student_count
+    grade_keys, grade_means = _pair_means(data.grade_course, data.grade_student, data.grades, n)
+    attendance_keys, attendance_rates = _pair_means(
+        data.attendance_course, data.attendance_student, data.attended.astype(np.float64), n
+    )
+    keys, grade_positions, attendance_positions = np.intersect1d(grade_keys, attendance_keys, return_indices=True)
+    x = attendance_rates[attendance_positions]
+    y = grade_means[grade_positions]
+    courses = keys // max(n, 1)
+    return {
+        'overall': _group_correlation(np.zeros(len(keys), dtype=np.int64), x, y, 1)[0],
+        'per_course': _group_correlation(courses, x, y, data.course_count),
+        'pairs': len(keys),
+    }
+
+
+def _number(value):
+    return None if np.isnan(value) else float(value)
+
+
+def _percentile_list(percentiles):
+    # Percentiles usually arrive from JSON, so strings, booleans and nulls are rejected as ValueError
+    if isinstance(percentiles, (str, bytes)):
+        raise ValueError('percentiles must be a list of numbers')
+    try:
+        percentiles = list(percentiles)
+    except TypeError:
+        raise ValueError('percentiles must be a list of numbers') from None
+    if not all(isinstance(p, (int, float)) and not isinstance(p, bool) for p in percentiles):
+        raise ValueError('percentiles must be a list of numbers')
+    return percentiles
+
+
+def report(data, percentiles=DEFAULT_PERCENTILES, bins=DEFAULT_BINS, scale=4.0):
+    # JSON-ready summary; NaN (no data) becomes None
+    percentiles = _percentile_list(percentiles)
+    if bins < 1 or any(not 0 <= p <= 100 for p in percentiles):
+        raise ValueError('bins must be positive and percentiles within 0..100')
+    stats = course_statistics(data, percentiles, bins)
+    gpa = student_gpa(data, scale)
+    correlation = attendance_grade_correlation(data)
+    labels = [f'{p:g}' for p in percentiles]
+    courses = [
+        {
+            'course_id': int(course_id),
+            'grades': {
+                'count': int(count),
+                'mean': _number(mean),
+                'std': _number(std),
+                'min': _number(low),
+                'median': _number(median),
+                'max': _number(high),
+                'percentiles': dict(zip(labels, map(_number, row))),
+                'histogram': histogram,
+            },
+            'attendance': {'count': int(attendance_count), 'rate': _number(rate)},
+            'attendance_grade_correlation': _number(r),
+        }
+        for course_id, count, mean, std, low, median, high, row, histogram, attendance_count, rate, r in zip(
+            stats['course_id'], stats['grade_count'], stats['mean'], stats['std'], stats['min'], stats['median'],
+            stats['max'], stats['percentiles'], stats['histogram'].tolist(), stats['attendance_count'],
+            stats['attendance_rate'], correlation['per_course']
+        )
+    ]
+    students = [
+        {'student': str(student), 'courses': int(count), 'average': _number(average), 'gpa': _number(value)}
+        for student, count, average, value in zip(gpa['student'], gpa['course_count'], gpa['average'], gpa['gpa'])
+        if count
+    ]
+    return {
+        'bin_edges': stats['bin_edges'].tolist(),
+        'courses': courses,
+        'students': students,
+        'attendance_grade_correlation': _number(correlation['overall']),
+        'correlation_pairs': correlation['pairs'],
+    }
@@ -1,7 +1,54 @@
-from flask import Flask, request, jsonify
-from contract_interaction import get_contract_instance, call_contract_function, send_transaction
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from flask import Flask, Response, request, jsonify, url_for
+from contract_interaction import (
+    get_contract_instance, call_contract_function, send_transaction, get_call_cache, get_registry, get_receipt_tracker,
+    simulate_transaction, get_role_cache, missing_role, get_interaction, get_outbox
+)
+from analytics import DEFAULT_BINS, DEFAULT_PERCENTILES
+from outbox import SENT, OutboxFull
+from simulation import SimulationFailed
+import metrics
 
 app = Flask(__name__)
+metrics.instrument_flask(app)
+
+# Result callbacks are posted off the receipt poller thread
+_callback_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='tx-callback')
+
+
+def post_callback(callback_url, tx_hash):
+    try:
+        requests.post(callback_url, json=get_receipt_tracker().status(tx_hash), timeout=10)
+    except requests.RequestException:
+        app.logger.warning('Callback to %s for %s failed', callback_url, tx_hash)
+
+
+def post_job_callback(callback_url, job):
+    try:
+        requests.post(callback_url, json=job.to_dict(), timeout=10)
+    except requests.RequestException:
+        app.logger.warning('Callback to %s for job %s failed', callback_url, job.id)
+
+
+def callback_on_receipt(callback_url, txn_hash):
+    pending = get_receipt_tracker().get(txn_hash)
+    if pending is None:
+        _callback_executor.submit(post_callback, callback_url, txn_hash)
+    else:
+        pending.add_done_callback(lambda _: _callback_executor.submit(post_callback, callback_url, txn_hash))
+
+
+def job_finished(job):
+    # Called on an outbox worker: sent jobs report their receipt, failed ones the job itself
+    callback_url = job.meta.get('callback_url')
+    if not callback_url:
+        return
+    if job.state == SENT:
+        callback_on_receipt(callback_url, job.tx_hash)
+    else:
+        _callback_executor.submit(post_job_callback, callback_url, job)
 
 @app.route('/list-functions', methods=['POST'])
 def list_functions():
@@ -35,8 +82,119 @@ def send_transaction_api():
     args = data.get('args', [])
     
     contract = get_contract_instance(contract_address, abi)
-    txn_hash = send_transaction(contract, function_name, *args)
-    return jsonify({'transaction_hash': txn_hash})
+    # With ROLE_CACHE set, writes no signer is allowed to make are refused without any RPC
+    role = missing_role(contract, function_name)
+    if role is not None:
+        return jsonify({'error': 'Missing role', 'role': role}), 403
+    # dry_run only simulates; otherwise a failing pre-flight (preflight: false skips it) answers 422
+    if data.get('dry_run'):
+        return jsonify(simulate_transaction(contract, function_name, *args))
+
+    # With OUTBOX_DB set the write is persisted and answered with a job id; workers send it
+    outbox = get_outbox(on_finished=job_finished)
+    if outbox is not None:
+        # sender pins the signer; it is normalized to the configured checksum address
+        sender = data.get('sender')
+        if sender is not None:
+            try:
+                sender = outbox.lane_for(sender)
+            except ValueError as e:
+                return jsonify({'error': 'Unknown sender', 'reason': str(e)}), 400
+        try:
+            job = outbox.enqueue(
+                contract.address, abi, function_name, args,
+                idempotency_key=request.headers.get('Idempotency-Key') or data.get('idempotency_key'),
+                lane=sender,
+                meta={'preflight': data.get('preflight'), 'callback_url': data.get('callback_url')}
+            )
+        except OutboxFull as e:
+            return jsonify({'error': 'Outbox is full', 'reason': str(e)}), 429, {'Retry-After': '5'}
+        return jsonify({
+            'job_id': job.id,
+            'state': job.state,
+            'status_url': url_for('job_status', job_id=job.id)
+        }), 202
+    try:
+        txn_hash = send_transaction(contract, function_name, *args, preflight=data.get('preflight'))
+    except SimulationFailed as e:
+        return jsonify({'error': 'Transaction would revert', 'reason': e.reason}), 422
+
+    # The response does not wait for mining; poll status_url or pass callback_url to get the outcome
+    callback_url = data.get('callback_url')
+    if callback_url:
+        callback_on_receipt(callback_url, txn_hash)
+    return jsonify({
+        'transaction_hash': txn_hash,
+        'status_url': url_for('transaction_status', tx_hash=txn_hash)
+    })
+
+@app.route('/transactions/<tx_hash>', methods=['GET'])
+def transaction_status(tx_hash):
+    status = get_receipt_tracker().status(tx_hash)
+    if status is None:
+        return jsonify({'error': 'Unknown transaction'}), 404
+    return jsonify(status)
+
+@app.route('/jobs/<int:job_id>', methods=['GET'])
+def job_status(job_id):
+    outbox = get_outbox(on_finished=job_finished)
+    job = outbox.get(job_id) if outbox is not None else None
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    status = job.to_dict()
+    if job.tx_hash is not None and job.state == SENT:
+        status['transaction'] = get_receipt_tracker().status(job.tx_hash)
+    return jsonify(status)
+
+@app.route('/roles/<address>', methods=['GET'])
+def account_roles(address):
+    cache = get_role_cache()
+    if cache is None:
+        return jsonify({'error': 'Role cache is disabled'}), 404
+    return jsonify({'synced': cache.synced, 'roles': cache.roles_of(address)})
+
+@app.route('/analytics', methods=['POST'])
+def course_analytics():
+    # All fields optional: course_ids (default every course), percentiles, bins, scale (GPA), source (events|contract)
+    data = request.json or {}
+    try:
+        result = get_interaction().course_analytics(
+            data.get('course_ids'),
+            percentiles=data.get('percentiles', DEFAULT_PERCENTILES),
+            bins=int(data.get('bins', DEFAULT_BINS)),
+            scale=float(data.get('scale', 4.0)),
+            source=data.get('source')
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
+@app.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    return jsonify({'calls': get_call_cache().stats(), 'registry': get_registry().stats()})
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+def profiler():
+    # POST {"enabled": true|false, "reset": true} switches sampling; GET returns collapsed stacks
+    if request.method == 'POST':
+        data = request.json or {}
+        if data.get('reset'):
+            metrics.profiler.reset()
+        if 'enabled' in data:
+            if data['enabled']:
+                metrics.profiler.start()
+            else:
+                metrics.profiler.stop()
+        return jsonify({'running': metrics.profiler.running})
+    limit = request.args.get('limit', type=int)
+    return Response(metrics.profiler.collapsed(limit), content_type='text/plain; charset=utf-8')
+
+# Stacks reveal internals and sampling costs CPU, so the endpoint only exists when profiling is enabled
+if metrics.profiler_enabled():
+    app.add_url_rule('/debug/profiler', view_func=profiler, methods=['GET', 'POST'])
 
 if __name__ == '__main__':
     app.run(debug=True)
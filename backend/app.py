@@ -1,11 +1,13 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, redirect, url_for, flash
 from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, SubmitField
 from wtforms.validators import DataRequired
 from contract_interaction import get_contract_instance, call_contract_function, send_transaction
+import metrics
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your_secret_key'
+metrics.instrument_flask(app)
 
 class ContractForm(FlaskForm):
     contract_address = StringField('Contract Address', validators=[DataRequired()])
@@ -42,5 +44,9 @@ def index():
 
     return render_template('index.html', form=form)
 
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,207 @@
+import asyncio
+import contextlib
+import json
+import os
+
+import aiohttp
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from hexbytes import HexBytes
+from web3 import AsyncWeb3
+from web3.exceptions import TransactionNotFound
+
+from async_contract_interaction import sign_and_send
+from contract_interaction import make_fee_oracle, make_signer_pool, preflight_enabled
+from contract_registry import ContractRegistry
+from fee_oracle import AsyncFeeOracle
+from signer_pool import AsyncSignerPool
+from simulation import AsyncSimulator, SimulationFailed
+from transaction_pipeline import is_nonce_error
+
+
+class RequestCoalescer:
+    """Shares one in-flight upstream call between identical concurrent requests.
+
+    The first request for a key starts the call; requests arriving before it finishes await
+    the same future instead of issuing their own eth_call.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def run(self, key, factory):
+        future = self._in_flight.get(key)
+        if future is None:
+            self.started += 1
+            future = asyncio.ensure_future(factory())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # A client disconnecting must not cancel the call for everyone else waiting on it
+        return await asyncio.shield(future)
+
+    def stats(self):
+        return {'in_flight': len(self._in_flight), 'started': self.started, 'coalesced': self.coalesced}
+
+
+# Async counterpart of the shared connection in contract_interaction
+w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(os.getenv('INFURA_URL')))
+registry = ContractRegistry(w3, max_contracts=int(os.getenv('CONTRACT_CACHE_SIZE', '256')))
+coalescer = RequestCoalescer()
+_signer_pool = None
+_fee_oracle = None
+_simulator = None
+
+
+def get_contract_instance(contract_address, abi):
+    return registry.get_contract(contract_address, abi)
+
+
+def call_key(contract, function_name, args, block_identifier):
+    return (contract.address.lower(), function_name, json.dumps(args, sort_keys=True), str(block_identifier))
+
+
+async def call_contract_function(contract, function_name, *args, block_identifier='latest'):
+    function_name = registry.resolve_function_name(contract, function_name)
+    return await coalescer.run(
+        call_key(contract, function_name, list(args), block_identifier),
+        lambda: getattr(contract.functions, function_name)(*args).call(block_identifier=block_identifier)
+    )
+
+
+def get_signer_pool():
+    # Same SIGNER_PRIVATE_KEYS / NONCE_LOCK_DB settings as the sync backend
+    global _signer_pool
+    if _signer_pool is None:
+        _signer_pool = make_signer_pool(w3, AsyncSignerPool)
+    return _signer_pool
+
+
+def get_fee_oracle():
+    global _fee_oracle
+    if _fee_oracle is None:
+        _fee_oracle = make_fee_oracle(w3, AsyncFeeOracle)
+    return _fee_oracle
+
+
+def get_simulator():
+    global _simulator
+    if _simulator is None:
+        _simulator = AsyncSimulator(w3)
+    return _simulator
+
+
+def get_account():
+    # Default signer
+    return get_signer_pool().primary.account
+
+
+async def simulate_transaction(contract, function_name, *args):
+    # Dry run from the default signer; returns {'ok': ..., 'result' | 'reason': ...}
+    function_name = registry.resolve_function_name(contract, function_name)
+    return await get_simulator().simulate(getattr(contract.functions, function_name)(*args), get_account().address)
+
+
+async def send_transaction(contract, function_name, *args, preflight=None, sender=None, on_signed=None):
+    function_name = registry.resolve_function_name(contract, function_name)
+    signer_pool = get_signer_pool()
+    signer = signer_pool.acquire(sender)
+    try:
+        contract_function = getattr(contract.functions, function_name)(*args)
+        if preflight_enabled() if preflight is None else preflight:
+            # A revert is reported here in one eth_call instead of after a full send and receipt
+            await get_simulator().check(contract_function, signer.address)
+        tx_hash = await sign_and_send(w3, get_fee_oracle(), signer, contract_function, on_signed=on_signed)
+    finally:
+        # Nothing tracks receipts here, so the signer counts as loaded only while sending
+        signer_pool.done(signer)
+    return tx_hash.hex()
+
+
+async def transaction_mined(tx_hash):
+    try:
+        return await w3.eth.get_transaction_receipt(tx_hash) is not None
+    except TransactionNotFound:
+        return False
+
+
+async def rebroadcast_transaction(sender, raw_transaction, tx_hash):
+    # Resends a stored signed transaction. Returns None when its nonce was taken by another
+    # transaction, so it can never be mined and has to be signed again.
+    try:
+        await w3.eth.send_raw_transaction(HexBytes(raw_transaction))
+    except ValueError as e:
+        if is_nonce_error(e):
+            if await transaction_mined(tx_hash):
+                return tx_hash
+            await get_signer_pool().get(sender).nonce_manager.resync()
+            return None
+        if 'already known' not in str(e).lower():
+            raise
+    return tx_hash
+
+
+async def list_functions(request):
+    data = await request.json()
+    contract = get_contract_instance(data['contract_address'], data['abi'])
+    function_names = [func.fn_name for func in contract.all_functions()]
+    return JSONResponse(function_names)
+
+
+async def call_function(request):
+    data = await request.json()
+    contract = get_contract_instance(data['contract_address'], data['abi'])
+    result = await call_contract_function(
+        contract,
+        data['function_name'],
+        *data.get('args', []),
+        block_identifier=data.get('block', 'latest')
+    )
+    return JSONResponse({'result': result})
+
+
+async def send_transaction_api(request):
+    data = await request.json()
+    contract = get_contract_instance(data['contract_address'], data['abi'])
+    args = data.get('args', [])
+    # Same contract as the Flask /send: dry_run only simulates, a failing pre-flight answers 422
+    if data.get('dry_run'):
+        return JSONResponse(await simulate_transaction(contract, data['function_name'], *args))
+    try:
+        txn_hash = await send_transaction(contract, data['function_name'], *args, preflight=data.get('preflight'))
+    except SimulationFailed as e:
+        return JSONResponse({'error': 'Transaction would revert', 'reason': e.reason}, status_code=422)
+    return JSONResponse({'transaction_hash': txn_hash})
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # One pooled keep-alive session for every upstream RPC request
+    pool_size = int(os.getenv('WEB3_HTTP_POOL_SIZE', '32'))
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=pool_size, keepalive_timeout=30),
+        timeout=aiohttp.ClientTimeout(total=30)
+    )
+    await w3.provider.cache_async_session(session)
+    try:
+        yield
+    finally:
+        await session.close()
+
+
+app = Starlette(
+    routes=[
+        Route('/list-functions', list_functions, methods=['POST']),
+        Route('/call', call_function, methods=['POST']),
+        Route('/send', send_transaction_api, methods=['POST']),
+    ],
+    lifespan=lifespan
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host=os.getenv('API_HOST', '127.0.0.1'), port=int(os.getenv('API_PORT', '8000')))
@@ -0,0 +1,226 @@
+import asyncio
+import datetime
+import os
+
+import aiohttp
+from web3 import AsyncWeb3
+
+from call_cache import AsyncBlockCache
+from contract_interaction import (
+    DeployedContracts, make_call_cache, make_fee_oracle, make_http_session, make_signer_pool, make_web3,
+    preflight_enabled, schedule_date
+)
+from fee_oracle import AsyncFeeOracle
+from signer_pool import AsyncSignerPool
+from simulation import AsyncSimulator
+from transaction_pipeline import is_nonce_error
+
+
+async def sign_and_send(connection, fee_oracle, signer, contract_function, params=None, on_signed=None):
+    # Async counterpart of contract_interaction.sign_and_send; returns the transaction hash.
+    # on_signed(tx_hash, raw_transaction, nonce) runs before the broadcast, e.g. to persist the
+    # transaction; from then on the nonce stays reserved and the stored transaction is resent
+    nonce = await signer.nonce_manager.next_nonce()
+    persisted = False
+    try:
+        transaction = await fee_oracle.build_transaction(contract_function, dict(params or {}, **{
+            'from': signer.address,
+            'nonce': nonce,
+        }))
+        signed_txn = connection.eth.account.sign_transaction(transaction, signer.key)
+        if on_signed is not None:
+            on_signed(signed_txn.hash, signed_txn.rawTransaction, nonce)
+            persisted = True
+        return await connection.eth.send_raw_transaction(signed_txn.rawTransaction)
+    except ValueError as e:
+        if persisted:
+            raise
+        if is_nonce_error(e):
+            await signer.nonce_manager.resync()
+        else:
+            await signer.nonce_manager.release(nonce)
+        raise
+    except Exception:
+        if not persisted:
+            await signer.nonce_manager.release(nonce)
+        raise
+
+
+class AsyncContractInteraction(DeployedContracts):
+    """asyncio counterpart of ContractInteraction.
+
+    All RPC goes through one pooled aiohttp session, so independent reads can be fanned out
+    with asyncio.gather instead of blocking a worker per call:
+
+        async with AsyncContractInteraction() as interaction:
+            averages = await asyncio.gather(*(interaction.get_average_grade(c) for c in course_ids))
+
+    Writes use the same signer pool, fee oracle and pre-flight settings as the sync class, and
+    reads the same per-block call cache and event index.
+    """
+
+    def __init__(self, pool_size=None):
+        self.pool_size = pool_size or int(os.getenv('WEB3_HTTP_POOL_SIZE', '32'))
+        self.session = None
+
+        # Connect to Ethereum node
+        self.w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(os.getenv('INFURA_URL')))
+
+        # Writes are spread over the signer pool; the first key is the default account
+        self.signers = make_signer_pool(self.w3, AsyncSignerPool)
+        self.account = self.signers.primary.account
+        self.private_key = self.account.key
+        self.nonce_manager = self.signers.primary.nonce_manager
+        self.w3.eth.default_account = self.account.address
+        self._chain_id = None
+        self.fee_oracle = make_fee_oracle(self.w3, AsyncFeeOracle)
+        self.preflight = preflight_enabled()
+        self.simulator = AsyncSimulator(self.w3)
+
+        # Addresses, ABIs and contract objects are loaded on first use; view calls are cached per block
+        self._init_contracts()
+        self.call_cache = make_call_cache(self.w3, AsyncBlockCache)
+
+        # The event index syncs from its own thread, so it gets a sync connection
+        self._init_event_index(make_web3(make_http_session()) if os.getenv('EVENT_INDEX_DB') else None)
+
+    async def connect(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=30))
+            await self.w3.provider.cache_async_session(self.session)
+        return self
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def get_chain_id(self):
+        if self._chain_id is None:
+            self._chain_id = await self.w3.eth.chain_id
+        return self._chain_id
+
+    async def _call(self, contract_key, function_name, *args):
+        await self.connect()
+        return await self.call_cache.call(self.contracts[contract_key], function_name, *args)
+
+    async def _send_transaction(self, contract, function_name, *args, preflight=None):
+        await self.connect()
+        signer = self.signers.acquire()
+        try:
+            contract_function = getattr(contract.functions, function_name)(*args)
+            if self.preflight if preflight is None else preflight:
+                await self.simulator.check(contract_function, signer.address)
+            tx_hash = await sign_and_send(
+                self.w3, self.fee_oracle, signer, contract_function, {'chainId': await self.get_chain_id()}
+            )
+            receipt = await self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            if receipt['status'] == 0:
+                # Out of gas means the cached estimate is stale; the node has the gas limit we sent
+                self.fee_oracle.observe_receipt(await self.w3.eth.get_transaction(tx_hash), receipt)
+        finally:
+            self.signers.done(signer)
+        # Our own write may change what the cached views return
+        self.call_cache.refresh()
+        return receipt
+
+    async def gather_calls(self, calls):
+        # calls: list of (contract key, function_name, args) run concurrently over the pool
+        return await asyncio.gather(*(self._call(key, name, *args) for key, name, args in calls))
+
+    # Access Control Functions
+    async def assign_role(self, address, role):
+        return await self._send_transaction(self.contracts['access_control'], 'assignRole', address, role)
+
+    async def has_role(self, role_hash, address):
+        return await self._call('access_control', 'hasRole', role_hash, address)
+
+    # Course Management Functions
+    async def create_course(self, name, description, capacity):
+        return await self._send_transaction(
+            self.contracts['course_management'],
+            'createCourse',
+            name,
+            description,
+            capacity
+        )
+
+    async def enroll_in_course(self, course_id):
+        return await self._send_transaction(self.contracts['course_management'], 'enrollInCourse', course_id)
+
+    async def get_course_details(self, course_id):
+        return await self._call('course_management', 'getCourseDetails', course_id)
+
+    # Grade Management Functions
+    async def record_grade(self, course_id, student, grade):
+        return await self._send_transaction(
+            self.contracts['grade_management'],
+            'recordGrade',
+            course_id,
+            student,
+            grade
+        )
+
+    async def mark_attendance(self, course_id, student, attended):
+        return await self._send_transaction(
+            self.contracts['grade_management'],
+            'markAttendance',
+            course_id,
+            student,
+            attended
+        )
+
+    async def get_grades(self, course_id):
+        return await self._call('grade_management', 'getGrades', course_id)
+
+    async def get_attendance(self, course_id):
+        return await self._call('grade_management', 'getAttendance', course_id)
+
+    # Schedule Management Functions
+    async def create_schedule(self, course_id, date, time):
+        return await self._send_transaction(
+            self.contracts['schedule_management'],
+            'createSchedule',
+            course_id,
+            date,
+            time
+        )
+
+    async def get_schedule(self, course_id):
+        return await self._call('schedule_management', 'getSchedule', course_id)
+
+    async def get_schedule_by_date(self, course_id, date):
+        if isinstance(date, datetime.date):
+            date = date.isoformat()
+        return await self._call('schedule_management', 'getScheduleByDate', course_id, date)
+
+    async def get_schedule_in_range(self, course_id, start, end):
+        return await self._call('schedule_management', 'getScheduleInRange', course_id, schedule_date(start), schedule_date(end))
+
+    # Statistics Functions
+    async def get_average_grade(self, course_id):
+        if self._index_is_current():
+            return self.event_index.get_average_grade(course_id)
+        return await self._call('statistics_tracker', 'getAverageGrade', course_id)
+
+    async def get_attendance_rate(self, course_id):
+        if self._index_is_current():
+            return self.event_index.get_attendance_rate(course_id)
+        return await self._call('statistics_tracker', 'getAttendanceRate', course_id)
+
+    async def get_student_average_grade(self, course_id, student):
+        if self._index_is_current():
+            return self.event_index.get_average_grade(course_id, student)
+        return await self._call('statistics_tracker', 'getAverageGradeByStudent', course_id, student)
+
+    async def get_student_attendance_rate(self, course_id, student):
+        if self._index_is_current():
+            return self.event_index.get_attendance_rate(course_id, student)
+        return await self._call('statistics_tracker', 'getAttendanceRateByStudent', course_id, student)
@@ -0,0 +1,65 @@
+"""Compare per-call record_grade against batched record_grades on a live node.
+
+Uses the same INFURA_URL / PRIVATE_KEY / .deployed configuration as ContractInteraction,
+so point it at a local Hardhat node with the proxies deployed and a TEACHER_ROLE key.
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+import click
+from web3 import Web3
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from contract_interaction import ContractInteraction
+
+
+def student_address(index):
+    return Web3.to_checksum_address(f'0x{index + 1:040x}')
+
+
+def run_single(interaction, course_id, count):
+    started = time.perf_counter()
+    gas_used = 0
+    for i in range(count):
+        receipt = interaction.record_grade(course_id, student_address(i), 60 + i % 40)
+        gas_used += receipt['gasUsed']
+    return {'wall_time': time.perf_counter() - started, 'gas_used': gas_used, 'transactions': count}
+
+
+def run_batch(interaction, course_id, count, chunk_size):
+    records = [(course_id, student_address(i), 60 + i % 40) for i in range(count)]
+    started = time.perf_counter()
+    results = interaction.record_grades(records, chunk_size=chunk_size)
+    wall_time = time.perf_counter() - started
+
+    tx_hashes = {result['transactionHash'] for result in results if result['transactionHash']}
+    gas_used = sum(interaction.w3.eth.get_transaction_receipt(tx_hash)['gasUsed'] for tx_hash in tx_hashes)
+    failed = sum(1 for result in results if result['status'] != 1)
+    return {'wall_time': wall_time, 'gas_used': gas_used, 'transactions': len(tx_hashes), 'failed': failed}
+
+
+@click.command()
+@click.option('--count', default=300, help='Number of grades to record.')
+@click.option('--chunk-size', default=100, help='Grades per batch transaction.')
+@click.option('--course-id', default=1)
+def main(count, chunk_size, course_id):
+    interaction = ContractInteraction()
+    single = run_single(interaction, course_id, count)
+    batch = run_batch(interaction, course_id, count, chunk_size)
+    interaction.receipts.shutdown()
+
+    click.echo(json.dumps({
+        'count': count,
+        'chunk_size': chunk_size,
+        'single': single,
+        'batch': batch,
+        'gas_ratio': batch['gas_used'] / single['gas_used'] if single['gas_used'] else None,
+        'speedup': single['wall_time'] / batch['wall_time'] if batch['wall_time'] else None
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
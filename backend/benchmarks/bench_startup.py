@@ -0,0 +1,68 @@
+"""Measure backend cold-start cost: ABI loading, ContractInteraction construction and CLI boot.
+
+Run after `npx hardhat compile` (and with .deployed/addresses.json in place for the
+ContractInteraction numbers). Each case runs in a fresh interpreter so import and file
+caches inside the process don't flatter the results.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import click
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+CASES = {
+    # Previous behaviour: parse every full Hardhat artifact
+    'abis_from_artifacts': 'import abi_bundle; abi_bundle.read_artifacts()',
+    'abis_from_bundle': 'import abi_bundle; abi_bundle.load_abis()',
+    'contract_interaction_init': 'import contract_interaction; contract_interaction.ContractInteraction()',
+    'contract_interaction_first_call': (
+        'import contract_interaction; '
+        "contract_interaction.ContractInteraction().contracts['course_management']"
+    ),
+    'cli_help': None,
+}
+
+
+def time_case(code, runs):
+    samples = []
+    for _ in range(runs):
+        if code is None:
+            command = [sys.executable, 'cli.py', '--help']
+        else:
+            command = [sys.executable, '-c', code]
+        started = time.perf_counter()
+        subprocess.run(command, cwd=BACKEND_DIR, env=os.environ.copy(), check=True, capture_output=True)
+        samples.append(time.perf_counter() - started)
+    return {'median': statistics.median(samples), 'min': min(samples), 'max': max(samples)}
+
+
+@click.command()
+@click.option('--runs', default=10, help='Interpreter launches per case.')
+@click.option('--case', 'cases', multiple=True, type=click.Choice(list(CASES)), help='Run only these cases.')
+def main(runs, cases):
+    import abi_bundle
+    abi_bundle.build_bundle()
+
+    results = {}
+    for name in cases or CASES:
+        try:
+            results[name] = time_case(CASES[name], runs)
+        except subprocess.CalledProcessError as e:
+            results[name] = {'error': e.stderr.decode().strip().splitlines()[-1]}
+
+    results['bundle_bytes'] = abi_bundle.BUNDLE_PATH.stat().st_size
+    results['artifact_bytes'] = sum(
+        (abi_bundle.ARTIFACTS_DIR / file_path).stat().st_size for file_path in abi_bundle.CONTRACT_ARTIFACTS.values()
+    )
+    click.echo(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, str(BACKEND_DIR))
+    main()
@@ -0,0 +1,303 @@
+"""End-to-end benchmark suite against a local Hardhat (or anvil) chain.
+
+Starts a throwaway node, deploys the proxies with scripts/deploy_proxies.js, seeds courses,
+grades, attendance and schedules, then measures ContractInteraction write/read throughput
+and latency and api.py requests per second. Results are written as JSON; with --baseline
+every metric is compared against a stored run and regressions beyond --tolerance are
+reported (and fail the run with --fail-on-regression).
+
+No baseline is committed: numbers depend on the machine and the node. Record one on the
+machine that will run the comparison, then compare later runs against it:
+
+    python backend/benchmarks/bench_suite.py --output baseline.json
+    python backend/benchmarks/bench_suite.py --output bench.json --baseline baseline.json
+"""
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import click
+import requests
+from web3 import Web3
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+ROOT_DIR = BACKEND_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Hardhat's and anvil's first default account: admin of every proxy after deployment
+DEPLOYER_KEY = '0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d8b9803b0ee8'
+TEACHER_ROLE = 2
+CHAIN_PORT = 8545
+
+
+def student_address(index):
+    return Web3.to_checksum_address(f'0x{index + 1:040x}')
+
+
+def summarize(samples, operations=None):
+    # Latencies in milliseconds; operations/sec over the summed wall time when not given
+    ordered = sorted(samples)
+    total = sum(ordered)
+
+    def percentile(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        'count': len(ordered),
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'ops_per_sec': (operations or len(ordered)) / total if total else None
+    }
+
+
+def wait_for_rpc(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.post(url, json={'jsonrpc': '2.0', 'id': 1, 'method': 'eth_blockNumber', 'params': []}, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.25)
+    raise click.ClickException(f'Node at {url} did not come up within {timeout}s')
+
+
+@contextmanager
+def local_chain(kind):
+    # anvil starts faster; Hardhat is what the deployment scripts are written against
+    if kind == 'anvil':
+        command = ['anvil', '--port', str(CHAIN_PORT), '--chain-id', '1337', '--silent']
+    else:
+        command = ['npx', 'hardhat', 'node', '--port', str(CHAIN_PORT)]
+    if shutil.which(command[0]) is None:
+        raise click.ClickException(f'{command[0]} is not installed')
+    process = subprocess.Popen(command, cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        url = f'http://127.0.0.1:{CHAIN_PORT}'
+        wait_for_rpc(url)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def deploy():
+    subprocess.run(
+        ['npx', 'hardhat', 'run', 'scripts/deploy_proxies.js', '--network', 'localhost'],
+        cwd=ROOT_DIR, check=True, capture_output=True
+    )
+
+
+def seed(interaction, courses, students, grades_per_student, chunk_size):
+    # Every proxy keeps its own roles, so the deployer needs TEACHER_ROLE on each of them
+    for key in ('course_management', 'grade_management', 'schedule_management'):
+        interaction._send_transaction(interaction.contracts[key], 'assignRole', interaction.account.address, TEACHER_ROLE)
+
+    writes = {'create_course': [], 'create_schedule': []}
+    for course in range(courses):
+        started = time.perf_counter()
+        interaction.create_course(f'Course {course}', 'Benchmark course', students)
+        writes['create_course'].append(time.perf_counter() - started)
+        started = time.perf_counter()
+        interaction.create_schedule(course + 1, '2024-09-01', '10:00')
+        writes['create_schedule'].append(time.perf_counter() - started)
+
+    grades = [
+        (course + 1, student_address(student), 60 + (course + student + i) % 40)
+        for course in range(courses) for student in range(students) for i in range(grades_per_student)
+    ]
+    attendance = [
+        (course + 1, student_address(student), (course + student) % 4 != 0)
+        for course in range(courses) for student in range(students)
+    ]
+    started = time.perf_counter()
+    results = interaction.record_grades(grades, chunk_size=chunk_size)
+    grades_time = time.perf_counter() - started
+    started = time.perf_counter()
+    results += interaction.mark_attendance_bulk(attendance, chunk_size=chunk_size)
+    attendance_time = time.perf_counter() - started
+
+    report = {name: summarize(samples) for name, samples in writes.items()}
+    report['record_grades_batched'] = {'rows': len(grades), 'rows_per_sec': len(grades) / grades_time}
+    report['mark_attendance_batched'] = {'rows': len(attendance), 'rows_per_sec': len(attendance) / attendance_time}
+    report['failed_rows'] = sum(1 for result in results if result['status'] != 1)
+    return report
+
+
+def measure_reads(interaction, courses, iterations):
+    reads = {
+        'get_course_details': lambda course: interaction.get_course_details(course),
+        'get_grades': lambda course: interaction.get_grades(course),
+        'iter_grades': lambda course: sum(1 for _ in interaction.iter_grades(course)),
+        'get_average_grade': lambda course: interaction.get_average_grade(course),
+    }
+    report = {}
+    for name, read in reads.items():
+        for cached in (False, True):
+            samples = []
+            for i in range(iterations):
+                if not cached:
+                    interaction.call_cache.clear()
+                started = time.perf_counter()
+                read(i % courses + 1)
+                samples.append(time.perf_counter() - started)
+            report[f'{name}_{"cached" if cached else "uncached"}'] = summarize(samples)
+    return report
+
+
+def measure_api(interaction, requests_total, concurrency):
+    # api.py served by werkzeug's threaded server, hit by a pool of keep-alive clients
+    from werkzeug.serving import make_server
+    import api
+
+    server = make_server('127.0.0.1', 0, api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/call'
+    payload = {
+        'contract_address': interaction.addresses['CourseManagementProxy'],
+        'abi': json.dumps(interaction.abis['CourseManagement']),
+        'function_name': 'getCourseDetails',
+        'args': [1]
+    }
+    sessions = threading.local()
+
+    def one_request(_):
+        if not hasattr(sessions, 'session'):
+            sessions.session = requests.Session()
+        started = time.perf_counter()
+        sessions.session.post(url, json=payload, timeout=30).raise_for_status()
+        return time.perf_counter() - started
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = list(executor.map(one_request, range(requests_total)))
+        wall_time = time.perf_counter() - started
+    finally:
+        server.shutdown()
+    report = summarize(samples)
+    report['ops_per_sec'] = requests_total / wall_time
+    report['concurrency'] = concurrency
+    return report
+
+
+def flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{name}.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current, baseline, tolerance=0.1):
+    """Per-metric change against a baseline run.
+
+    Throughput metrics (*_per_sec) regress when they drop, latencies (*_ms) when they
+    grow; anything else (counts, parameters) is informational only.
+    """
+    current, baseline = flatten(current), flatten(baseline)
+    report = {}
+    for name in sorted(current.keys() & baseline.keys()):
+        before, after = baseline[name], current[name]
+        if name.endswith('_per_sec'):
+            higher_is_better = True
+        elif name.endswith('_ms'):
+            higher_is_better = False
+        else:
+            continue
+        change = (after - before) / before if before else 0.0
+        regressed = change < -tolerance if higher_is_better else change > tolerance
+        report[name] = {'baseline': before, 'current': after, 'change': change, 'regressed': regressed}
+    return report
+
+
+def run(rpc_url, courses, students, grades_per_student, chunk_size, read_iterations, api_requests, api_concurrency):
+    os.environ.update({'INFURA_URL': rpc_url, 'PRIVATE_KEY': DEPLOYER_KEY, 'TX_POLL_INTERVAL': '0.05'})
+    import abi_bundle
+    from contract_interaction import ContractInteraction
+
+    abi_bundle.build_bundle()
+    interaction = ContractInteraction()
+    try:
+        return {
+            'writes': seed(interaction, courses, students, grades_per_student, chunk_size),
+            'reads': measure_reads(interaction, courses, read_iterations),
+            'api': measure_api(interaction, api_requests, api_concurrency)
+        }
+    finally:
+        interaction.receipts.shutdown()
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+@click.command()
+@click.option('--chain', type=click.Choice(['hardhat', 'anvil']), default='hardhat', show_default=True)
+@click.option('--rpc-url', default=None, help='Use an already running node with the proxies deployed.')
+@click.option('--courses', default=5, show_default=True)
+@click.option('--students', default=40, show_default=True)
+@click.option('--grades-per-student', default=3, show_default=True)
+@click.option('--chunk-size', default=100, show_default=True)
+@click.option('--read-iterations', default=200, show_default=True)
+@click.option('--api-requests', default=500, show_default=True)
+@click.option('--api-concurrency', default=8, show_default=True)
+@click.option('--output', type=click.Path(dir_okay=False), default=None, help='Write results JSON here.')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), default=None)
+@click.option('--tolerance', default=0.1, show_default=True, help='Allowed relative slowdown per metric.')
+@click.option('--fail-on-regression', is_flag=True)
+def main(chain, rpc_url, courses, students, grades_per_student, chunk_size, read_iterations,
+         api_requests, api_concurrency, output, baseline, tolerance, fail_on_regression):
+    params = {
+        'chain': 'external' if rpc_url else chain, 'courses': courses, 'students': students,
+        'grades_per_student': grades_per_student, 'chunk_size': chunk_size,
+        'read_iterations': read_iterations, 'api_requests': api_requests, 'api_concurrency': api_concurrency
+    }
+    args = (courses, students, grades_per_student, chunk_size, read_iterations, api_requests, api_concurrency)
+    if rpc_url:
+        results = run(rpc_url, *args)
+    else:
+        with local_chain(chain) as url:
+            deploy()
+            results = run(url, *args)
+
+    report = {
+        'meta': {
+            'revision': git_revision(), 'python': platform.python_version(),
+            'platform': platform.platform(), 'timestamp': time.time(), 'params': params
+        },
+        'results': results
+    }
+    regressions = []
+    if baseline:
+        with open(baseline) as f:
+            report['comparison'] = compare(results, json.load(f)['results'], tolerance)
+        regressions = [name for name, entry in report['comparison'].items() if entry['regressed']]
+        report['regressions'] = regressions
+
+    text = json.dumps(report, indent=2)
+    if output:
+        Path(output).write_text(text)
+    click.echo(text)
+    if regressions and fail_on_regression:
+        raise click.ClickException(f'{len(regressions)} metric(s) regressed: {", ".join(regressions)}')
+
+
+if __name__ == '__main__':
+    main()
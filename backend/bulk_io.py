@@ -0,0 +1,302 @@
+"""Streaming CSV/JSONL import and export for grades, attendance and schedules.
+
+Input files are read row by row and submitted in chunks, with up to `window` chunks in
+flight at once. Progress is checkpointed next to the input file, so an interrupted import
+resumes where it stopped instead of starting over.
+"""
+import csv
+import json
+import os
+from collections import deque
+from pathlib import Path
+
+from web3 import Web3
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    normalized = str(value).strip().lower()
+    if normalized in ('1', 'true', 'yes', 'y'):
+        return True
+    if normalized in ('0', 'false', 'no', 'n', ''):
+        return False
+    raise ValueError(f'not a boolean: {value!r}')
+
+
+# kind -> contract key, contract function, whether the function takes column arrays, input fields
+IMPORTS = {
+    'grades': {
+        'contract': 'grade_management',
+        'function': 'recordGrades',
+        'batched': True,
+        'fields': (('course_id', int), ('student', Web3.to_checksum_address), ('grade', int))
+    },
+    'attendance': {
+        'contract': 'grade_management',
+        'function': 'markAttendanceBatch',
+        'batched': True,
+        'fields': (('course_id', int), ('student', Web3.to_checksum_address), ('attended', parse_bool))
+    },
+    'schedules': {
+        'contract': 'schedule_management',
+        'function': 'createSchedule',
+        'batched': False,
+        'fields': (('course_id', int), ('date', str), ('time', str))
+    }
+}
+
+# kind -> paged ContractInteraction iterator, output columns
+EXPORTS = {
+    'grades': ('iter_grades', ('course_id', 'student', 'grade', 'date')),
+    'attendance': ('iter_attendance', ('course_id', 'student', 'attended')),
+    'schedules': ('iter_schedule', ('course_id', 'date', 'time'))
+}
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return 'jsonl' if Path(path).suffix.lower() in ('.jsonl', '.ndjson') else 'csv'
+
+
+def read_rows(path, fields, fmt=None, start=0):
+    """Yield (row_number, values, error) for every data row from `start` on.
+
+    Rows that cannot be parsed come back with values=None and the error message, so one
+    bad line is reported instead of aborting the whole import.
+    """
+    fmt = detect_format(path, fmt)
+    with open(path, newline='') as f:
+        if fmt == 'csv':
+            records = csv.DictReader(f)
+        else:
+            records = (line for line in f if line.strip())
+        for number, record in enumerate(records):
+            if number < start:
+                continue
+            try:
+                if fmt == 'jsonl':
+                    record = json.loads(record)
+                yield number, tuple(convert(record[name]) for name, convert in fields), None
+            except KeyError as e:
+                yield number, None, f'missing field {e}'
+            except (ValueError, TypeError) as e:
+                yield number, None, str(e)
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Checkpoint:
+    """Import progress stored as JSON next to the input file.
+
+    next_row is the first row not yet settled; submitted maps in-flight row numbers to their
+    transaction hash, so a resumed import can tell which of them were already mined.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.next_row = 0
+        self.submitted = {}
+        self.totals = {'imported': 0, 'failed': 0}
+        if self.path.exists():
+            with open(self.path) as f:
+                state = json.load(f)
+            self.next_row = state['next_row']
+            self.submitted = {int(row): tx_hash for row, tx_hash in state.get('submitted', {}).items()}
+            self.totals.update(state.get('totals', {}))
+
+    def save(self):
+        tmp_path = self.path.with_name(f'{self.path.name}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'next_row': self.next_row, 'submitted': self.submitted, 'totals': self.totals}, f)
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        self.next_row = 0
+        self.submitted = {}
+        self.totals = {'imported': 0, 'failed': 0}
+        if self.path.exists():
+            self.path.unlink()
+
+# Marks rows a previous run already got on-chain
+SKIPPED = object()
+
+
+class BulkImporter:
+    """Submits parsed rows chunk by chunk with a bounded number of chunks in flight.
+
+    submit(values) broadcasts one transaction for a list of row tuples and returns a handle
+    with .tx_hash and .result() (see ReceiptTracker). Batched kinds send a whole chunk in one
+    transaction; the others send one transaction per row. preflight(values), if given,
+    returns a revert reason (or None) per row; rejected rows are left out of the transaction
+    and listed in stats['rejected'], so one bad row does not fail its whole chunk. Chunks
+    settle in input order, so the checkpoint only ever moves past rows whose outcome is known.
+    """
+
+    def __init__(self, submit, batched=True, chunk_size=100, window=4, checkpoint=None,
+                 failures_path=None, is_confirmed=None, on_progress=None, preflight=None):
+        self.submit = submit
+        self.preflight = preflight
+        self.batched = batched
+        self.chunk_size = chunk_size
+        self.window = window
+        self.checkpoint = checkpoint
+        self.failures_path = failures_path
+        self.is_confirmed = is_confirmed
+        self.on_progress = on_progress
+        self.stats = {'imported': 0, 'failed': 0, 'skipped': 0, 'transactions': 0, 'rejected': []}
+        self._confirmed = {}
+
+    def run(self, rows):
+        in_flight = deque()
+        with self._open_failures() as failures:
+            for chunk in chunked(rows, self.chunk_size):
+                in_flight.append(self._submit_chunk(chunk))
+                if len(in_flight) > self.window:
+                    self._settle(in_flight.popleft(), failures)
+            while in_flight:
+                self._settle(in_flight.popleft(), failures)
+        return self.stats
+
+    def _open_failures(self):
+        if self.failures_path is None:
+            return open(os.devnull, 'w')
+        return open(self.failures_path, 'a')
+
+    def _already_imported(self, number):
+        # A row submitted before a crash whose transaction made it on-chain must not be sent twice
+        if self.checkpoint is None or self.is_confirmed is None:
+            return False
+        tx_hash = self.checkpoint.submitted.get(number)
+        if tx_hash is None:
+            return False
+        # Batched rows share one transaction; ask the node about it once
+        if tx_hash not in self._confirmed:
+            self._confirmed[tx_hash] = self.is_confirmed(tx_hash)
+        return self._confirmed[tx_hash]
+
+    def _submit_chunk(self, chunk):
+        parts = []
+        pending = []
+        for number, values, error in chunk:
+            if error is not None:
+                parts.append(([(number, None)], None, error))
+            elif self._already_imported(number):
+                parts.append(([(number, values)], None, SKIPPED))
+            else:
+                pending.append((number, values))
+        if self.preflight is not None and pending:
+            pending = self._preflight(pending, parts)
+        groups = [pending] if self.batched and pending else [[row] for row in pending]
+        for group in groups:
+            try:
+                handle = self.submit([values for _, values in group])
+            except Exception as e:
+                parts.append((group, None, str(e)))
+                continue
+            self.stats['transactions'] += 1
+            parts.append((group, handle, None))
+            if self.checkpoint is not None:
+                self.checkpoint.submitted.update({number: _hex(handle.tx_hash) for number, _ in group})
+        if self.checkpoint is not None:
+            self.checkpoint.save()
+        return chunk[-1][0] + 1, parts
+
+    def _preflight(self, pending, parts):
+        # Rows that would revert become parts of their own; the rest are returned for sending
+        try:
+            reasons = self.preflight([values for _, values in pending])
+        except Exception as e:
+            parts.append((pending, None, str(e) or type(e).__name__))
+            return []
+        passed = []
+        for row, reason in zip(pending, reasons):
+            if reason is None:
+                passed.append(row)
+            else:
+                parts.append(([row], None, reason))
+                self.stats['rejected'].append({'row': row[0], 'error': reason})
+        return passed
+
+    def _settle(self, entry, failures):
+        next_row, parts = entry
+        settled = {'imported': 0, 'failed': 0, 'skipped': 0}
+        for group, handle, error in parts:
+            if error is SKIPPED:
+                settled['skipped'] += len(group)
+                continue
+            if handle is not None:
+                try:
+                    if handle.result()['status'] != 1:
+                        error = 'transaction reverted'
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+            if error is None:
+                settled['imported'] += len(group)
+                continue
+            settled['failed'] += len(group)
+            for number, values in group:
+                failures.write(json.dumps({'row': number, 'values': values, 'error': error}, default=str) + '\n')
+        failures.flush()
+        for key, count in settled.items():
+            self.stats[key] += count
+        if self.checkpoint is not None:
+            for group, _, _ in parts:
+                for number, _ in group:
+                    self.checkpoint.submitted.pop(number, None)
+            self.checkpoint.next_row = next_row
+            self.checkpoint.totals['imported'] += settled['imported'] + settled['skipped']
+            self.checkpoint.totals['failed'] += settled['failed']
+            self.checkpoint.save()
+        if self.on_progress is not None:
+            self.on_progress(next_row, self.stats)
+
+
+def _hex(tx_hash):
+    return tx_hash.hex() if hasattr(tx_hash, 'hex') else str(tx_hash)
+
+
+def make_submit(interaction, kind):
+    spec = IMPORTS[kind]
+    contract = interaction.contracts[spec['contract']]
+    if spec['batched']:
+        # Rows were already checked one by one by make_preflight
+        return lambda values: interaction.submit_transaction(
+            contract, spec['function'], *[list(column) for column in zip(*values)], preflight=False
+        )
+    return lambda values: interaction.submit_transaction(contract, spec['function'], *values[0])
+
+
+def make_preflight(interaction, kind):
+    # Per-row dry run for batched kinds; unbatched rows are checked as they are sent
+    spec = IMPORTS[kind]
+    if not spec['batched']:
+        return None
+    contract = interaction.contracts[spec['contract']]
+    return lambda values: interaction.preflight_rows(contract, spec['function'], values)
+
+
+def write_rows(rows, out, columns, fmt='csv'):
+    # Rows are written as they arrive, so memory stays bounded by one page
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            out.write(json.dumps(dict(zip(columns, row)), default=str) + '\n')
+            count += 1
+    return count
@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+
+from contract_registry import LRUCache
+
+_MISSING = object()
+
+
+class BlockCache:
+    """Read-through cache for view calls, keyed by (contract, function, args, block number).
+
+    The chain head is polled at most once per block_ttl seconds; when it moves the whole cache
+    is dropped, since every entry belongs to an older block. Cached calls are pinned to the
+    block they are keyed by, so a hit always returns what the node would have answered.
+    """
+
+    def __init__(self, w3, max_size=4096, block_ttl=1.0, clock=time.monotonic):
+        self.w3 = w3
+        self.block_ttl = block_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = LRUCache(max_size)
+        self._block = None
+        self._block_checked_at = None
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self._entries.max_size > 0
+
+    def current_block(self):
+        now = self._clock()
+        block = self._fresh_block(now)
+        if block is _MISSING:
+            block = self._set_block(self.w3.eth.block_number, now)
+        return block
+
+    def _fresh_block(self, now):
+        with self._lock:
+            if self._block_checked_at is not None and now - self._block_checked_at < self.block_ttl:
+                return self._block
+        return _MISSING
+
+    def _set_block(self, block, now):
+        with self._lock:
+            if block != self._block:
+                if self._block is not None:
+                    self._entries.clear()
+                    self.invalidations += 1
+                self._block = block
+            self._block_checked_at = now
+            return self._block
+
+    @staticmethod
+    def make_key(contract, function_name, args):
+        try:
+            encoded_args = json.dumps(args, sort_keys=True, default=repr)
+        except TypeError:
+            encoded_args = repr(args)
+        return (str(contract.address).lower(), function_name, encoded_args)
+
+    def _lookup(self, contract, function_name, args, block):
+        key = self.make_key(contract, function_name, args) + (block,)
+        with self._lock:
+            return key, self._entries.get(key, _MISSING)
+
+    def _store(self, key, block, value):
+        with self._lock:
+            # Skip the store if a newer block invalidated the cache while we were waiting
+            if block == self._block:
+                self._entries.put(key, value)
+
+    def call(self, contract, function_name, *args):
+        contract_function = getattr(contract.functions, function_name)(*args)
+        if not self.enabled:
+            return contract_function.call()
+
+        block = self.current_block()
+        key, value = self._lookup(contract, function_name, args, block)
+        if value is _MISSING:
+            value = contract_function.call(block_identifier=block)
+            self._store(key, block, value)
+        return value
+
+    def refresh(self):
+        # Force the next call to re-read the chain head, e.g. after our own write was mined
+        with self._lock:
+            self._block_checked_at = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._block = None
+            self._block_checked_at = None
+
+    def stats(self):
+        with self._lock:
+            stats = self._entries.stats()
+            stats.update({'block': self._block, 'invalidations': self.invalidations})
+            return stats
+
+
+class AsyncBlockCache(BlockCache):
+    """BlockCache for AsyncWeb3 contracts: the same entries and invalidation, with the RPC awaited."""
+
+    async def current_block(self):
+        now = self._clock()
+        block = self._fresh_block(now)
+        if block is _MISSING:
+            block = self._set_block(await self.w3.eth.block_number, now)
+        return block
+
+    async def call(self, contract, function_name, *args):
+        contract_function = getattr(contract.functions, function_name)(*args)
+        if not self.enabled:
+            return await contract_function.call()
+
+        block = await self.current_block()
+        key, value = self._lookup(contract, function_name, args, block)
+        if value is _MISSING:
+            value = await contract_function.call(block_identifier=block)
+            self._store(key, block, value)
+        return value
@@ -1,5 +1,7 @@
 import click
-from contract_interaction import get_contract_instance, call_contract_function, send_transaction
+
+# contract_interaction тянет за собой web3 (~2 с импорта), поэтому он импортируется внутри команд:
+# `--help` и разбор аргументов не платят за загрузку web3
 
 @click.group()
 def cli():
@@ -11,6 +13,7 @@ def cli():
 @click.argument('abi')
 def list_functions(contract_address, abi):
     """Перечислить все функции контракта."""
+    from contract_interaction import get_contract_instance
     contract = get_contract_instance(contract_address, abi)
     functions = contract.all_functions()
     for func in functions:
@@ -23,6 +26,7 @@ def list_functions(contract_address, abi):
 @click.argument('args', nargs=-1)
 def call(contract_address, abi, function_name, args):
     """Вызвать функцию контракта (только чтение)."""
+    from contract_interaction import get_contract_instance, call_contract_function
     contract = get_contract_instance(contract_address, abi)
     result = call_contract_function(contract, function_name, *args)
     click.echo(f"Результат: {result}")
@@ -34,13 +38,98 @@ def call(contract_address, abi, function_name, args):
 @click.argument('args', nargs=-1)
 def send(contract_address, abi, function_name, args):
     """Отправить транзакцию для изменения состояния контракта."""
+    from contract_interaction import get_contract_instance, send_transaction
     contract = get_contract_instance(contract_address, abi)
     txn_hash = send_transaction(contract, function_name, *args)
     click.echo(f"Транзакция отправлена с хэшем: {txn_hash}")
 
+IMPORT_TITLES = {'grades': 'оценки', 'attendance': 'посещаемость', 'schedules': 'расписание'}
+
+def make_import_command(kind):
+    # Все три команды импорта устроены одинаково и отличаются только видом записей
+    @click.command(f'import-{kind}', help=f"Импортировать {IMPORT_TITLES[kind]} из CSV/JSONL файла.")
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default=None,
+                  help='Формат файла (по умолчанию по расширению).')
+    @click.option('--chunk-size', default=100, show_default=True, help='Записей в одной пачке.')
+    @click.option('--window', default=4, show_default=True, help='Сколько пачек одновременно в сети.')
+    @click.option('--restart', is_flag=True, help='Игнорировать сохранённый прогресс и начать сначала.')
+    def import_command(path, fmt, chunk_size, window, restart):
+        from bulk_io import IMPORTS, BulkImporter, Checkpoint, make_preflight, make_submit, read_rows
+        from contract_interaction import ContractInteraction
+
+        spec = IMPORTS[kind]
+        checkpoint = Checkpoint(f'{path}.progress.json')
+        if restart:
+            checkpoint.reset()
+        elif checkpoint.next_row:
+            click.echo(f"Продолжение с записи {checkpoint.next_row}", err=True)
+
+        # Один экземпляр web3 и контрактов на весь файл
+        interaction = ContractInteraction()
+
+        def is_confirmed(tx_hash):
+            try:
+                return interaction.w3.eth.get_transaction_receipt(tx_hash)['status'] == 1
+            except Exception:
+                return False
+
+        def on_progress(next_row, stats):
+            click.echo(
+                f"\rОбработано {next_row}: импортировано {stats['imported']}, ошибок {stats['failed']}",
+                err=True, nl=False
+            )
+
+        importer = BulkImporter(
+            make_submit(interaction, kind),
+            batched=spec['batched'],
+            chunk_size=chunk_size,
+            window=window,
+            checkpoint=checkpoint,
+            failures_path=f'{path}.failed.jsonl',
+            is_confirmed=is_confirmed,
+            on_progress=on_progress,
+            preflight=make_preflight(interaction, kind)
+        )
+        try:
+            stats = importer.run(read_rows(path, spec['fields'], fmt, start=checkpoint.next_row))
+        finally:
+            interaction.receipts.shutdown()
+        click.echo('', err=True)
+        click.echo(
+            f"Импортировано: {stats['imported']}, пропущено: {stats['skipped']}, "
+            f"ошибок: {stats['failed']}, транзакций: {stats['transactions']}"
+        )
+        for rejected in stats['rejected']:
+            click.echo(f"Запись {rejected['row']} отклонена при проверке: {rejected['error']}", err=True)
+        if stats['failed']:
+            click.echo(f"Ошибочные записи сохранены в {path}.failed.jsonl")
+
+    return import_command
+
+@click.command()
+@click.argument('kind', type=click.Choice(['grades', 'attendance', 'schedules']))
+@click.argument('course_id', type=int)
+@click.option('--output', '-o', type=click.File('w'), default='-', help='Файл для записи (по умолчанию stdout).')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default='csv', show_default=True)
+@click.option('--page-size', default=100, show_default=True, help='Записей на одну страницу чтения.')
+def export(kind, course_id, output, fmt, page_size):
+    """Выгрузить оценки, посещаемость или расписание курса."""
+    from bulk_io import EXPORTS, write_rows
+    from contract_interaction import ContractInteraction
+
+    method, columns = EXPORTS[kind]
+    interaction = ContractInteraction()
+    # Данные читаются постранично и сразу пишутся, весь курс в памяти не держится
+    count = write_rows(getattr(interaction, method)(course_id, page_size=page_size), output, columns, fmt)
+    click.echo(f"Выгружено записей: {count}", err=True)
+
 cli.add_command(list_functions)
 cli.add_command(call)
 cli.add_command(send)
+for kind in IMPORT_TITLES:
+    cli.add_command(make_import_command(kind))
+cli.add_command(export)
 
 if __name__ == '__main__':
     cli()
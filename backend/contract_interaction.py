@@ -1,103 +1,689 @@
+import calendar
+import datetime
+import itertools
 import json
+from collections.abc import Mapping
+from hexbytes import HexBytes
 from web3 import Web3
+from web3.exceptions import TransactionNotFound
 import os
 from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
+import analytics
+from abi_bundle import load_abis
+from call_cache import BlockCache
+from contract_registry import ContractRegistry
+from fee_oracle import FeeOracle
+from metrics import REGISTRY as metrics, rpc_metrics_middleware
+from event_indexer import EventIndexer
+from multicall import Multicall
+from outbox import Outbox
+from provider_pool import ProviderPool
+from receipt_tracker import ReceiptTracker
+from role_cache import RoleCache, required_role
+from signer_pool import NonceLockService, SignerPool
+from simulation import Simulator
+from transaction_pipeline import is_nonce_error
 
-class ContractInteraction:
-    def __init__(self):
-        # Connect to Ethereum node
-        self.w3 = Web3(Web3.HTTPProvider(os.getenv('INFURA_URL')))
-        
-        # Load private key from environment variable
-        self.private_key = os.getenv('PRIVATE_KEY')
-        self.account = self.w3.eth.account.from_key(self.private_key)
-        self.w3.eth.default_account = self.account.address
 
-        # Load contract addresses
-        self.addresses = self._load_contract_addresses()
-        
-        # Load contract ABIs
-        self.abis = self._load_contract_abis()
-        
-        # Initialize contract instances
+def make_http_session(pool_size=None):
+    # Keep-alive session whose connection pool is sized for the number of worker threads
+    pool_size = pool_size or int(os.getenv('WEB3_HTTP_POOL_SIZE', '32'))
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def make_provider(session):
+    # RPC_URLS (comma-separated) enables the failover/hedging pool; otherwise a single INFURA_URL
+    urls = [url.strip() for url in os.getenv('RPC_URLS', '').split(',') if url.strip()]
+    if urls:
+        return ProviderPool(
+            urls,
+            session=session,
+            hedge_after=float(os.getenv('RPC_HEDGE_AFTER', '0.25')),
+            max_lag=int(os.getenv('RPC_MAX_LAG', '3'))
+        )
+    return Web3.HTTPProvider(os.getenv('INFURA_URL'), session=session)
+
+
+def make_web3(session):
+    connection = Web3(make_provider(session))
+    # Counts and times every JSON-RPC call for /metrics
+    connection.middleware_onion.add(rpc_metrics_middleware, 'metrics')
+    return connection
+
+
+# Shared connection and contract cache for api.py, app.py, cli.py and telegram_bot.py
+w3 = make_web3(make_http_session())
+_registry = ContractRegistry(w3, max_contracts=int(os.getenv('CONTRACT_CACHE_SIZE', '256')))
+_call_cache = None
+_signer_pool = None
+_receipt_tracker = None
+_fee_oracle = None
+_simulator = None
+_role_cache = None
+_outbox = None
+
+
+def get_registry():
+    global _registry
+    # Tests and callers may swap the module-level connection
+    if _registry.w3 is not w3:
+        _registry = ContractRegistry(w3, max_contracts=_registry._contracts.max_size)
+    return _registry
+
+
+def make_call_cache(connection, cache_class=BlockCache):
+    # CALL_CACHE_SIZE=0 turns caching off
+    return cache_class(
+        connection,
+        max_size=int(os.getenv('CALL_CACHE_SIZE', '4096')),
+        block_ttl=float(os.getenv('CALL_CACHE_BLOCK_TTL', '1.0'))
+    )
+
+
+def get_call_cache():
+    global _call_cache
+    if _call_cache is None or _call_cache.w3 is not w3:
+        _call_cache = make_call_cache(w3)
+    return _call_cache
+
+
+def make_receipt_tracker(connection, nonce_manager=None, on_stuck=None):
+    return ReceiptTracker(
+        connection,
+        nonce_manager,
+        confirmations=int(os.getenv('TX_CONFIRMATIONS', '1')),
+        timeout=float(os.getenv('TX_RECEIPT_TIMEOUT', '120')),
+        poll_interval=float(os.getenv('TX_POLL_INTERVAL', '1.0')),
+        on_stuck=on_stuck
+    )
+
+
+def make_fee_oracle(connection, oracle_class=FeeOracle):
+    return oracle_class(
+        connection,
+        gas_margin=float(os.getenv('GAS_MARGIN', '1.2')),
+        estimate_ttl=float(os.getenv('GAS_ESTIMATE_TTL', '60'))
+    )
+
+
+def resend_with_higher_fees(connection, fee_oracle, private_key, pending):
+    # Same nonce, bumped fees: the node swaps the stuck transaction for this one
+    if pending.transaction is None:
+        return None
+    transaction = fee_oracle.bump(pending.transaction)
+    signed_txn = connection.eth.account.sign_transaction(transaction, private_key)
+    try:
+        tx_hash = connection.eth.send_raw_transaction(signed_txn.rawTransaction)
+    except ValueError:
+        # Underpriced or already mined; let the tracker settle it
+        return None
+    return tx_hash, signed_txn.rawTransaction, transaction
+
+
+def get_fee_oracle():
+    global _fee_oracle
+    if _fee_oracle is None or _fee_oracle.w3 is not w3:
+        _fee_oracle = make_fee_oracle(w3)
+    return _fee_oracle
+
+
+def make_signer_pool(connection, pool_class=SignerPool):
+    # SIGNER_PRIVATE_KEYS: comma-separated TEACHER_ROLE keys, PRIVATE_KEY when unset.
+    # NONCE_LOCK_DB: SQLite file on a volume shared by all replicas so they never reuse a nonce.
+    private_keys = [key.strip() for key in os.getenv('SIGNER_PRIVATE_KEYS', '').split(',') if key.strip()]
+    lock_db = os.getenv('NONCE_LOCK_DB')
+    return pool_class(
+        connection,
+        private_keys or [os.getenv('PRIVATE_KEY')],
+        NonceLockService(lock_db) if lock_db else None
+    )
+
+
+def get_signer_pool():
+    global _signer_pool
+    if _signer_pool is None or _signer_pool.w3 is not w3:
+        _signer_pool = make_signer_pool(w3)
+    return _signer_pool
+
+
+def preflight_enabled():
+    # TX_PREFLIGHT=0 skips the eth_call dry run before signing
+    return os.getenv('TX_PREFLIGHT', '1').lower() not in ('0', 'false', 'no')
+
+
+def get_simulator():
+    global _simulator
+    if _simulator is None or _simulator.w3 is not w3:
+        _simulator = Simulator(w3)
+    return _simulator
+
+
+def load_deployed_addresses():
+    deployment_file = Path(__file__).parent.parent / '.deployed' / 'addresses.json'
+    with open(deployment_file) as f:
+        return json.load(f)
+
+
+def role_cache_enabled():
+    return os.getenv('ROLE_CACHE', '').lower() in ('1', 'true', 'yes')
+
+
+def make_role_cache(connection, addresses):
+    # Follows role events of every deployed proxy in a background thread
+    cache = RoleCache(
+        connection,
+        [address for name, address in addresses.items() if name.endswith('Proxy')],
+        start_block=int(os.getenv('ROLE_CACHE_START_BLOCK', '0')),
+        confirmations=int(os.getenv('ROLE_CACHE_CONFIRMATIONS', '0'))
+    )
+    cache.start(poll_interval=float(os.getenv('ROLE_CACHE_POLL_INTERVAL', '2.0')))
+    return cache
+
+
+def get_role_cache():
+    # None unless ROLE_CACHE is set; permission checks then fall through to the chain
+    global _role_cache
+    if not role_cache_enabled():
+        return None
+    if _role_cache is None or _role_cache.w3 is not w3:
+        if _role_cache is not None:
+            _role_cache.stop()
+        _role_cache = make_role_cache(w3, load_deployed_addresses())
+    return _role_cache
+
+
+def missing_role(contract, function_name):
+    # Role a write needs that no configured signer holds, judged from the local role cache only
+    cache = get_role_cache()
+    if cache is None:
+        return None
+    function_name = get_registry().resolve_function_name(contract, function_name)
+    verdicts = [cache.allows(contract.address, function_name, signer.address) for signer in get_signer_pool().signers]
+    if any(verdict is None or verdict for verdict in verdicts):
+        return None
+    return required_role(function_name)
+
+
+def simulate_transaction(contract, function_name, *args):
+    # Dry run from the default signer; returns {'ok': ..., 'result' | 'reason': ...}
+    function_name = get_registry().resolve_function_name(contract, function_name)
+    return get_simulator().simulate(getattr(contract.functions, function_name)(*args), get_signer_pool().primary.address)
+
+
+def sign_and_send(connection, fee_oracle, signer, contract_function, params=None, on_signed=None):
+    # on_signed(tx_hash, raw_transaction, nonce) runs before the broadcast, e.g. to persist the
+    # transaction. From then on the nonce stays reserved: the stored transaction may already have
+    # reached the node and is resent rather than replaced.
+    nonce = signer.nonce_manager.next_nonce()
+    persisted = False
+    try:
+        transaction = fee_oracle.build_transaction(contract_function, dict(params or {}, **{
+            'from': signer.address,
+            'nonce': nonce,
+        }))
+        with metrics.timer('sign_seconds', 'Transaction signing time'):
+            signed_txn = connection.eth.account.sign_transaction(transaction, signer.key)
+        if on_signed is not None:
+            on_signed(signed_txn.hash, signed_txn.rawTransaction, nonce)
+            persisted = True
+        tx_hash = connection.eth.send_raw_transaction(signed_txn.rawTransaction)
+    except ValueError as e:
+        if persisted:
+            raise
+        if is_nonce_error(e):
+            signer.nonce_manager.resync()
+        else:
+            signer.nonce_manager.release(nonce)
+        raise
+    except Exception:
+        if not persisted:
+            signer.nonce_manager.release(nonce)
+        raise
+    return tx_hash, nonce, signed_txn.rawTransaction, transaction
+
+
+def track_signed(tracker, signer_pool, signer, tx_hash, nonce, raw_transaction, transaction, fee_oracle=None):
+    pending = tracker.track(
+        tx_hash, nonce, raw_transaction,
+        sender=signer.address, transaction=transaction, nonce_manager=signer.nonce_manager
+    )
+    # The signer counts as loaded until its transaction settles
+    pending.add_done_callback(lambda _: signer_pool.done(signer))
+    if fee_oracle is not None:
+        pending.add_done_callback(lambda settled: observe_receipt(fee_oracle, settled))
+    return pending
+
+
+def observe_receipt(fee_oracle, pending):
+    # An out-of-gas receipt invalidates the gas estimate the transaction was built with
+    if pending.future.exception() is None:
+        fee_oracle.observe_receipt(pending.transaction, pending.result())
+
+
+def get_receipt_tracker():
+    global _receipt_tracker
+    if _receipt_tracker is None or _receipt_tracker.w3 is not w3:
+        _receipt_tracker = make_receipt_tracker(
+            w3,
+            on_stuck=lambda pending: resend_with_higher_fees(
+                w3, get_fee_oracle(), get_signer_pool().get(pending.sender).key, pending
+            )
+        )
+    return _receipt_tracker
+
+
+def get_contract_instance(contract_address, abi):
+    return get_registry().get_contract(contract_address, abi)
+
+
+def function_label(contract, function_name):
+    # Metric label for a call: only functions in the contract's ABI get a series of their own,
+    # so names taken from request bodies cannot grow /metrics without bound
+    return function_name if function_name in set(contract.functions) else 'unknown'
+
+
+def call_contract_function(contract, function_name, *args):
+    function_name = get_registry().resolve_function_name(contract, function_name)
+    with metrics.timer('contract_call_seconds', 'View call time including cache lookups',
+                       function=function_label(contract, function_name)):
+        return get_call_cache().call(contract, function_name, *args)
+
+
+def send_transaction(contract, function_name, *args, preflight=None, sender=None, on_signed=None):
+    function_name = get_registry().resolve_function_name(contract, function_name)
+    signer_pool = get_signer_pool()
+    signer = signer_pool.acquire(sender)
+    with metrics.timer('contract_send_seconds', 'Time to build, sign and broadcast a transaction',
+                       function=function_label(contract, function_name)):
+        try:
+            contract_function = getattr(contract.functions, function_name)(*args)
+            if preflight_enabled() if preflight is None else preflight:
+                # A revert is reported here in one eth_call instead of after a full send and receipt
+                get_simulator().check(contract_function, signer.address)
+            tx_hash, nonce, raw_transaction, transaction = sign_and_send(
+                w3, get_fee_oracle(), signer, contract_function, on_signed=on_signed
+            )
+        except Exception:
+            signer_pool.done(signer)
+            raise
+    # Returns straight away; get_receipt_tracker().status(tx_hash) reports the outcome
+    track_signed(get_receipt_tracker(), signer_pool, signer, tx_hash, nonce, raw_transaction, transaction, get_fee_oracle())
+    return tx_hash.hex()
+
+
+def transaction_mined(connection, tx_hash):
+    try:
+        return connection.eth.get_transaction_receipt(tx_hash) is not None
+    except TransactionNotFound:
+        return False
+
+
+def rebroadcast_transaction(sender, raw_transaction, tx_hash, nonce):
+    # Resends a stored signed transaction and tracks its receipt. Returns None when its nonce was
+    # taken by another transaction, so it can never be mined and the job has to be signed again.
+    signer_pool = get_signer_pool()
+    signer = signer_pool.acquire(sender)
+    try:
+        w3.eth.send_raw_transaction(HexBytes(raw_transaction))
+    except ValueError as e:
+        if is_nonce_error(e) and not transaction_mined(w3, tx_hash):
+            signer_pool.done(signer)
+            signer.nonce_manager.resync()
+            return None
+        if not is_nonce_error(e) and 'already known' not in str(e).lower():
+            signer_pool.done(signer)
+            raise
+    except Exception:
+        signer_pool.done(signer)
+        raise
+    track_signed(get_receipt_tracker(), signer_pool, signer, HexBytes(tx_hash), nonce, HexBytes(raw_transaction), None)
+    return tx_hash
+
+
+def outbox_enabled():
+    return bool(os.getenv('OUTBOX_DB'))
+
+
+def make_outbox(db_path, lanes):
+    # OUTBOX_MAX_PENDING caps queued + running jobs; beyond it enqueue raises OutboxFull
+    return Outbox(
+        db_path,
+        lanes,
+        max_pending=int(os.getenv('OUTBOX_MAX_PENDING', '10000')),
+        max_attempts=int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5')),
+        retry_delay=float(os.getenv('OUTBOX_RETRY_DELAY', '2.0'))
+    )
+
+
+def submit_job(job):
+    # Runs on an outbox worker with the job's signer; the signed transaction is stored before broadcast
+    # and every later attempt resends it
+    if job.raw_transaction is not None:
+        tx_hash = rebroadcast_transaction(job.lane, job.raw_transaction, job.tx_hash, job.nonce)
+        if tx_hash is not None:
+            return tx_hash
+        _outbox.clear_signed(job.id)
+    contract = get_contract_instance(job.contract_address, job.abi)
+    return send_transaction(
+        contract, job.function_name, *job.args,
+        preflight=job.meta.get('preflight'),
+        sender=job.lane,
+        on_signed=lambda tx_hash, raw_transaction, nonce: _outbox.record_signed(job.id, tx_hash, raw_transaction, nonce)
+    )
+
+
+def get_outbox(on_finished=None):
+    # None unless OUTBOX_DB is set; the first call starts OUTBOX_WORKERS workers with on_finished(job)
+    global _outbox
+    if not outbox_enabled():
+        return None
+    if _outbox is None:
+        _outbox = make_outbox(os.getenv('OUTBOX_DB'), [signer.address for signer in get_signer_pool().signers])
+        _outbox.start(submit_job, workers=int(os.getenv('OUTBOX_WORKERS', '4')), on_finished=on_finished)
+    return _outbox
+
+
+def hit_ratio(stats):
+    lookups = stats['hits'] + stats['misses']
+    return stats['hits'] / lookups if lookups else None
+
+
+def cache_hit_ratios():
+    # Only caches that already exist are reported; a scrape must not create them
+    caches = {'contracts': _registry.stats()['contracts'], 'abis': _registry.stats()['abis']}
+    if _call_cache is not None:
+        caches['calls'] = _call_cache.stats()
+    if _fee_oracle is not None:
+        caches['gas_estimates'] = _fee_oracle.stats()['estimates']
+    return {(('cache', name),): hit_ratio(stats) for name, stats in caches.items()}
+
+
+def pending_transactions():
+    return _receipt_tracker.pending_count() if _receipt_tracker is not None else 0
+
+
+def signers_in_flight():
+    if _signer_pool is None:
+        return None
+    return {(('signer', address),): count for address, count in _signer_pool.stats().items()}
+
+
+def outbox_jobs():
+    if _outbox is None:
+        return None
+    return {(('state', state),): count for state, count in _outbox.stats().items()}
+
+
+def schedule_date(value):
+    # date, "YYYY-MM-DD" or YYYYMMDD -> the packed uint32 YYYYMMDD used by ScheduleManagementV2
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.date.fromisoformat(value)
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+metrics.gauge('cache_hit_ratio', cache_hit_ratios, 'Share of lookups answered from cache')
+metrics.gauge('pending_transactions', pending_transactions, 'Transactions broadcast but not yet settled')
+metrics.gauge('signer_in_flight_transactions', signers_in_flight, 'Unsettled transactions per signer')
+metrics.gauge('outbox_jobs', outbox_jobs, 'Outbox jobs by state')
+
+
+class LazyContracts(Mapping):
+    """Contract objects built on first access instead of at startup."""
+
+    def __init__(self, factories):
+        self._factories = factories
+        self._contracts = {}
+
+    def __getitem__(self, key):
+        if key not in self._contracts:
+            self._contracts[key] = self._factories[key]()
+        return self._contracts[key]
+
+    def __iter__(self):
+        return iter(self._factories)
+
+    def __len__(self):
+        return len(self._factories)
+
+
+class DeployedContracts:
+    """Addresses, ABIs and contract objects of the deployed proxies, plus the optional event index.
+
+    Shared by ContractInteraction and AsyncContractInteraction; subclasses set self.w3 and call
+    _init_contracts(). Everything is loaded on first use.
+    """
+
+    def _init_contracts(self):
+        self._addresses = None
+        self._abis = None
         self.contracts = self._initialize_contracts()
 
+    @property
+    def addresses(self):
+        if self._addresses is None:
+            self._addresses = self._load_contract_addresses()
+        return self._addresses
+
+    @property
+    def abis(self):
+        if self._abis is None:
+            self._abis = self._load_contract_abis()
+        return self._abis
+
     def _load_contract_addresses(self):
-        deployment_file = Path(__file__).parent.parent / '.deployed' / 'addresses.json'
-        with open(deployment_file) as f:
-            return json.load(f)
+        return load_deployed_addresses()
 
     def _load_contract_abis(self):
-        artifacts_dir = Path(__file__).parent.parent / 'artifacts' / 'contracts'
-        abis = {}
-        
-        contract_files = {
-            'UniversityAccessControl': 'upgradeable/UniversityAccessControlUpgradeable.sol/UniversityAccessControlUpgradeable.json',
-            'CourseManagement': 'upgradeable/CourseManagementUpgradeable.sol/CourseManagementUpgradeable.json',
-            'GradeManagement': 'upgradeable/GradeManagementUpgradeable.sol/GradeManagementUpgradeable.json',
-            'ScheduleManagement': 'upgradeable/ScheduleManagementUpgradeable.sol/ScheduleManagementUpgradeable.json',
-            'StatisticsTracker': 'upgradeable/StatisticsTrackerUpgradeable.sol/StatisticsTrackerUpgradeable.json'
-        }
-
-        for contract_name, file_path in contract_files.items():
-            with open(artifacts_dir / file_path) as f:
-                contract_json = json.load(f)
-                abis[contract_name] = contract_json['abi']
-        
-        return abis
+        # Served from the precompiled ABI bundle, rebuilt from artifacts/contracts when stale
+        return load_abis()
 
     def _initialize_contracts(self):
-        return {
-            'access_control': self.w3.eth.contract(
-                address=self.addresses['UniversityAccessControlProxy'],
-                abi=self.abis['UniversityAccessControl']
-            ),
-            'course_management': self.w3.eth.contract(
-                address=self.addresses['CourseManagementProxy'],
-                abi=self.abis['CourseManagement']
-            ),
-            'grade_management': self.w3.eth.contract(
-                address=self.addresses['GradeManagementProxy'],
-                abi=self.abis['GradeManagement']
-            ),
-            'schedule_management': self.w3.eth.contract(
-                address=self.addresses['ScheduleManagementProxy'],
-                abi=self.abis['ScheduleManagement']
-            ),
-            'statistics_tracker': self.w3.eth.contract(
-                address=self.addresses['StatisticsTrackerProxy'],
-                abi=self.abis['StatisticsTracker']
+        return LazyContracts({
+            'access_control': lambda: self._build_contract('UniversityAccessControlProxy', 'UniversityAccessControl'),
+            'course_management': lambda: self._build_contract('CourseManagementProxy', 'CourseManagement'),
+            'grade_management': lambda: self._build_contract('GradeManagementProxy', 'GradeManagement'),
+            'schedule_management': lambda: self._build_contract('ScheduleManagementProxy', 'ScheduleManagement'),
+            'statistics_tracker': lambda: self._build_contract('StatisticsTrackerProxy', 'StatisticsTracker')
+        })
+
+    def _build_contract(self, address_key, abi_key, connection=None):
+        return (connection or self.w3).eth.contract(address=self.addresses[address_key], abi=self.abis[abi_key])
+
+    def _init_event_index(self, connection):
+        # Statistics are answered from the local event index when EVENT_INDEX_DB is set. A background
+        # thread keeps it synced over the (sync) connection; until it has caught up, or when it falls
+        # behind, reads go on chain
+        self.event_index = None
+        self.event_index_max_age = float(os.getenv('EVENT_INDEX_MAX_AGE', '30'))
+        if os.getenv('EVENT_INDEX_DB'):
+            self.event_index = EventIndexer(
+                connection,
+                self._build_contract('GradeManagementProxy', 'GradeManagement', connection),
+                os.getenv('EVENT_INDEX_DB'),
+                start_block=int(os.getenv('EVENT_INDEX_START_BLOCK', '0')),
+                confirmations=int(os.getenv('EVENT_INDEX_CONFIRMATIONS', '0'))
             )
-        }
+            self.event_index.start(poll_interval=float(os.getenv('EVENT_INDEX_POLL_INTERVAL', '2.0')))
 
-    def _send_transaction(self, contract, function_name, *args):
-        nonce = self.w3.eth.get_transaction_count(self.account.address)
-        
-        # Get the contract function
-        contract_function = getattr(contract.functions, function_name)
-        
-        # Build the transaction
-        transaction = contract_function(*args).build_transaction({
-            'chainId': self.w3.eth.chain_id,
-            'gas': 2000000,
-            'gasPrice': self.w3.eth.gas_price,
-            'nonce': nonce,
-        })
-        
-        # Sign and send the transaction
-        signed_txn = self.w3.eth.account.sign_transaction(transaction, self.private_key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+    def _index_is_current(self):
+        return self.event_index is not None and self.event_index.is_current(self.event_index_max_age)
+
+
+class ContractInteraction(DeployedContracts):
+    def __init__(self, http_session=None):
+        # Connect to Ethereum node; pass a shared session to reuse pooled keep-alive connections
+        self.http_session = http_session or make_http_session()
+        self.w3 = make_web3(self.http_session)
         
-        # Wait for transaction receipt
-        tx_receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        # Writes are spread over the signer pool, each key with its own nonce sequence;
+        # the first key (PRIVATE_KEY unless SIGNER_PRIVATE_KEYS is set) is the default account
+        self.signers = make_signer_pool(self.w3)
+        self.account = self.signers.primary.account
+        self.private_key = self.account.key
+        self.nonce_manager = self.signers.primary.nonce_manager
+        self.w3.eth.default_account = self.account.address
+        self._chain_id = None
+
+        # Gas limits and EIP-1559 fees come from the oracle; stuck transactions are resent with higher fees
+        self.fee_oracle = make_fee_oracle(self.w3)
+        self.receipts = make_receipt_tracker(
+            self.w3,
+            on_stuck=lambda pending: resend_with_higher_fees(
+                self.w3, self.fee_oracle, self.signers.get(pending.sender).key, pending
+            )
+        )
+
+        # Addresses, ABIs and contract objects are loaded on first use
+        self._multicall = None
+        self._init_contracts()
+
+        # View calls are cached per block
+        self.call_cache = make_call_cache(self.w3)
+
+        # Writes are dry-run at the pending block first so reverts surface before signing
+        self.preflight = preflight_enabled()
+        self.simulator = Simulator(self.w3, session=self.http_session)
+
+        self._init_event_index(self.w3)
+
+        # Role checks are answered locally once the role cache has replayed the role events
+        self.role_cache = make_role_cache(self.w3, self.addresses) if role_cache_enabled() else None
+
+    @property
+    def multicall(self):
+        # Batched view calls; Multicall3 address can be overridden in addresses.json
+        if self._multicall is None:
+            self._multicall = Multicall(self.w3, self.addresses.get('Multicall3'), session=self.http_session)
+        return self._multicall
+
+    @property
+    def chain_id(self):
+        if self._chain_id is None:
+            self._chain_id = self.w3.eth.chain_id
+        return self._chain_id
+
+    def _sign_and_send(self, contract, function_name, *args, preflight=None):
+        signer = self.signers.acquire()
+        try:
+            contract_function = getattr(contract.functions, function_name)(*args)
+            if self.preflight if preflight is None else preflight:
+                self.simulator.check(contract_function, signer.address)
+            tx_hash, nonce, raw_transaction, transaction = sign_and_send(
+                self.w3, self.fee_oracle, signer, contract_function, {'chainId': self.chain_id}
+            )
+        except Exception:
+            self.signers.done(signer)
+            raise
+        return signer, tx_hash, nonce, raw_transaction, transaction
+
+    def _send_transaction(self, contract, function_name, *args):
+        # Wait for the receipt via the shared tracker instead of polling for it here
+        with metrics.timer('transaction_seconds', 'Time from building a transaction to its receipt',
+                           function=function_label(contract, function_name)):
+            tx_receipt = self.submit_transaction(contract, function_name, *args).result()
+        self.call_cache.refresh()
         return tx_receipt
 
+    def submit_transaction(self, contract, function_name, *args, preflight=None):
+        # Broadcast without blocking; the returned handle resolves to the receipt
+        signer, *signed = self._sign_and_send(contract, function_name, *args, preflight=preflight)
+        return track_signed(self.receipts, self.signers, signer, *signed, fee_oracle=self.fee_oracle)
+
+    def simulate(self, contract, function_name, *args):
+        contract_function = getattr(contract.functions, function_name)(*args)
+        return self.simulator.simulate(contract_function, self.account.address)
+
+    def submit_transactions(self, contract, function_name, args_list):
+        return [self.submit_transaction(contract, function_name, *args) for args in args_list]
+
+    def preflight_rows(self, contract, function_name, items):
+        # Revert reason per row of a batch function (None for rows that pass), each row dry-run on
+        # its own as a one-element batch. All signers hold the same roles, so the default account
+        # stands in for whichever sends.
+        items = list(items)
+        if not self.preflight or not items:
+            return [None] * len(items)
+        outcomes = self.simulator.simulate_many(
+            [(contract, function_name, [[value] for value in item]) for item in items], self.account.address
+        )
+        return [None if outcome['ok'] else outcome['reason'] for outcome in outcomes]
+
+    def _submit_in_chunks(self, contract, function_name, items, chunk_size):
+        # Each chunk becomes one batch call with column arrays; all chunks are in flight together.
+        # Rows failing the pre-flight are reported on their own and left out of the batches.
+        items = list(items)
+        results = [None] * len(items)
+        sendable = []
+        for index, reason in enumerate(self.preflight_rows(contract, function_name, items)):
+            if reason is None:
+                sendable.append(index)
+            else:
+                results[index] = {'item': items[index], 'status': 0, 'transactionHash': None, 'error': reason}
+
+        submitted = []
+        for start in range(0, len(sendable), chunk_size):
+            chunk = sendable[start:start + chunk_size]
+            columns = [list(column) for column in zip(*(items[index] for index in chunk))]
+            try:
+                handle = self.submit_transaction(contract, function_name, *columns, preflight=False)
+                submitted.append((chunk, handle, None))
+            except Exception as e:
+                submitted.append((chunk, None, e))
+
+        for chunk, handle, error in submitted:
+            status, tx_hash = 0, None
+            if handle is not None:
+                tx_hash = handle.tx_hash
+                try:
+                    receipt = handle.result()
+                    status = receipt['status']
+                except Exception as e:
+                    error = e
+            for index in chunk:
+                results[index] = {
+                    'item': items[index],
+                    'status': status,
+                    'transactionHash': tx_hash,
+                    'error': str(error) if error else None
+                }
+        return results
+
+    def _call(self, contract_key, function_name, *args):
+        contract = self.contracts[contract_key]
+        with metrics.timer('contract_call_seconds', 'View call time including cache lookups',
+                           function=function_label(contract, function_name)):
+            return self.call_cache.call(contract, function_name, *args)
+
+    def verify_signers(self):
+        # Signer addresses lacking TEACHER_ROLE and ADMIN_ROLE; writes routed to them would revert
+        access_control = self.contracts['access_control']
+        roles = [access_control.functions.TEACHER_ROLE().call(), access_control.functions.ADMIN_ROLE().call()]
+        return self.signers.unauthorized(access_control, roles)
+
+    def batch_call(self, calls, block_identifier='latest', allow_failure=False):
+        # calls: list of (contract or contract key, function_name, args), answered in one round trip
+        resolved = [
+            (self.contracts[contract] if isinstance(contract, str) else contract, function_name, args)
+            for contract, function_name, args in calls
+        ]
+        return self.multicall.call(resolved, block_identifier=block_identifier, allow_failure=allow_failure)
+
     # Access Control Functions
     def assign_role(self, address, role):
         return self._send_transaction(self.contracts['access_control'], 'assignRole', address, role)
 
     def has_role(self, role_hash, address):
-        return self.contracts['access_control'].functions.hasRole(role_hash, address).call()
+        if self.role_cache is not None and self.role_cache.synced:
+            return self.role_cache.has_role(self.addresses['UniversityAccessControlProxy'], role_hash, address)
+        return self._call('access_control', 'hasRole', role_hash, address)
 
     # Course Management Functions
     def create_course(self, name, description, capacity):
@@ -117,7 +703,7 @@ class ContractInteraction:
         )
 
     def get_course_details(self, course_id):
-        return self.contracts['course_management'].functions.getCourseDetails(course_id).call()
+        return self._call('course_management', 'getCourseDetails', course_id)
 
     # Grade Management Functions
     def record_grade(self, course_id, student, grade):
@@ -129,8 +715,71 @@ class ContractInteraction:
             grade
         )
 
+    def record_grades(self, records, chunk_size=100):
+        # records: iterable of (course_id, student, grade)
+        return self._submit_in_chunks(self.contracts['grade_management'], 'recordGrades', records, chunk_size)
+
+    def mark_attendance(self, course_id, student, attended):
+        return self._send_transaction(
+            self.contracts['grade_management'],
+            'markAttendance',
+            course_id,
+            student,
+            attended
+        )
+
+    def mark_attendance_bulk(self, records, chunk_size=100):
+        # records: iterable of (course_id, student, attended)
+        return self._submit_in_chunks(self.contracts['grade_management'], 'markAttendanceBatch', records, chunk_size)
+
     def get_grades(self, course_id):
-        return self.contracts['grade_management'].functions.getGrades(course_id).call()
+        return self._call('grade_management', 'getGrades', course_id)
+
+    def get_attendance(self, course_id):
+        return self._call('grade_management', 'getAttendance', course_id)
+
+    def _iter_pages(self, get_page, page_size):
+        # All pages are read at the same block so appends during iteration don't shift offsets
+        block = self.w3.eth.block_number
+        offset = 0
+        while True:
+            page = get_page(offset, page_size).call(block_identifier=block)
+            yield from page
+            if len(page) < page_size:
+                return
+            offset += page_size
+
+    def _iter_student_pages(self, get_count, get_page, page_size):
+        block = self.w3.eth.block_number
+        total = get_count().call(block_identifier=block)
+        offset = 0
+        while offset < total:
+            records, offset = get_page(offset, page_size).call(block_identifier=block)
+            yield from records
+
+    def iter_grades(self, course_id, page_size=100):
+        functions = self.contracts['grade_management'].functions
+        return self._iter_pages(lambda offset, limit: functions.getGradesPage(course_id, offset, limit), page_size)
+
+    def iter_attendance(self, course_id, page_size=100):
+        functions = self.contracts['grade_management'].functions
+        return self._iter_pages(lambda offset, limit: functions.getAttendancePage(course_id, offset, limit), page_size)
+
+    def iter_student_grades(self, course_id, student, page_size=100):
+        functions = self.contracts['grade_management'].functions
+        return self._iter_student_pages(
+            lambda: functions.getGradeCount(course_id),
+            lambda offset, limit: functions.getGradesByStudent(course_id, student, offset, limit),
+            page_size
+        )
+
+    def iter_student_attendance(self, course_id, student, page_size=100):
+        functions = self.contracts['grade_management'].functions
+        return self._iter_student_pages(
+            lambda: functions.getAttendanceCount(course_id),
+            lambda offset, limit: functions.getAttendanceByStudent(course_id, student, offset, limit),
+            page_size
+        )
 
     # Schedule Management Functions
     def create_schedule(self, course_id, date, time):
@@ -143,17 +792,92 @@ class ContractInteraction:
         )
 
     def get_schedule(self, course_id):
-        return self.contracts['schedule_management'].functions.getSchedule(course_id).call()
+        return self._call('schedule_management', 'getSchedule', course_id)
+
+    def iter_schedule(self, course_id, page_size=100):
+        functions = self.contracts['schedule_management'].functions
+        return self._iter_pages(lambda offset, limit: functions.getSchedulePage(course_id, offset, limit), page_size)
+
+    def get_schedule_by_date(self, course_id, date):
+        if isinstance(date, datetime.date):
+            date = date.isoformat()
+        return self._call('schedule_management', 'getScheduleByDate', course_id, date)
+
+    # Range lookups use the date index of ScheduleManagementV2Upgradeable; both ends are inclusive
+    def get_schedule_in_range(self, course_id, start, end):
+        return self._call('schedule_management', 'getScheduleInRange', course_id, schedule_date(start), schedule_date(end))
+
+    def get_week_schedule(self, course_id, day):
+        # Monday to Sunday of the week containing day
+        day = datetime.date.fromisoformat(day) if isinstance(day, str) else day
+        monday = day - datetime.timedelta(days=day.weekday())
+        return self.get_schedule_in_range(course_id, monday, monday + datetime.timedelta(days=6))
+
+    def get_month_schedule(self, course_id, year, month):
+        last_day = calendar.monthrange(year, month)[1]
+        return self.get_schedule_in_range(course_id, datetime.date(year, month, 1), datetime.date(year, month, last_day))
 
     # Statistics Functions
     def get_average_grade(self, course_id):
-        return self.contracts['statistics_tracker'].functions.getAverageGrade(course_id).call()
+        if self._index_is_current():
+            return self.event_index.get_average_grade(course_id)
+        return self._call('statistics_tracker', 'getAverageGrade', course_id)
 
     def get_attendance_rate(self, course_id):
-        return self.contracts['statistics_tracker'].functions.getAttendanceRate(course_id).call()
+        if self._index_is_current():
+            return self.event_index.get_attendance_rate(course_id)
+        return self._call('statistics_tracker', 'getAttendanceRate', course_id)
 
     def get_student_average_grade(self, course_id, student):
-        return self.contracts['statistics_tracker'].functions.getAverageGradeByStudent(course_id, student).call()
+        if self._index_is_current():
+            return self.event_index.get_average_grade(course_id, student)
+        return self._call('statistics_tracker', 'getAverageGradeByStudent', course_id, student)
 
     def get_student_attendance_rate(self, course_id, student):
-        return self.contracts['statistics_tracker'].functions.getAttendanceRateByStudent(course_id, student).call()
+        if self._index_is_current():
+            return self.event_index.get_attendance_rate(course_id, student)
+        return self._call('statistics_tracker', 'getAttendanceRateByStudent', course_id, student)
+
+    # Analytics
+    def load_course_data(self, course_ids=None, source=None):
+        # source 'events' reads the local event index, 'contract' reads getGrades / getAttendance
+        # of every course in Multicall batches at one block; default is the index when configured
+        source = source or ('events' if self._index_is_current() else 'contract')
+        if source == 'events':
+            if self.event_index is None:
+                raise ValueError('EVENT_INDEX_DB is not configured')
+            return analytics.CourseData.from_event_index(self.event_index.reader, course_ids)
+        if source != 'contract':
+            raise ValueError(f'Unknown analytics source {source}')
+
+        block = self.w3.eth.block_number
+        if course_ids is None:
+            course_count = self.contracts['course_management'].functions.courseCount().call(block_identifier=block)
+            course_ids = range(1, course_count + 1)
+        course_ids = [int(course_id) for course_id in course_ids]
+        results = self.batch_call(
+            [('grade_management', 'getGrades', (course_id,)) for course_id in course_ids]
+            + [('grade_management', 'getAttendance', (course_id,)) for course_id in course_ids],
+            block_identifier=block
+        )
+        return analytics.CourseData.from_records(
+            list(itertools.chain.from_iterable(results[:len(course_ids)])),
+            list(itertools.chain.from_iterable(results[len(course_ids):])),
+            course_ids=course_ids
+        )
+
+    def course_analytics(self, course_ids=None, percentiles=analytics.DEFAULT_PERCENTILES, bins=analytics.DEFAULT_BINS,
+                         scale=4.0, source=None):
+        # Exact means, medians, percentiles, histograms, GPAs and attendance-grade correlation
+        return analytics.report(self.load_course_data(course_ids, source), percentiles, bins, scale)
+
+
+_interaction = None
+
+
+def get_interaction():
+    # Shared instance for endpoints that need the contract-level helpers
+    global _interaction
+    if _interaction is None:
+        _interaction = ContractInteraction()
+    return _interaction
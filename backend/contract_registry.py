@@ -0,0 +1,122 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from eth_utils import function_abi_to_4byte_selector
+
+
+class LRUCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        if key in self._items:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        return self._items.pop(key, default)
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        return {
+            'size': len(self._items),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+
+class ParsedABI:
+    def __init__(self, abi_hash, abi):
+        self.abi_hash = abi_hash
+        self.abi = abi
+        # Function lookup by name and by 4-byte selector
+        self.functions_by_name = {}
+        self.functions_by_selector = {}
+        for entry in abi:
+            if entry.get('type', 'function') != 'function':
+                continue
+            selector = '0x' + function_abi_to_4byte_selector(entry).hex()
+            self.functions_by_name.setdefault(entry['name'], []).append(entry)
+            self.functions_by_selector[selector] = entry
+
+    def function_names(self):
+        return list(self.functions_by_name)
+
+    def resolve_function_name(self, name_or_selector):
+        entry = self.functions_by_selector.get(name_or_selector.lower())
+        return entry['name'] if entry else name_or_selector
+
+
+class ContractRegistry:
+    """Process-wide cache of parsed ABIs and web3 Contract objects.
+
+    Contracts are keyed by (address, ABI hash), so repeated requests with the same raw ABI
+    string skip both the JSON parsing and the Contract construction.
+    """
+
+    def __init__(self, w3, max_contracts=256, max_abis=64):
+        self.w3 = w3
+        self._lock = threading.Lock()
+        self._abis = LRUCache(max_abis)
+        self._contracts = LRUCache(max_contracts)
+
+    @staticmethod
+    def abi_hash(abi):
+        raw = abi if isinstance(abi, str) else json.dumps(abi, sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def parse_abi(self, abi):
+        abi_hash = self.abi_hash(abi)
+        with self._lock:
+            parsed = self._abis.get(abi_hash)
+            if parsed is None:
+                parsed = ParsedABI(abi_hash, json.loads(abi) if isinstance(abi, str) else abi)
+                self._abis.put(abi_hash, parsed)
+            return parsed
+
+    def get_contract(self, address, abi):
+        parsed = self.parse_abi(abi)
+        key = (address.lower(), parsed.abi_hash)
+        with self._lock:
+            contract = self._contracts.get(key)
+            if contract is None:
+                contract = self.w3.eth.contract(address=address, abi=parsed.abi)
+                self._contracts.put(key, contract)
+            return contract
+
+    def resolve_function_name(self, contract, name_or_selector):
+        # Accept a 4-byte selector ('0x1234abcd') wherever a function name is expected
+        if not (name_or_selector.startswith('0x') and len(name_or_selector) == 10):
+            return name_or_selector
+        return self.parse_abi(contract.abi).resolve_function_name(name_or_selector)
+
+    def clear(self):
+        with self._lock:
+            self._abis.clear()
+            self._contracts.clear()
+
+    def stats(self):
+        return {'contracts': self._contracts.stats(), 'abis': self._abis.stats()}
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+
+logger = logging.getLogger(__name__)
+
+# Subscription kind -> (ABI name, proxy address key, event name)
+EVENT_KINDS = {
+    'grades': ('GradeManagement', 'GradeManagementProxy', 'GradeRecorded'),
+    'enrollments': ('CourseManagement', 'CourseManagementProxy', 'StudentEnrolled'),
+    'schedules': ('ScheduleManagement', 'ScheduleManagementProxy', 'ScheduleCreated'),
+}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS subscriptions (
+    chat_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    course_id INTEGER NOT NULL,
+    PRIMARY KEY (chat_id, kind, course_id)
+);
+CREATE INDEX IF NOT EXISTS subscriptions_by_kind ON subscriptions (kind, course_id);
+'''
+
+# Stored course_id for "every course"
+ALL_COURSES = -1
+
+
+class SubscriptionStore:
+    """Which chats get which events, optionally narrowed to one course."""
+
+    def __init__(self, db_path=':memory:'):
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        if db_path != ':memory:':
+            self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+
+    def subscribe(self, chat_id, kind, course_id=None):
+        with self._lock, self.db:
+            self.db.execute(
+                'INSERT OR IGNORE INTO subscriptions (chat_id, kind, course_id) VALUES (?, ?, ?)',
+                (chat_id, kind, ALL_COURSES if course_id is None else course_id)
+            )
+
+    def unsubscribe(self, chat_id, kind=None, course_id=None):
+        # No kind drops every subscription of the chat; no course drops every course of the kind
+        query = 'DELETE FROM subscriptions WHERE chat_id = ?'
+        params = [chat_id]
+        if kind is not None:
+            query += ' AND kind = ?'
+            params.append(kind)
+        if course_id is not None:
+            query += ' AND course_id = ?'
+            params.append(course_id)
+        with self._lock, self.db:
+            return self.db.execute(query, params).rowcount
+
+    def list(self, chat_id):
+        with self._lock:
+            rows = self.db.execute(
+                'SELECT kind, course_id FROM subscriptions WHERE chat_id = ? ORDER BY kind, course_id', (chat_id,)
+            ).fetchall()
+        return [(kind, None if course_id == ALL_COURSES else course_id) for kind, course_id in rows]
+
+    def chats_for(self, kind, course_id):
+        with self._lock:
+            rows = self.db.execute(
+                'SELECT DISTINCT chat_id FROM subscriptions WHERE kind = ? AND course_id IN (?, ?)',
+                (kind, ALL_COURSES, course_id)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+class EventFeed:
+    """Follows every subscribed event type with one eth_getLogs query per poll.
+
+    The query covers all watched contracts and event signatures at once, so the cost does not
+    grow with the number of chats or event kinds. Starts at the current head unless a start
+    block is given, i.e. only new events are delivered.
+    """
+
+    def __init__(self, w3, contracts, poll_interval=2.0, confirmations=0, batch_size=2000, start_block=None):
+        # contracts: kind -> (contract, event name)
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.confirmations = confirmations
+        self.batch_size = batch_size
+        self.next_block = start_block
+        self._events = {}
+        for kind, (contract, event_name) in contracts.items():
+            event = getattr(contract.events, event_name)()
+            topic = HexBytes(event_abi_to_log_topic(event.abi))
+            self._events[(contract.address.lower(), topic)] = (kind, event)
+        self._addresses = sorted({contract.address for contract, _ in contracts.values()})
+        self._topics = sorted({topic.hex() for _, topic in self._events})
+        self._stopped = asyncio.Event()
+
+    async def poll(self):
+        head = await self.w3.eth.block_number - self.confirmations
+        if self.next_block is None:
+            self.next_block = head + 1
+        events = []
+        while self.next_block <= head:
+            to_block = min(self.next_block + self.batch_size - 1, head)
+            logs = await self.w3.eth.get_logs({
+                'fromBlock': self.next_block,
+                'toBlock': to_block,
+                'address': self._addresses,
+                'topics': [self._topics]
+            })
+            for log in logs:
+                match = self._events.get((log['address'].lower(), HexBytes(log['topics'][0])))
+                if match is None:
+                    continue
+                kind, event = match
+                events.append((kind, dict(event.process_log(log)['args']), log))
+            self.next_block = to_block + 1
+        return events
+
+    async def run(self, handle):
+        # handle(kind, args, log) is awaited for every event, in chain order
+        while not self._stopped.is_set():
+            try:
+                for kind, args, log in await self.poll():
+                    await handle(kind, args, log)
+            except Exception:
+                logger.exception('Event poll failed; retrying')
+            try:
+                await asyncio.wait_for(self._stopped.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self):
+        self._stopped.set()
+
@@ -0,0 +1,260 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS grades (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    course_id INTEGER NOT NULL,
+    student TEXT NOT NULL,
+    grade INTEGER NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS grades_by_course_student ON grades (course_id, student);
+
+CREATE TABLE IF NOT EXISTS attendance (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    course_id INTEGER NOT NULL,
+    student TEXT NOT NULL,
+    attended INTEGER NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS attendance_by_course_student ON attendance (course_id, student);
+
+CREATE TABLE IF NOT EXISTS grade_totals (
+    course_id INTEGER NOT NULL,
+    student TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (course_id, student)
+);
+
+CREATE TABLE IF NOT EXISTS attendance_totals (
+    course_id INTEGER NOT NULL,
+    student TEXT NOT NULL,
+    attended INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (course_id, student)
+);
+
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    block_number INTEGER NOT NULL
+);
+'''
+
+# Course-wide totals live in the same tables under an empty student key
+COURSE_KEY = ''
+
+
+class EventIndexer:
+    """Follows GradeRecorded / AttendanceMarked logs into SQLite with running totals.
+
+    Averages and rates are answered from the *_totals tables by primary key, so a lookup
+    costs the same regardless of how many records a course has. start() keeps the index
+    following the chain from a background thread; is_current() tells whether the last
+    completed sync is recent enough to answer from.
+    """
+
+    def __init__(self, w3, contract, db_path, start_block=0, batch_size=2000, confirmations=0, reorg_window=128,
+                 clock=time.monotonic):
+        self.w3 = w3
+        self.contract = contract
+        self.start_block = start_block
+        self.batch_size = batch_size
+        self.confirmations = confirmations
+        self.reorg_window = reorg_window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.synced_at = None
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        if db_path != ':memory:':
+            self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+        # Lookups use their own connection so they only see committed batches while a sync runs
+        self.reader = sqlite3.connect(db_path, check_same_thread=False) if db_path != ':memory:' else self.db
+
+    @property
+    def checkpoint(self):
+        row = self.db.execute('SELECT block_number FROM checkpoint WHERE id = 0').fetchone()
+        return row[0] if row else self.start_block - 1
+
+    def sync(self):
+        # Index everything up to the current head (minus confirmations); returns the new checkpoint
+        with self._lock:
+            self._handle_reorg()
+            head = self.w3.eth.block_number - self.confirmations
+            from_block = self.checkpoint + 1
+            while from_block <= head:
+                to_block = min(from_block + self.batch_size - 1, head)
+                self._ingest_range(from_block, to_block)
+                from_block = to_block + 1
+            self.synced_at = self._clock()
+            return self.checkpoint
+
+    def is_current(self, max_age):
+        # True when a sync reached the head no more than max_age seconds ago
+        return self.synced_at is not None and self._clock() - self.synced_at <= max_age
+
+    def start(self, poll_interval=2):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, args=(poll_interval,), name='event-indexer', daemon=True)
+            self._thread.start()
+
+    def run(self, poll_interval=2):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception:
+                logger.exception('Event index sync failed; retrying')
+            self._stop.wait(poll_interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _ingest_range(self, from_block, to_block):
+        grade_logs = self.contract.events.GradeRecorded.get_logs(fromBlock=from_block, toBlock=to_block)
+        attendance_logs = self.contract.events.AttendanceMarked.get_logs(fromBlock=from_block, toBlock=to_block)
+
+        with self.db:
+            for log in grade_logs:
+                self._insert_grade(log)
+            for log in attendance_logs:
+                self._insert_attendance(log)
+
+            block_hashes = {log['blockNumber']: log['blockHash'] for log in grade_logs + attendance_logs}
+            block_hashes[to_block] = self.w3.eth.get_block(to_block)['hash']
+            self.db.executemany(
+                'INSERT OR REPLACE INTO blocks (number, hash) VALUES (?, ?)',
+                [(number, bytes(block_hash).hex()) for number, block_hash in block_hashes.items()]
+            )
+            self.db.execute('DELETE FROM blocks WHERE number < ?', (to_block - self.reorg_window,))
+            self.db.execute('INSERT OR REPLACE INTO checkpoint (id, block_number) VALUES (0, ?)', (to_block,))
+
+    def _insert_grade(self, log):
+        args = log['args']
+        inserted = self.db.execute(
+            'INSERT OR IGNORE INTO grades VALUES (?, ?, ?, ?, ?, ?)',
+            (log['blockNumber'], log['logIndex'], bytes(log['transactionHash']).hex(),
+             args['courseId'], args['student'], args['grade'])
+        ).rowcount
+        if inserted:
+            for student in (args['student'], COURSE_KEY):
+                self._add_totals('grade_totals', 'total', args['courseId'], student, args['grade'], 1)
+
+    def _insert_attendance(self, log):
+        args = log['args']
+        inserted = self.db.execute(
+            'INSERT OR IGNORE INTO attendance VALUES (?, ?, ?, ?, ?, ?)',
+            (log['blockNumber'], log['logIndex'], bytes(log['transactionHash']).hex(),
+             args['courseId'], args['student'], int(args['attended']))
+        ).rowcount
+        if inserted:
+            for student in (args['student'], COURSE_KEY):
+                self._add_totals('attendance_totals', 'attended', args['courseId'], student, int(args['attended']), 1)
+
+    def _add_totals(self, table, column, course_id, student, value, count):
+        self.db.execute(
+            f'INSERT INTO {table} (course_id, student, {column}, count) VALUES (?, ?, ?, ?) '
+            f'ON CONFLICT (course_id, student) DO UPDATE SET '
+            f'{column} = {column} + excluded.{column}, count = count + excluded.count',
+            (course_id, student, value, count)
+        )
+
+    def _handle_reorg(self):
+        # Walk back through stored block hashes until one still matches the chain
+        stored = self.db.execute('SELECT number, hash FROM blocks ORDER BY number DESC').fetchall()
+        for index, (number, block_hash) in enumerate(stored):
+            if bytes(self.w3.eth.get_block(number)['hash']).hex() == block_hash:
+                if index > 0:
+                    self._rollback(number)
+                return
+        if stored:
+            # Reorg deeper than the window: start over
+            self._rollback(self.start_block - 1)
+
+    def _rollback(self, block_number):
+        with self.db:
+            removed_grades = self.db.execute(
+                'SELECT course_id, student, SUM(grade), COUNT(*) FROM grades WHERE block_number > ? '
+                'GROUP BY course_id, student', (block_number,)
+            ).fetchall()
+            for course_id, student, total, count in removed_grades:
+                for key in (student, COURSE_KEY):
+                    self._add_totals('grade_totals', 'total', course_id, key, -total, -count)
+
+            removed_attendance = self.db.execute(
+                'SELECT course_id, student, SUM(attended), COUNT(*) FROM attendance WHERE block_number > ? '
+                'GROUP BY course_id, student', (block_number,)
+            ).fetchall()
+            for course_id, student, attended, count in removed_attendance:
+                for key in (student, COURSE_KEY):
+                    self._add_totals('attendance_totals', 'attended', course_id, key, -attended, -count)
+
+            self.db.execute('DELETE FROM grades WHERE block_number > ?', (block_number,))
+            self.db.execute('DELETE FROM attendance WHERE block_number > ?', (block_number,))
+            self.db.execute('DELETE FROM blocks WHERE number > ?', (block_number,))
+            self.db.execute('INSERT OR REPLACE INTO checkpoint (id, block_number) VALUES (0, ?)', (block_number,))
+
+    def _totals(self, table, column, course_id, student):
+        if student != COURSE_KEY:
+            student = Web3.to_checksum_address(student)
+        row = self.reader.execute(
+            f'SELECT {column}, count FROM {table} WHERE course_id = ? AND student = ?', (course_id, student)
+        ).fetchone()
+        return row if row else (0, 0)
+
+    # Same integer semantics as StatisticsTrackerUpgradeable
+    def get_average_grade(self, course_id, student=COURSE_KEY):
+        total, count = self._totals('grade_totals', 'total', course_id, student)
+        return total // count if count else 0
+
+    def get_attendance_rate(self, course_id, student=COURSE_KEY):
+        attended, count = self._totals('attendance_totals', 'attended', course_id, student)
+        return attended * 100 // count if count else 0
+
+
+if __name__ == '__main__':
+    from abi_bundle import load_abis
+    from contract_interaction import load_deployed_addresses, make_http_session, make_web3
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+    # Only the connection and the GradeManagement contract: a ContractInteraction would start a
+    # second indexer of its own when EVENT_INDEX_DB is set
+    w3 = make_web3(make_http_session())
+    contract = w3.eth.contract(
+        address=load_deployed_addresses()['GradeManagementProxy'], abi=load_abis()['GradeManagement']
+    )
+    indexer = EventIndexer(
+        w3,
+        contract,
+        os.getenv('EVENT_INDEX_DB', 'events.db'),
+        start_block=int(os.getenv('EVENT_INDEX_START_BLOCK', '0')),
+        confirmations=int(os.getenv('EVENT_INDEX_CONFIRMATIONS', '0'))
+    )
+    # run() logs failed syncs and keeps polling until interrupted
+    try:
+        indexer.run(poll_interval=float(os.getenv('EVENT_INDEX_POLL_INTERVAL', '2.0')))
+    except KeyboardInterrupt:
+        logger.info('Stopped at block %s', indexer.checkpoint)
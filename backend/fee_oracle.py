@@ -0,0 +1,185 @@
+import math
+import threading
+import time
+
+from web3 import Web3
+
+from contract_registry import LRUCache
+
+# Nodes only accept a replacement that raises both fee fields by at least 10%
+MIN_REPLACEMENT_BUMP = 1.1
+
+
+class FeeOracle:
+    """EIP-1559 fees and gas limits for outgoing transactions.
+
+    Base and priority fees come from one eth_feeHistory call and are reused until the next
+    block is expected (block_ttl seconds). Gas estimates are cached per (contract, selector,
+    calldata size) for estimate_ttl seconds, so repeated sends of the same function skip
+    eth_estimateGas; calldata size keeps batch calls of different lengths apart. Gas use
+    depends on contract state (cold storage slots, growing arrays), so estimates expire, and
+    observe_receipt() drops one as soon as a transaction built from it runs out of gas.
+    Chains without a base fee fall back to legacy gasPrice transactions. AsyncFeeOracle does
+    the same for AsyncWeb3 clients.
+    """
+
+    def __init__(self, w3, gas_margin=1.2, priority_percentile=50, fee_history_blocks=5,
+                 base_fee_multiplier=2, block_ttl=2.0, max_estimates=1024, estimate_ttl=60.0,
+                 clock=time.monotonic):
+        self.w3 = w3
+        self.gas_margin = gas_margin
+        self.priority_percentile = priority_percentile
+        self.fee_history_blocks = fee_history_blocks
+        self.base_fee_multiplier = base_fee_multiplier
+        self.block_ttl = block_ttl
+        self.estimate_ttl = estimate_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._fees = None
+        self._fees_fetched_at = None
+        self._estimates = LRUCache(max_estimates)
+
+    def fees(self):
+        fees = self._cached_fees()
+        if fees is None:
+            fees = self._store_fees(self._fetch_fees())
+        return fees
+
+    def _cached_fees(self):
+        with self._lock:
+            if self._fees is not None and self._clock() - self._fees_fetched_at < self.block_ttl:
+                return self._fees
+        return None
+
+    def _store_fees(self, fees):
+        with self._lock:
+            self._fees = fees
+            self._fees_fetched_at = self._clock()
+        return fees
+
+    def _fetch_fees(self):
+        try:
+            history = self.w3.eth.fee_history(self.fee_history_blocks, 'latest', [self.priority_percentile])
+        except ValueError:
+            history = None
+        base_fee, priority_fee = _history_fees(history)
+        if not base_fee:
+            return {'gasPrice': self.w3.eth.gas_price}
+        return self._dynamic_fees(base_fee, priority_fee or self.w3.eth.max_priority_fee)
+
+    def _dynamic_fees(self, base_fee, priority_fee):
+        return {
+            'maxPriorityFeePerGas': priority_fee,
+            'maxFeePerGas': base_fee * self.base_fee_multiplier + priority_fee,
+        }
+
+    def _cached_estimate(self, transaction):
+        key = _estimate_key(transaction)
+        with self._lock:
+            entry = self._estimates.get(key)
+            if entry is not None and self._clock() - entry[1] < self.estimate_ttl:
+                return key, entry[0]
+        return key, None
+
+    def _store_estimate(self, key, estimate):
+        gas = math.ceil(estimate * self.gas_margin)
+        with self._lock:
+            self._estimates.put(key, (gas, self._clock()))
+        return gas
+
+    def observe_receipt(self, transaction, receipt):
+        # A failed transaction that burned its whole gas limit ran out of gas: the cached estimate
+        # no longer covers the current state, so the next send estimates again
+        if transaction and receipt and receipt['status'] == 0 and receipt['gasUsed'] >= transaction['gas']:
+            with self._lock:
+                self._estimates.pop(_estimate_key(transaction))
+
+    def estimate_gas(self, transaction):
+        key, gas = self._cached_estimate(transaction)
+        if gas is None:
+            gas = self._store_estimate(key, self.w3.eth.estimate_gas(_estimate_request(transaction)))
+        return gas
+
+    def build_transaction(self, contract_function, params):
+        # A placeholder gas value stops web3 from estimating on its own; we estimate (or reuse) below
+        transaction = contract_function.build_transaction(dict(params, gas=0, **self.fees()))
+        transaction['gas'] = self.estimate_gas(transaction)
+        return transaction
+
+    def bump(self, transaction, factor=1.125):
+        # Replacement for a stuck transaction: same nonce, fees raised by factor and never below the market
+        return _bumped(transaction, factor, self.fees())
+
+    def stats(self):
+        with self._lock:
+            return {'fees': self._fees, 'estimates': self._estimates.stats()}
+
+
+class AsyncFeeOracle(FeeOracle):
+    """FeeOracle for AsyncWeb3 clients: the same caches, with the RPC calls awaited."""
+
+    async def fees(self):
+        fees = self._cached_fees()
+        if fees is None:
+            fees = self._store_fees(await self._fetch_fees())
+        return fees
+
+    async def _fetch_fees(self):
+        try:
+            history = await self.w3.eth.fee_history(self.fee_history_blocks, 'latest', [self.priority_percentile])
+        except ValueError:
+            history = None
+        base_fee, priority_fee = _history_fees(history)
+        if not base_fee:
+            return {'gasPrice': await self.w3.eth.gas_price}
+        return self._dynamic_fees(base_fee, priority_fee or await self.w3.eth.max_priority_fee)
+
+    async def estimate_gas(self, transaction):
+        key, gas = self._cached_estimate(transaction)
+        if gas is None:
+            gas = self._store_estimate(key, await self.w3.eth.estimate_gas(_estimate_request(transaction)))
+        return gas
+
+    async def build_transaction(self, contract_function, params):
+        transaction = await contract_function.build_transaction(dict(params, gas=0, **await self.fees()))
+        transaction['gas'] = await self.estimate_gas(transaction)
+        return transaction
+
+    async def bump(self, transaction, factor=1.125):
+        return _bumped(transaction, factor, await self.fees())
+
+
+def _history_fees(history):
+    # The last baseFeePerGas entry is the base fee of the block being built; the priority fee is
+    # the median reward over the sampled blocks (0 when unknown)
+    base_fee = history['baseFeePerGas'][-1] if history and history.get('baseFeePerGas') else 0
+    rewards = sorted(reward[0] for reward in (history or {}).get('reward') or [] if reward)
+    return base_fee, rewards[len(rewards) // 2] if rewards else 0
+
+
+def _estimate_key(transaction):
+    # Built transactions carry 'data'; ones fetched back from the node carry 'input' bytes
+    data = transaction.get('data') or transaction.get('input') or '0x'
+    if isinstance(data, (bytes, bytearray)):
+        data = Web3.to_hex(data)
+    return str(transaction['to']).lower(), data[:10], len(data)
+
+
+def _estimate_request(transaction):
+    return {
+        'from': transaction['from'],
+        'to': transaction['to'],
+        'data': transaction.get('data') or '0x',
+        'value': transaction.get('value', 0)
+    }
+
+
+def _bumped(transaction, factor, current):
+    factor = max(factor, MIN_REPLACEMENT_BUMP)
+    bumped = dict(transaction)
+    for field in ('maxFeePerGas', 'maxPriorityFeePerGas', 'gasPrice'):
+        if field in transaction:
+            bumped[field] = max(math.ceil(transaction[field] * factor), current.get(field, 0))
+    if 'maxFeePerGas' in bumped:
+        bumped['maxFeePerGas'] = max(bumped['maxFeePerGas'], bumped['maxPriorityFeePerGas'])
+    return bumped
@@ -0,0 +1,328 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Counters and histograms are keyed by name plus a label set; gauges are read from callbacks
+at scrape time, so cache and queue sizes are always current without bookkeeping on the hot
+path. A web3 middleware counts every JSON-RPC call, and a sampling profiler can be switched
+on to see where the remaining time goes.
+"""
+import bisect
+import collections
+import contextvars
+import functools
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LatencyHistogram:
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def to_dict(self):
+        buckets = {str(bound): count for bound, count in zip(self.buckets, self.counts)}
+        buckets['+Inf'] = self.counts[-1]
+        return {'count': self.total, 'sum': self.sum, 'buckets': buckets}
+
+
+# Buckets for counts rather than seconds (e.g. RPC calls made by one HTTP request)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._types = {}
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+
+    def _declare(self, name, kind, help_text):
+        if self._types.setdefault(name, kind) != kind:
+            raise ValueError(f'Metric {name} is already registered as a {self._types[name]}')
+        if help_text:
+            self._help.setdefault(name, help_text)
+
+    def inc(self, name, amount=1, help_text=None, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._declare(name, 'counter', help_text)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, help_text=None, buckets=None, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._declare(name, 'histogram', help_text)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram(buckets)
+            histogram.observe(value)
+
+    def gauge(self, name, fn, help_text=None):
+        # fn() returns a number, or a dict of {label tuple: number} for labelled series
+        with self._lock:
+            self._declare(name, 'gauge', help_text)
+            self._gauges[name] = fn
+
+    @contextmanager
+    def timer(self, name, help_text=None, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, help_text, **labels)
+
+    def timed(self, name, help_text=None, **labels):
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, help_text, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def get(self, name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key in self._counters:
+                return self._counters[key]
+            return self._histograms.get(key)
+
+    def _gauge_samples(self, fn):
+        try:
+            value = fn()
+        except Exception:
+            # A failing source (e.g. node unreachable) must not break the whole scrape
+            return []
+        if value is None:
+            return []
+        if isinstance(value, dict):
+            return [(tuple(labels), sample) for labels, sample in value.items() if sample is not None]
+        return [((), value)]
+
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                key: (histogram.buckets, list(histogram.counts), histogram.total, histogram.sum)
+                for key, histogram in self._histograms.items()
+            }
+            gauges = dict(self._gauges)
+            types = dict(self._types)
+            help_texts = dict(self._help)
+
+        series = collections.defaultdict(list)
+        for (name, labels), value in counters.items():
+            series[name].append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        for (name, labels), (buckets, counts, total, total_sum) in histograms.items():
+            cumulative = 0
+            for bound, count in zip(buckets + (float('inf'),), counts):
+                cumulative += count
+                bucket_labels = labels + (('le', _format_value(bound)),)
+                series[name].append(f'{name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+            series[name].append(f'{name}_sum{_format_labels(labels)} {_format_value(total_sum)}')
+            series[name].append(f'{name}_count{_format_labels(labels)} {total}')
+        for name, fn in gauges.items():
+            for labels, value in self._gauge_samples(fn):
+                series[name].append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+        lines = []
+        for name in sorted(series):
+            if name in help_texts:
+                lines.append(f'# HELP {name} {help_texts[name]}')
+            lines.append(f'# TYPE {name} {types[name]}')
+            lines.extend(series[name])
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+REGISTRY = MetricsRegistry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# RPC calls made while serving the current HTTP request (None outside a request)
+_request_rpc_calls = contextvars.ContextVar('request_rpc_calls', default=None)
+
+
+def rpc_metrics_middleware(make_request, w3):
+    def middleware(method, params):
+        counter = _request_rpc_calls.get()
+        if counter is not None:
+            counter[0] += 1
+        started = time.perf_counter()
+        try:
+            response = make_request(method, params)
+        except Exception:
+            REGISTRY.inc('rpc_errors_total', help_text='JSON-RPC calls that raised', method=method)
+            raise
+        finally:
+            REGISTRY.observe('rpc_request_seconds', time.perf_counter() - started,
+                             help_text='JSON-RPC round trip time', method=method)
+        if 'error' in response:
+            REGISTRY.inc('rpc_errors_total', help_text='JSON-RPC calls that raised', method=method)
+        return response
+    return middleware
+
+
+def observe_rpc_batch(batch, seconds, responses=None):
+    # JSON-RPC batches are posted past the web3 middleware; they count as one call per request
+    # in http_request_rpc_calls and are timed as a whole under method="batch"
+    counter = _request_rpc_calls.get()
+    if counter is not None:
+        counter[0] += len(batch)
+    REGISTRY.observe('rpc_request_seconds', seconds, help_text='JSON-RPC round trip time', method='batch')
+    if responses is None:
+        REGISTRY.inc('rpc_errors_total', help_text='JSON-RPC calls that raised', method='batch')
+        return
+    methods = {request['id']: request['method'] for request in batch}
+    for response in responses:
+        if 'error' in response:
+            REGISTRY.inc('rpc_errors_total', help_text='JSON-RPC calls that raised',
+                         method=methods.get(response.get('id'), 'batch'))
+
+
+def instrument_flask(app, registry=REGISTRY):
+    """Time every request and count the RPC calls it triggered."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+        g.metrics_rpc_calls = [0]
+        g.metrics_token = _request_rpc_calls.set(g.metrics_rpc_calls)
+
+    @app.after_request
+    def _record(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        registry.observe('http_request_seconds', time.perf_counter() - started,
+                         help_text='Flask request handling time',
+                         endpoint=endpoint, method=request.method, status=response.status_code)
+        registry.observe('http_request_rpc_calls', g.metrics_rpc_calls[0],
+                         help_text='JSON-RPC calls made per HTTP request', buckets=COUNT_BUCKETS,
+                         endpoint=endpoint)
+        return response
+
+    @app.teardown_request
+    def _reset(_):
+        token = g.pop('metrics_token', None)
+        if token is not None:
+            _request_rpc_calls.reset(token)
+
+    return app
+
+
+class SamplingProfiler:
+    """Samples every thread's stack at a fixed interval and aggregates them.
+
+    collapsed() returns "frame;frame;frame count" lines, the input format of flamegraph.pl
+    and speedscope. Sampling costs one sys._current_frames() walk per interval, so it can
+    stay on in production at the default 10 ms.
+    """
+
+    def __init__(self, interval=0.01, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = collections.Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def sample(self):
+        own = threading.get_ident()
+        stacks = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                frame = frame.f_back
+            stacks.append(';'.join(reversed(stack)))
+        with self._lock:
+            self.samples.update(stacks)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def collapsed(self, limit=None):
+        with self._lock:
+            top = self.samples.most_common(limit)
+        return '\n'.join(f'{stack} {count}' for stack, count in top) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+
+
+def profiler_enabled():
+    # PROFILER_ENABLED starts sampling at import and exposes the /debug/profiler endpoint
+    return os.getenv('PROFILER_ENABLED', '').lower() in ('1', 'true', 'yes')
+
+
+profiler = SamplingProfiler(interval=float(os.getenv('PROFILER_INTERVAL', '0.01')))
+if profiler_enabled():
+    profiler.start()
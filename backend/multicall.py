@@ -0,0 +1,123 @@
+import itertools
+
+import requests
+from hexbytes import HexBytes
+from web3._utils.abi import get_abi_output_types, map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+from web3.exceptions import ContractLogicError
+
+from provider_pool import send_batch
+
+# Multicall3 is deployed at the same address on mainnet, Sepolia and most other chains
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+
+MULTICALL3_ABI = [{
+    'name': 'aggregate3',
+    'type': 'function',
+    'stateMutability': 'payable',
+    'inputs': [{
+        'name': 'calls',
+        'type': 'tuple[]',
+        'components': [
+            {'name': 'target', 'type': 'address'},
+            {'name': 'allowFailure', 'type': 'bool'},
+            {'name': 'callData', 'type': 'bytes'}
+        ]
+    }],
+    'outputs': [{
+        'name': 'returnData',
+        'type': 'tuple[]',
+        'components': [
+            {'name': 'success', 'type': 'bool'},
+            {'name': 'returnData', 'type': 'bytes'}
+        ]
+    }]
+}]
+
+
+class Multicall:
+    """Runs many view calls in one round trip.
+
+    Uses Multicall3 aggregate3 when the contract exists on the connected chain and falls back
+    to a single JSON-RPC batch request otherwise (e.g. on a fresh Hardhat node).
+    """
+
+    def __init__(self, w3, address=None, batch_size=500, session=None):
+        self.w3 = w3
+        self.address = address or MULTICALL3_ADDRESS
+        self.batch_size = batch_size
+        self._multicall = w3.eth.contract(address=self.address, abi=MULTICALL3_ABI)
+        self._deployed = None
+        self._session = session
+        self._request_ids = itertools.count(1)
+
+    @property
+    def deployed(self):
+        if self._deployed is None:
+            self._deployed = len(self.w3.eth.get_code(self.address)) > 0
+        return self._deployed
+
+    def call(self, calls, block_identifier='latest', allow_failure=False):
+        # calls: iterable of (contract, function_name, args); results come back in the same order
+        calls = list(calls)
+        encoded = [self._encode(contract, function_name, args) for contract, function_name, args in calls]
+        results = []
+        for start in range(0, len(encoded), self.batch_size):
+            chunk = encoded[start:start + self.batch_size]
+            if self.deployed:
+                raw_results = self._aggregate3(chunk, block_identifier)
+            else:
+                raw_results = self._json_rpc_batch(chunk, block_identifier)
+            for (target, _, fn_abi, label), (success, return_data) in zip(chunk, raw_results):
+                if not success:
+                    if not allow_failure:
+                        raise ContractLogicError(f'Batched call {label} on {target} reverted')
+                    results.append(None)
+                    continue
+                results.append(self._decode(fn_abi, return_data))
+        return results
+
+    def _encode(self, contract, function_name, args):
+        fn_abi = contract.get_function_by_name(function_name).abi
+        call_data = contract.encodeABI(fn_name=function_name, args=list(args))
+        return contract.address, call_data, fn_abi, function_name
+
+    def _decode(self, fn_abi, return_data):
+        output_types = get_abi_output_types(fn_abi)
+        decoded = self.w3.codec.decode(output_types, HexBytes(return_data))
+        normalized = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, decoded)
+        return normalized[0] if len(normalized) == 1 else normalized
+
+    def _aggregate3(self, chunk, block_identifier):
+        payload = [(target, True, call_data) for target, call_data, _, _ in chunk]
+        return self._multicall.functions.aggregate3(payload).call(block_identifier=block_identifier)
+
+    def _json_rpc_batch(self, chunk, block_identifier):
+        if isinstance(block_identifier, int):
+            block_identifier = hex(block_identifier)
+        requests_by_id = {}
+        batch = []
+        for index, (target, call_data, _, _) in enumerate(chunk):
+            request_id = next(self._request_ids)
+            requests_by_id[request_id] = index
+            batch.append({
+                'jsonrpc': '2.0',
+                'id': request_id,
+                'method': 'eth_call',
+                'params': [{'to': target, 'data': call_data}, block_identifier]
+            })
+
+        # Batch responses may arrive in any order
+        results = [(False, b'')] * len(chunk)
+        for item in send_batch(self.w3, batch, self._get_session()):
+            index = requests_by_id[item['id']]
+            if 'error' in item:
+                results[index] = (False, b'')
+            else:
+                results[index] = (True, HexBytes(item['result']))
+        return results
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
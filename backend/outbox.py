@@ -0,0 +1,343 @@
+import asyncio
+import inspect
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+import aiohttp
+import requests
+
+from transaction_pipeline import is_nonce_error
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT UNIQUE,
+    lane TEXT NOT NULL,
+    contract_address TEXT NOT NULL,
+    abi TEXT NOT NULL,
+    function_name TEXT NOT NULL,
+    args TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    tx_hash TEXT,
+    raw_transaction TEXT,
+    nonce INTEGER,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_lane ON jobs (lane, state, id);
+'''
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SENT = 'sent'
+FAILED = 'failed'
+
+# Failures worth another attempt; reverts, bad arguments and the like fail the job at once
+RETRYABLE_ERRORS = (ConnectionError, TimeoutError, requests.RequestException, aiohttp.ClientError)
+
+
+def is_retryable(error):
+    return isinstance(error, RETRYABLE_ERRORS) or is_nonce_error(error)
+
+
+class OutboxFull(Exception):
+    pass
+
+
+class Job:
+    COLUMNS = (
+        'id', 'idempotency_key', 'lane', 'contract_address', 'abi', 'function_name', 'args', 'meta', 'state',
+        'attempts', 'next_attempt', 'tx_hash', 'raw_transaction', 'nonce', 'error', 'created', 'updated'
+    )
+
+    def __init__(self, row):
+        for column, value in zip(self.COLUMNS, row):
+            setattr(self, column, value)
+        self.abi = json.loads(self.abi)
+        self.args = json.loads(self.args)
+        self.meta = json.loads(self.meta)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'state': self.state,
+            'signer': self.lane,
+            'contract_address': self.contract_address,
+            'function_name': self.function_name,
+            'args': self.args,
+            'attempts': self.attempts,
+            'transaction_hash': self.tx_hash,
+            'error': self.error,
+            'created': self.created,
+            'updated': self.updated,
+        }
+
+
+class Outbox:
+    """Write requests persisted in SQLite and drained by a pool of submitter workers.
+
+    Every job belongs to the lane of one signer. Workers only take the oldest unfinished job of
+    a lane, so each signer's transactions go out one at a time in the order they were queued,
+    while different signers proceed in parallel. A job's signed transaction is stored before
+    it is broadcast; retries and jobs interrupted by a crash (queued again on startup) resend
+    the stored transaction instead of signing a new one. One database file serves one process.
+    """
+
+    def __init__(self, db_path, lanes, max_pending=10000, max_attempts=5, retry_delay=2.0, poll_interval=1.0,
+                 clock=time.time):
+        if not lanes:
+            raise ValueError('Outbox needs at least one signer lane')
+        self.lanes = list(lanes)
+        self._lanes_by_key = {lane.lower(): lane for lane in self.lanes}
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._loop = None
+        self._async_wakeup = None
+        self.db = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        if db_path != ':memory:':
+            self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+        self.recover()
+
+    def _transaction(self, work):
+        with self._lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                result = work()
+                self.db.execute('COMMIT')
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+            return result
+
+    def _fetch(self, job_id):
+        row = self.db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return Job(row) if row else None
+
+    def recover(self):
+        # Jobs a previous run left mid-submit; a stored raw transaction is rebroadcast by the worker
+        now = self._clock()
+        self._transaction(lambda: self.db.execute(
+            'UPDATE jobs SET state = ?, next_attempt = ?, updated = ? WHERE state = ?', (QUEUED, now, now, RUNNING)
+        ))
+
+    def lane_for(self, address):
+        # Configured lane for an address in any letter case; ValueError for unknown signers
+        lane = self._lanes_by_key.get(str(address).lower())
+        if lane is None:
+            raise ValueError(f'{address} is not a configured signer')
+        return lane
+
+    def enqueue(self, contract_address, abi, function_name, args=(), idempotency_key=None, lane=None, meta=None):
+        # A repeated idempotency key returns the job it created instead of queueing another one
+        if lane is not None:
+            lane = self.lane_for(lane)
+
+        def insert():
+            if idempotency_key is not None:
+                row = self.db.execute('SELECT * FROM jobs WHERE idempotency_key = ?', (idempotency_key,)).fetchone()
+                if row:
+                    return Job(row)
+            loads = dict(self.db.execute(
+                'SELECT lane, COUNT(*) FROM jobs WHERE state IN (?, ?) GROUP BY lane', (QUEUED, RUNNING)
+            ).fetchall())
+            if sum(loads.values()) >= self.max_pending:
+                raise OutboxFull(f'{self.max_pending} jobs already pending')
+            chosen = lane or min(self.lanes, key=lambda candidate: loads.get(candidate, 0))
+            now = self._clock()
+            cursor = self.db.execute(
+                'INSERT INTO jobs (idempotency_key, lane, contract_address, abi, function_name, args, meta, state, '
+                'next_attempt, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (idempotency_key, chosen, contract_address, json.dumps(abi), function_name, json.dumps(list(args)),
+                 json.dumps(meta or {}), QUEUED, now, now, now)
+            )
+            return self._fetch(cursor.lastrowid)
+
+        job = self._transaction(insert)
+        self._notify()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._fetch(job_id)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.db.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+        return {state: counts.get(state, 0) for state in (QUEUED, RUNNING, SENT, FAILED)}
+
+    def claim(self):
+        # Oldest due job that heads its lane: an earlier job of the same signer still queued
+        # (e.g. waiting to retry) or running blocks everything behind it
+        def take():
+            row = self.db.execute(
+                'SELECT id FROM jobs AS job WHERE state = ? AND next_attempt <= ? AND id = ('
+                'SELECT MIN(id) FROM jobs WHERE lane = job.lane AND state IN (?, ?)) '
+                'ORDER BY next_attempt, id LIMIT 1',
+                (QUEUED, self._clock(), QUEUED, RUNNING)
+            ).fetchone()
+            if row is None:
+                return None
+            self.db.execute(
+                'UPDATE jobs SET state = ?, attempts = attempts + 1, updated = ? WHERE id = ?',
+                (RUNNING, self._clock(), row[0])
+            )
+            return self._fetch(row[0])
+
+        return self._transaction(take)
+
+    def record_signed(self, job_id, tx_hash, raw_transaction, nonce):
+        self._transaction(lambda: self.db.execute(
+            'UPDATE jobs SET tx_hash = ?, raw_transaction = ?, nonce = ?, updated = ? WHERE id = ?',
+            (_hex(tx_hash), _hex(raw_transaction), nonce, self._clock(), job_id)
+        ))
+
+    def clear_signed(self, job_id):
+        # Only for a stored transaction that can no longer be mined (its nonce went to another one)
+        self._transaction(lambda: self.db.execute(
+            'UPDATE jobs SET tx_hash = NULL, raw_transaction = NULL, nonce = NULL, updated = ? WHERE id = ?',
+            (self._clock(), job_id)
+        ))
+
+    def complete(self, job_id, tx_hash):
+        def finish():
+            self.db.execute(
+                'UPDATE jobs SET state = ?, tx_hash = ?, raw_transaction = NULL, error = NULL, updated = ? '
+                'WHERE id = ?', (SENT, _hex(tx_hash), self._clock(), job_id)
+            )
+            return self._fetch(job_id)
+
+        job = self._transaction(finish)
+        self._notify()
+        return job
+
+    def fail(self, job, error):
+        # Once the signed transaction is stored it may already be in the node's pool, so any error
+        # is retried by resending it; before that only transient errors are
+        now = self._clock()
+
+        def update():
+            signed = self.db.execute('SELECT raw_transaction FROM jobs WHERE id = ?', (job.id,)).fetchone()[0]
+            if (signed is not None or is_retryable(error)) and job.attempts < self.max_attempts:
+                state, next_attempt = QUEUED, now + self.retry_delay * 2 ** (job.attempts - 1)
+            else:
+                state, next_attempt = FAILED, job.next_attempt
+            self.db.execute(
+                'UPDATE jobs SET state = ?, next_attempt = ?, error = ?, updated = ? WHERE id = ?',
+                (state, next_attempt, str(error) or type(error).__name__, now, job.id)
+            )
+            return self._fetch(job.id)
+
+        job = self._transaction(update)
+        self._notify()
+        return job
+
+    def _failed(self, job, error):
+        job = self.fail(job, error)
+        logger.warning('Outbox job %s attempt %s failed: %s', job.id, job.attempts, error)
+        return job
+
+    def process(self, submit, on_finished=None):
+        # Runs at most one job; submit(job) returns the transaction hash. Returns the job or None
+        job = self.claim()
+        if job is None:
+            return None
+        try:
+            tx_hash = submit(job)
+        except Exception as e:
+            job = self._failed(job, e)
+        else:
+            job = self.complete(job.id, tx_hash)
+        if on_finished is not None and job.state in (SENT, FAILED):
+            on_finished(job)
+        return job
+
+    async def process_async(self, submit, on_finished=None):
+        # Same as process() with a coroutine submit(job); on_finished may be sync or async
+        job = await asyncio.to_thread(self.claim)
+        if job is None:
+            return None
+        try:
+            tx_hash = await submit(job)
+        except Exception as e:
+            job = await asyncio.to_thread(self._failed, job, e)
+        else:
+            job = await asyncio.to_thread(self.complete, job.id, tx_hash)
+        if on_finished is not None and job.state in (SENT, FAILED):
+            result = on_finished(job)
+            if inspect.isawaitable(result):
+                await result
+        return job
+
+    def _notify(self):
+        self._wakeup.set()
+        if self._async_wakeup is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._async_wakeup.set)
+
+    def start(self, submit, workers=4, on_finished=None):
+        if not self._threads:
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self.run, args=(submit, on_finished), name=f'outbox-{i}', daemon=True)
+                for i in range(workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def run(self, submit, on_finished=None):
+        while not self._stop.is_set():
+            try:
+                if self.process(submit, on_finished) is not None:
+                    continue
+            except Exception:
+                logger.exception('Outbox worker failed; retrying')
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    async def run_async(self, submit, workers=4, on_finished=None):
+        self._loop = asyncio.get_running_loop()
+        self._async_wakeup = asyncio.Event()
+
+        async def worker():
+            while not self._stop.is_set():
+                try:
+                    if await self.process_async(submit, on_finished) is not None:
+                        continue
+                except Exception:
+                    logger.exception('Outbox worker failed; retrying')
+                try:
+                    await asyncio.wait_for(self._async_wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._async_wakeup.clear()
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+    def stop(self):
+        self._stop.set()
+        self._notify()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+def _hex(value):
+    if value is None or isinstance(value, str):
+        return value
+    return '0x' + bytes(value).hex()
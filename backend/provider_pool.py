@@ -0,0 +1,307 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+
+import metrics
+from metrics import LatencyHistogram
+
+# Calls that only read state can go to any node in the pool
+READ_METHODS = {
+    'eth_blockNumber', 'eth_call', 'eth_chainId', 'eth_estimateGas', 'eth_feeHistory', 'eth_gasPrice',
+    'eth_getBalance', 'eth_getBlockByHash', 'eth_getBlockByNumber', 'eth_getCode', 'eth_getLogs',
+    'eth_getStorageAt', 'eth_getTransactionByHash', 'eth_getTransactionCount', 'eth_getTransactionReceipt',
+    'eth_maxPriorityFeePerGas', 'net_version', 'web3_clientVersion',
+}
+# Reads that get a second, parallel attempt when the first node is slow
+HEDGED_METHODS = {'eth_call'}
+# Position of the block parameter for reads that can be pinned to a block number
+BLOCK_PARAM = {
+    'eth_call': 1, 'eth_getBalance': 1, 'eth_getCode': 1, 'eth_getTransactionCount': 1,
+    'eth_getStorageAt': 2, 'eth_getBlockByNumber': 0,
+}
+# JSON-RPC errors of a node that has not reached the requested block yet
+UNKNOWN_BLOCK_ERRORS = ('header not found', 'unknown block', 'block not found', 'missing trie node')
+
+
+def pinned_block(method, params):
+    # Block number a read is pinned to, None for tags such as 'latest' or unpinned methods
+    if method == 'eth_getLogs':
+        value = params[0].get('toBlock') if params and isinstance(params[0], dict) else None
+    else:
+        position = BLOCK_PARAM.get(method)
+        value = params[position] if position is not None and len(params) > position else None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.startswith('0x'):
+        return int(value, 16)
+    return None
+
+
+def is_unknown_block(response):
+    error = response.get('error') if isinstance(response, dict) else None
+    message = str(error.get('message', '') if isinstance(error, dict) else error or '').lower()
+    return any(pattern in message for pattern in UNKNOWN_BLOCK_ERRORS)
+
+
+def post_batch(session, url, batch, timeout=30):
+    response = session.post(url, json=batch, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def send_batch(w3, batch, session=None, timeout=30):
+    """Send a JSON-RPC batch (a list of request dicts) through w3's provider.
+
+    Behind a ProviderPool the batch gets the pool's ranking, health tracking and failover;
+    a plain HTTPProvider gets one POST to its endpoint. Either way the batch is recorded in
+    the RPC metrics. Responses come back in whatever order the node sent them.
+    """
+    started = time.perf_counter()
+    try:
+        if isinstance(w3.provider, ProviderPool):
+            responses = w3.provider.make_batch_request(batch, session=session, timeout=timeout)
+        else:
+            responses = post_batch(session or requests, w3.provider.endpoint_uri, batch, timeout)
+    except Exception:
+        metrics.observe_rpc_batch(batch, time.perf_counter() - started)
+        raise
+    metrics.observe_rpc_batch(batch, time.perf_counter() - started, responses)
+    return responses
+
+
+class Endpoint:
+    def __init__(self, url, provider, ewma_alpha=0.2):
+        self.url = url
+        self.provider = provider
+        self.ewma_alpha = ewma_alpha
+        self.latency = None
+        self.histogram = LatencyHistogram()
+        self.healthy = True
+        self.head = None
+        self.errors = 0
+        self.consecutive_failures = 0
+
+    def record_success(self, seconds):
+        self.histogram.observe(seconds)
+        self.latency = seconds if self.latency is None else (
+            self.ewma_alpha * seconds + (1 - self.ewma_alpha) * self.latency
+        )
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.errors += 1
+        self.consecutive_failures += 1
+
+    def stats(self):
+        return {
+            'url': self.url,
+            'healthy': self.healthy,
+            'head': self.head,
+            'latency': self.latency,
+            'p50': self.histogram.quantile(0.5),
+            'p95': self.histogram.quantile(0.95),
+            'errors': self.errors,
+            'histogram': self.histogram.to_dict()
+        }
+
+
+class ProviderPool(JSONBaseProvider):
+    """web3 provider over several RPC endpoints.
+
+    Reads go to the healthy endpoint with the lowest smoothed latency and fail over to the
+    next one on transport errors. Reads pinned to a block number prefer endpoints whose head
+    has reached it and fail over when a node answers that it does not know the block yet
+    (e.g. "header not found"); eth_call is hedged to a second endpoint when the first has
+    not answered within hedge_after seconds (or its own p95, if larger). Writes fail over
+    but are never duplicated. A background health check marks endpoints that error or lag
+    more than max_lag blocks behind the best head as unhealthy until they recover.
+    """
+
+    def __init__(self, urls, session=None, request_timeout=10, hedge_after=0.25, max_lag=3,
+                 health_interval=10.0, max_failures=3, max_workers=16):
+        super().__init__()
+        if not urls:
+            raise ValueError('ProviderPool needs at least one endpoint')
+        self.endpoints = [
+            Endpoint(url, Web3.HTTPProvider(url, session=session, request_kwargs={'timeout': request_timeout}))
+            for url in urls
+        ]
+        self.session = session
+        self.request_timeout = request_timeout
+        self.hedge_after = hedge_after
+        self.max_lag = max_lag
+        self.health_interval = health_interval
+        self.max_failures = max_failures
+        self.hedges = 0
+        self.failovers = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='rpc')
+        self._stop = threading.Event()
+        self._health_thread = None
+
+    @property
+    def endpoint_uri(self):
+        # Best-ranked endpoint for callers that need a single URL; batches use make_batch_request
+        return self.ranked()[0].url
+
+    def ranked(self, block=None):
+        with self._lock:
+            healthy = [endpoint for endpoint in self.endpoints if endpoint.healthy]
+            # With nothing healthy, trying every endpoint beats failing outright
+            candidates = healthy or list(self.endpoints)
+            # Endpoints without samples yet sort first so they get measured. For a pinned block,
+            # endpoints known to be behind it come last and unchecked ones in between.
+            return sorted(candidates, key=lambda endpoint: (
+                0 if block is None or (endpoint.head is not None and endpoint.head >= block)
+                else 1 if endpoint.head is None else 2,
+                endpoint.latency or 0.0
+            ))
+
+    def make_request(self, method, params):
+        self._ensure_health_checks()
+        if method in READ_METHODS:
+            return self._request(method, params, hedge=method in HEDGED_METHODS)
+        return self._request(method, params, hedge=False)
+
+    def make_batch_request(self, batch, session=None, timeout=None):
+        # Batches are posted to one endpoint at a time in ranked order: no hedging, but a transport
+        # error or a node that does not know a pinned block moves the whole batch to the next one
+        self._ensure_health_checks()
+        blocks = [pinned_block(request['method'], request['params']) for request in batch
+                  if request['method'] in READ_METHODS]
+        block = max((block for block in blocks if block is not None), default=None)
+        errors = []
+        lagging_responses = None
+        for attempt, endpoint in enumerate(self.ranked(block)):
+            if attempt:
+                with self._lock:
+                    self.failovers += 1
+            try:
+                responses = self._send_batch(endpoint, batch, session, timeout)
+            except Exception as e:
+                errors.append(e)
+                continue
+            if block is None or not any(is_unknown_block(response) for response in responses):
+                return responses
+            lagging_responses = responses
+            with self._lock:
+                if endpoint.head is None or endpoint.head >= block:
+                    endpoint.head = block - 1
+        if lagging_responses is not None:
+            return lagging_responses
+        raise errors[-1]
+
+    def _send_batch(self, endpoint, batch, session, timeout):
+        return self._timed(endpoint, lambda: post_batch(
+            session or self.session or requests, endpoint.url, batch, timeout or self.request_timeout
+        ))
+
+    def _send(self, endpoint, method, params):
+        return self._timed(endpoint, lambda: endpoint.provider.make_request(method, params))
+
+    def _timed(self, endpoint, request):
+        started = time.perf_counter()
+        try:
+            response = request()
+        except Exception:
+            with self._lock:
+                endpoint.record_failure()
+                if endpoint.consecutive_failures >= self.max_failures:
+                    endpoint.healthy = False
+            raise
+        with self._lock:
+            endpoint.record_success(time.perf_counter() - started)
+        return response
+
+    def _hedge_delay(self, endpoint):
+        p95 = endpoint.histogram.quantile(0.95)
+        return max(self.hedge_after, p95) if p95 is not None and p95 != float('inf') else self.hedge_after
+
+    def _request(self, method, params, hedge):
+        block = pinned_block(method, params) if method in READ_METHODS else None
+        remaining = self.ranked(block)
+        in_flight = {}
+        errors = []
+        lagging_response = None
+
+        def launch():
+            endpoint = remaining.pop(0)
+            in_flight[self._executor.submit(self._send, endpoint, method, params)] = endpoint
+
+        launch()
+        while in_flight:
+            timeout = None
+            if hedge and remaining:
+                timeout = min(self._hedge_delay(endpoint) for endpoint in in_flight.values())
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Slow answer: race the next-best endpoint instead of waiting it out. The slow
+                # endpoint is known to take at least this long, so rank it accordingly meanwhile.
+                with self._lock:
+                    self.hedges += 1
+                    for endpoint in in_flight.values():
+                        endpoint.latency = max(endpoint.latency or 0.0, timeout)
+                launch()
+                continue
+            for future in done:
+                endpoint = in_flight.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    errors.append(e)
+                else:
+                    if block is None or not is_unknown_block(response):
+                        return response
+                    # The node is behind the pinned block; remember that and ask another one
+                    lagging_response = response
+                    with self._lock:
+                        if endpoint.head is None or endpoint.head >= block:
+                            endpoint.head = block - 1
+                if remaining and not in_flight:
+                    self.failovers += 1
+                    launch()
+        if lagging_response is not None:
+            return lagging_response
+        raise errors[-1]
+
+    def _ensure_health_checks(self):
+        if self.health_interval and self._health_thread is None:
+            with self._lock:
+                if self._health_thread is None:
+                    self._health_thread = threading.Thread(target=self._run_health_checks, name='rpc-health', daemon=True)
+                    self._health_thread.start()
+
+    def _run_health_checks(self):
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+
+    def check_health(self):
+        heads = {}
+        for endpoint in self.endpoints:
+            try:
+                response = self._send(endpoint, 'eth_blockNumber', [])
+                heads[endpoint] = int(response['result'], 16)
+            except Exception:
+                heads[endpoint] = None
+        best = max((head for head in heads.values() if head is not None), default=None)
+        with self._lock:
+            for endpoint, head in heads.items():
+                endpoint.head = head
+                endpoint.healthy = head is not None and best - head <= self.max_lag
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hedges': self.hedges,
+                'failovers': self.failovers,
+                'endpoints': [endpoint.stats() for endpoint in self.endpoints]
+            }
+
+    def shutdown(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,279 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from hexbytes import HexBytes
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+from contract_registry import LRUCache
+from transaction_pipeline import PendingTransaction, TransactionDropped, is_nonce_error
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionReplaced(TransactionDropped):
+    pass
+
+
+class ReceiptTracker:
+    """Resolves receipts for every in-flight transaction from one shared poller thread.
+
+    Each new head is fetched once and its transaction hashes are matched against everything
+    pending, so the RPC cost per block does not grow with the number of waiting callers. A
+    handle resolves once its receipt is `confirmations` blocks deep; it fails when the
+    transaction times out, disappears from the node, or its nonce is mined by another
+    transaction (replacement).
+    """
+
+    # Beyond this many unseen blocks, asking for each pending receipt is cheaper than a block scan
+    MAX_SCAN_BLOCKS = 32
+
+    def __init__(self, w3, nonce_manager=None, confirmations=1, timeout=120, poll_interval=1.0,
+                 max_rebroadcasts=3, history_size=10000, clock=time.monotonic, autostart=True,
+                 on_stuck=None, max_bumps=3):
+        self.w3 = w3
+        self.nonce_manager = nonce_manager
+        self.confirmations = max(confirmations, 1)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.max_rebroadcasts = max_rebroadcasts
+        # on_stuck(pending) may resend a timed-out transaction with higher fees and return
+        # (tx_hash, raw_transaction, transaction) for the replacement, or None to give up
+        self.on_stuck = on_stuck
+        self.max_bumps = max_bumps
+        # With autostart=False nothing polls in the background; the owner calls poll() itself
+        self.autostart = autostart
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._history = LRUCache(history_size)
+        self._last_block = None
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def track(self, tx_hash, nonce=None, raw_transaction=None, sender=None, transaction=None, nonce_manager=None):
+        pending = PendingTransaction(HexBytes(tx_hash), nonce, raw_transaction)
+        pending.future = Future()
+        pending.sender = sender
+        # Per-sender nonce manager when several signers share one tracker
+        pending.nonce_manager = nonce_manager or self.nonce_manager
+        pending.transaction = transaction
+        # Hashes of our own earlier versions of this transaction that fee bumps replaced
+        pending.previous_hashes = []
+        pending.bumps = 0
+        pending.receipt = None
+        pending.rebroadcasts = 0
+        pending.deadline = self._clock() + self.timeout
+        # Checked directly on the next poll in case it was mined before we started watching
+        pending.unchecked = True
+        with self._lock:
+            self._pending[pending.tx_hash] = pending
+            self._history.put(pending.tx_hash, {'status': 'pending'})
+            if self.autostart:
+                self._ensure_thread()
+        self._wakeup.set()
+        return pending
+
+    def get(self, tx_hash):
+        # Handle of a transaction that is still being tracked, None once it has settled
+        with self._lock:
+            return self._pending.get(HexBytes(tx_hash))
+
+    def status(self, tx_hash):
+        tx_hash = HexBytes(tx_hash)
+        with self._lock:
+            state = self._history.get(tx_hash)
+            if state is None:
+                return None
+            state = dict(state, transactionHash=tx_hash.hex())
+            pending = self._pending.get(tx_hash)
+            if pending is not None and pending.receipt is not None and self._last_block is not None:
+                state['confirmations'] = self._last_block - pending.receipt['blockNumber'] + 1
+            return state
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def shutdown(self, wait=True):
+        self._stopped = True
+        self._wakeup.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='receipt-tracker', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            if self.pending_count():
+                try:
+                    self.poll()
+                except Exception:
+                    # A flaky RPC must not kill the poller; the next tick retries
+                    logger.exception('Receipt poll failed; retrying')
+                self._wakeup.wait(self.poll_interval)
+            else:
+                self._wakeup.wait()
+            self._wakeup.clear()
+
+    def poll(self):
+        head = self.w3.eth.block_number
+        with self._lock:
+            pending = list(self._pending.values())
+        if not pending:
+            self._last_block = head
+            return
+
+        self._find_receipts(pending, head)
+        self._last_block = head
+
+        for entry in pending:
+            if entry.receipt is not None:
+                self._check_confirmations(entry, head)
+        self._check_replaced([entry for entry in pending if entry.receipt is None])
+        now = self._clock()
+        for entry in pending:
+            if entry.receipt is None and not entry.future.done() and now >= entry.deadline:
+                self._handle_timeout(entry)
+
+    def _find_receipts(self, pending, head):
+        by_hash = {}
+        for entry in pending:
+            if entry.receipt is None:
+                for tx_hash in [entry.tx_hash] + entry.previous_hashes:
+                    by_hash[tx_hash] = entry
+        unchecked = [entry for entry in pending if entry.receipt is None and entry.unchecked]
+        first_block = head + 1 if self._last_block is None else self._last_block + 1
+
+        if head - first_block + 1 > self.MAX_SCAN_BLOCKS:
+            unchecked = [entry for entry in pending if entry.receipt is None]
+        else:
+            for block_number in range(first_block, head + 1):
+                block = self.w3.eth.get_block(block_number)
+                for tx_hash in block['transactions']:
+                    entry = by_hash.get(HexBytes(tx_hash))
+                    if entry is not None:
+                        self._fetch_receipt(entry)
+
+        for entry in unchecked:
+            entry.unchecked = False
+            if entry.receipt is None:
+                self._fetch_receipt(entry)
+
+    def _fetch_receipt(self, entry):
+        # Whichever of our versions got mined settles the handle
+        entry.receipt = None
+        for tx_hash in [entry.tx_hash] + entry.previous_hashes:
+            try:
+                entry.receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+            self._set_state(entry, {'status': 'mined', 'blockNumber': entry.receipt['blockNumber']})
+            return
+
+    def _check_confirmations(self, entry, head):
+        if head - entry.receipt['blockNumber'] + 1 < self.confirmations:
+            return
+        if self.confirmations > 1:
+            # Make sure the block we saw it in is still canonical before reporting it final
+            included_in = entry.receipt['blockHash']
+            self._fetch_receipt(entry)
+            if entry.receipt is None:
+                self._set_state(entry, {'status': 'pending'})
+                return
+            if entry.receipt['blockHash'] != included_in:
+                return
+        state = 'confirmed' if entry.receipt['status'] == 1 else 'failed'
+        self._finish(entry, {'status': state, 'blockNumber': entry.receipt['blockNumber']}, result=entry.receipt)
+
+    def _check_replaced(self, waiting):
+        mined_counts = {}
+        for entry in waiting:
+            if entry.sender is None or entry.nonce is None or entry.future.done():
+                continue
+            if entry.sender not in mined_counts:
+                mined_counts[entry.sender] = self.w3.eth.get_transaction_count(entry.sender, 'latest')
+            if entry.nonce >= mined_counts[entry.sender]:
+                continue
+            # The nonce is used up; unless our own transaction took it, something replaced it
+            self._fetch_receipt(entry)
+            if entry.receipt is None:
+                self._drop(entry, 'replaced', TransactionReplaced(
+                    f'Nonce {entry.nonce} of transaction {entry.tx_hash.hex()} was mined by another transaction'
+                ))
+
+    def _handle_timeout(self, entry):
+        try:
+            self.w3.eth.get_transaction(entry.tx_hash)
+        except TransactionNotFound:
+            if entry.raw_transaction is not None and entry.rebroadcasts < self.max_rebroadcasts:
+                entry.rebroadcasts += 1
+                entry.deadline = self._clock() + self.timeout
+                self._rebroadcast(entry)
+                return
+            self._drop(entry, 'dropped', TransactionDropped(f'Transaction {entry.tx_hash.hex()} was dropped'))
+            return
+        if self.on_stuck is not None and entry.bumps < self.max_bumps:
+            replacement = self.on_stuck(entry)
+            if replacement is not None:
+                self._replace(entry, *replacement)
+                return
+        self._finish(entry, {'status': 'timeout'}, error=TimeExhausted(
+            f'Transaction {entry.tx_hash.hex()} is not in the chain after {self.timeout} seconds'
+        ))
+
+    def _replace(self, entry, tx_hash, raw_transaction, transaction):
+        tx_hash = HexBytes(tx_hash)
+        with self._lock:
+            self._pending.pop(entry.tx_hash, None)
+            self._history.put(entry.tx_hash, {'status': 'replaced', 'replacedBy': tx_hash.hex()})
+            entry.previous_hashes.append(entry.tx_hash)
+            entry.tx_hash = tx_hash
+            entry.raw_transaction = raw_transaction
+            entry.transaction = transaction
+            entry.bumps += 1
+            entry.rebroadcasts = 0
+            entry.deadline = self._clock() + self.timeout
+            self._pending[tx_hash] = entry
+            self._history.put(tx_hash, {'status': 'pending'})
+
+    def _rebroadcast(self, entry):
+        # The node forgot the transaction; send the same signed payload again to close the nonce gap
+        try:
+            self.w3.eth.send_raw_transaction(entry.raw_transaction)
+        except ValueError as e:
+            if 'already known' in str(e).lower():
+                return
+            if not is_nonce_error(e):
+                self._finish(entry, {'status': 'dropped', 'error': str(e)}, error=e)
+                return
+            self._fetch_receipt(entry)
+            if entry.receipt is None:
+                self._drop(entry, 'replaced', TransactionReplaced(
+                    f'Nonce {entry.nonce} was consumed by another transaction'
+                ))
+
+    def _drop(self, entry, state, error):
+        # Our local nonce counter no longer matches the chain
+        if entry.nonce_manager is not None:
+            entry.nonce_manager.resync()
+        self._finish(entry, {'status': state, 'error': str(error)}, error=error)
+
+    def _set_state(self, entry, state):
+        with self._lock:
+            self._history.put(entry.tx_hash, state)
+
+    def _finish(self, entry, state, result=None, error=None):
+        with self._lock:
+            self._pending.pop(entry.tx_hash, None)
+            self._history.put(entry.tx_hash, state)
+        if error is not None:
+            entry.future.set_exception(error)
+        else:
+            entry.future.set_result(result)
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import threading
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+ROLE_NAMES = ('ADMIN_ROLE', 'STUDENT_ROLE', 'TEACHER_ROLE')
+ROLE_HASHES = {name: HexBytes(Web3.keccak(text=name)) for name in ROLE_NAMES}
+ROLE_HASHES['DEFAULT_ADMIN_ROLE'] = HexBytes(bytes(32))
+# UniversityAccessControlUpgradeable.Role values carried by RoleAssigned
+ASSIGNED_ROLES = {1: ROLE_HASHES['STUDENT_ROLE'], 2: ROLE_HASHES['TEACHER_ROLE'], 3: ROLE_HASHES['ADMIN_ROLE']}
+
+ROLE_GRANTED = HexBytes(Web3.keccak(text='RoleGranted(bytes32,address,address)'))
+ROLE_REVOKED = HexBytes(Web3.keccak(text='RoleRevoked(bytes32,address,address)'))
+ROLE_ASSIGNED = HexBytes(Web3.keccak(text='RoleAssigned(address,uint8)'))
+
+# Writes guarded by onlyRole in the upgradeable contracts
+REQUIRED_ROLES = {
+    'createCourse': 'TEACHER_ROLE',
+    'enrollInCourse': 'STUDENT_ROLE',
+    'recordGrade': 'TEACHER_ROLE',
+    'markAttendance': 'TEACHER_ROLE',
+    'recordGrades': 'TEACHER_ROLE',
+    'markAttendanceBatch': 'TEACHER_ROLE',
+    'createSchedule': 'TEACHER_ROLE',
+    'editSchedule': 'TEACHER_ROLE',
+    'createScheduleAt': 'TEACHER_ROLE',
+    'editScheduleAt': 'TEACHER_ROLE',
+    'assignRole': 'ADMIN_ROLE',
+    'addUser': 'ADMIN_ROLE',
+    'backfillAggregates': 'ADMIN_ROLE',
+    'migrateRecords': 'ADMIN_ROLE',
+    'migrateSchedules': 'ADMIN_ROLE',
+}
+
+
+def required_role(function_name):
+    # Accepts a bare name or a full signature such as 'recordGrade(uint256,address,uint8)'
+    return REQUIRED_ROLES.get(function_name.split('(', 1)[0].strip())
+
+
+def role_hash(role):
+    return ROLE_HASHES[role] if isinstance(role, str) and role in ROLE_HASHES else HexBytes(role)
+
+
+def _topic_address(topic):
+    return Web3.to_checksum_address(HexBytes(topic)[-20:])
+
+
+class RoleCache:
+    """Role membership of every proxy, rebuilt from RoleGranted / RoleRevoked / RoleAssigned logs.
+
+    The first sync replays the history with one eth_getLogs per batch of blocks across all
+    contracts; later syncs only fetch new blocks. Each proxy keeps its own roles, so lookups
+    are keyed by contract address. Until the first sync completes, synced is False and callers
+    should fall back to hasRole on chain.
+    """
+
+    def __init__(self, w3, addresses, start_block=0, batch_size=2000, confirmations=0):
+        self.w3 = w3
+        self.addresses = [Web3.to_checksum_address(address) for address in addresses]
+        self.batch_size = batch_size
+        self.confirmations = confirmations
+        self.next_block = start_block
+        self.synced = False
+        self._members = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def tracks(self, contract_address):
+        return Web3.to_checksum_address(contract_address) in self.addresses
+
+    def has_role(self, contract_address, role, account):
+        key = (Web3.to_checksum_address(contract_address), role_hash(role))
+        with self._lock:
+            return Web3.to_checksum_address(account) in self._members.get(key, ())
+
+    def roles_of(self, account):
+        account = Web3.to_checksum_address(account)
+        role_names = {value: name for name, value in ROLE_HASHES.items()}
+        roles = {}
+        with self._lock:
+            for (contract_address, role), members in self._members.items():
+                if account in members:
+                    roles.setdefault(contract_address, []).append(role_names.get(role, role.hex()))
+        return {address: sorted(held) for address, held in roles.items()}
+
+    def allows(self, contract_address, function_name, account):
+        # None when the cache cannot tell (not synced, unknown contract or unguarded function)
+        required = required_role(function_name)
+        if required is None or not self.synced or not self.tracks(contract_address):
+            return None
+        return self.has_role(contract_address, required, account)
+
+    def apply(self, logs):
+        with self._lock:
+            for log in sorted(logs, key=lambda log: (log['blockNumber'], log['logIndex'])):
+                topics = [HexBytes(topic) for topic in log['topics']]
+                contract_address = Web3.to_checksum_address(log['address'])
+                if topics[0] == ROLE_ASSIGNED:
+                    role = ASSIGNED_ROLES.get(int.from_bytes(HexBytes(log['data'])[-32:], 'big'))
+                    if role is not None:
+                        self._members.setdefault((contract_address, role), set()).add(_topic_address(topics[1]))
+                    continue
+                members = self._members.setdefault((contract_address, HexBytes(topics[1])), set())
+                if topics[0] == ROLE_GRANTED:
+                    members.add(_topic_address(topics[2]))
+                elif topics[0] == ROLE_REVOKED:
+                    members.discard(_topic_address(topics[2]))
+
+    def _log_filter(self, from_block, to_block):
+        return {
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'address': self.addresses,
+            'topics': [[ROLE_GRANTED.hex(), ROLE_REVOKED.hex(), ROLE_ASSIGNED.hex()]]
+        }
+
+    def sync(self):
+        head = self.w3.eth.block_number - self.confirmations
+        while self.next_block <= head:
+            to_block = min(self.next_block + self.batch_size - 1, head)
+            self.apply(self.w3.eth.get_logs(self._log_filter(self.next_block, to_block)))
+            self.next_block = to_block + 1
+        self.synced = True
+        return self.next_block - 1
+
+    async def sync_async(self):
+        # Same as sync() for an AsyncWeb3 client
+        head = await self.w3.eth.block_number - self.confirmations
+        while self.next_block <= head:
+            to_block = min(self.next_block + self.batch_size - 1, head)
+            self.apply(await self.w3.eth.get_logs(self._log_filter(self.next_block, to_block)))
+            self.next_block = to_block + 1
+        self.synced = True
+        return self.next_block - 1
+
+    def start(self, poll_interval=2.0):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, args=(poll_interval,), name='role-cache', daemon=True)
+            self._thread.start()
+
+    def run(self, poll_interval=2.0):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception:
+                logger.exception('Role cache sync failed; retrying')
+            self._stop.wait(poll_interval)
+
+    async def run_async(self, poll_interval=2.0):
+        while not self._stop.is_set():
+            try:
+                await self.sync_async()
+            except Exception:
+                logger.exception('Role cache sync failed; retrying')
+            await asyncio.sleep(poll_interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,230 @@
+import asyncio
+import itertools
+import sqlite3
+import threading
+
+from transaction_pipeline import AsyncNonceManager, NonceManager
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS nonces (
+    address TEXT PRIMARY KEY,
+    next_nonce INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS released_nonces (
+    address TEXT NOT NULL,
+    nonce INTEGER NOT NULL,
+    PRIMARY KEY (address, nonce)
+);
+'''
+
+
+class NonceLockService:
+    """Nonce allocation shared by every process that opens the same SQLite file.
+
+    Each reservation runs in a BEGIN IMMEDIATE transaction, which takes SQLite's write lock,
+    so replicas mounting the same volume never hand out the same nonce twice.
+    """
+
+    def __init__(self, db_path, timeout=30):
+        self.db_path = db_path
+        self.db = sqlite3.connect(db_path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        if db_path != ':memory:':
+            self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+
+    def reserve(self, address, chain_nonce):
+        # chain_nonce() is only called the first time an address is seen
+        address = address.lower()
+        with self._lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.db.execute(
+                    'SELECT MIN(nonce) FROM released_nonces WHERE address = ?', (address,)
+                ).fetchone()
+                if row[0] is not None:
+                    nonce = row[0]
+                    self.db.execute('DELETE FROM released_nonces WHERE address = ? AND nonce = ?', (address, nonce))
+                else:
+                    row = self.db.execute('SELECT next_nonce FROM nonces WHERE address = ?', (address,)).fetchone()
+                    nonce = row[0] if row else chain_nonce()
+                    self.db.execute(
+                        'INSERT OR REPLACE INTO nonces (address, next_nonce) VALUES (?, ?)', (address, nonce + 1)
+                    )
+                self.db.execute('COMMIT')
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+            return nonce
+
+    def release(self, address, nonce):
+        address = address.lower()
+        with self._lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.db.execute('SELECT next_nonce FROM nonces WHERE address = ?', (address,)).fetchone()
+                if row is not None and nonce < row[0]:
+                    self.db.execute(
+                        'INSERT OR IGNORE INTO released_nonces (address, nonce) VALUES (?, ?)', (address, nonce)
+                    )
+                self.db.execute('COMMIT')
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+
+    def resync(self, address, chain_nonce):
+        # Only ever moves forward: another replica may hold nonces above the node's pending count
+        # that it has reserved but not broadcast yet. Released nonces the chain has passed are dropped
+        address = address.lower()
+        with self._lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.db.execute('SELECT next_nonce FROM nonces WHERE address = ?', (address,)).fetchone()
+                next_nonce = max(row[0], chain_nonce) if row else chain_nonce
+                self.db.execute(
+                    'INSERT OR REPLACE INTO nonces (address, next_nonce) VALUES (?, ?)', (address, next_nonce)
+                )
+                self.db.execute(
+                    'DELETE FROM released_nonces WHERE address = ? AND nonce < ?', (address, chain_nonce)
+                )
+                self.db.execute('COMMIT')
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+            return next_nonce
+
+
+class SharedNonceManager:
+    """NonceManager interface backed by a NonceLockService instead of process memory."""
+
+    def __init__(self, w3, address, lock_service):
+        self.w3 = w3
+        self.address = address
+        self.lock_service = lock_service
+
+    def _pending_count(self):
+        return self.w3.eth.get_transaction_count(self.address, 'pending')
+
+    def next_nonce(self):
+        return self.lock_service.reserve(self.address, self._pending_count)
+
+    def release(self, nonce):
+        self.lock_service.release(self.address, nonce)
+
+    def resync(self):
+        return self.lock_service.resync(self.address, self._pending_count())
+
+
+class AsyncSharedNonceManager:
+    """AsyncNonceManager interface backed by a NonceLockService; SQLite work runs in a thread."""
+
+    def __init__(self, w3, address, lock_service):
+        self.w3 = w3
+        self.address = address
+        self.lock_service = lock_service
+        self._chain_nonce = None
+
+    async def next_nonce(self):
+        # The pending count is only needed before this process's first reservation
+        if self._chain_nonce is None:
+            self._chain_nonce = await self.w3.eth.get_transaction_count(self.address, 'pending')
+        chain_nonce = self._chain_nonce
+        return await asyncio.to_thread(self.lock_service.reserve, self.address, lambda: chain_nonce)
+
+    async def release(self, nonce):
+        await asyncio.to_thread(self.lock_service.release, self.address, nonce)
+
+    async def resync(self):
+        self._chain_nonce = await self.w3.eth.get_transaction_count(self.address, 'pending')
+        return await asyncio.to_thread(self.lock_service.resync, self.address, self._chain_nonce)
+
+
+class Signer:
+    def __init__(self, account, nonce_manager):
+        self.account = account
+        self.nonce_manager = nonce_manager
+        self.in_flight = 0
+
+    @property
+    def address(self):
+        return self.account.address
+
+    @property
+    def key(self):
+        return self.account.key
+
+
+class SignerPool:
+    """Spreads writes over several authorized accounts, each with its own nonce sequence.
+
+    acquire() hands out the signer with the fewest transactions in flight; the caller
+    calls done() once the transaction has settled (or failed to send).
+    """
+
+    nonce_manager_class = NonceManager
+    shared_nonce_manager_class = SharedNonceManager
+
+    def __init__(self, w3, private_keys, lock_service=None):
+        if not private_keys:
+            raise ValueError('SignerPool needs at least one private key')
+        self.w3 = w3
+        self.lock_service = lock_service
+        self._lock = threading.Lock()
+        self._order = itertools.count()
+        self.signers = []
+        for private_key in private_keys:
+            account = w3.eth.account.from_key(private_key)
+            if lock_service is not None:
+                nonce_manager = self.shared_nonce_manager_class(w3, account.address, lock_service)
+            else:
+                nonce_manager = self.nonce_manager_class(w3, account.address)
+            self.signers.append(Signer(account, nonce_manager))
+        self._by_address = {signer.address.lower(): signer for signer in self.signers}
+        self._last_used = {signer.address: -1 for signer in self.signers}
+
+    @property
+    def primary(self):
+        return self.signers[0]
+
+    def acquire(self, address=None):
+        with self._lock:
+            # Least loaded first; among equals the one idle the longest. A given address pins the signer
+            if address is not None:
+                signer = self._by_address[address.lower()]
+            else:
+                signer = min(self.signers, key=lambda s: (s.in_flight, self._last_used[s.address]))
+            signer.in_flight += 1
+            self._last_used[signer.address] = next(self._order)
+            return signer
+
+    def done(self, signer):
+        with self._lock:
+            signer.in_flight = max(signer.in_flight - 1, 0)
+
+    def get(self, address):
+        return self._by_address.get(address.lower())
+
+    def unauthorized(self, access_control, roles):
+        # Addresses holding none of the given role hashes; their writes would revert
+        return [
+            signer.address for signer in self.signers
+            if not any(access_control.functions.hasRole(role, signer.address).call() for role in roles)
+        ]
+
+    def stats(self):
+        with self._lock:
+            return {signer.address: signer.in_flight for signer in self.signers}
+
+
+class AsyncSignerPool(SignerPool):
+    """SignerPool for AsyncWeb3 clients; next_nonce(), release() and resync() are awaited."""
+
+    nonce_manager_class = AsyncNonceManager
+    shared_nonce_manager_class = AsyncSharedNonceManager
+
+    async def unauthorized(self, access_control, roles):
+        return [
+            signer.address for signer in self.signers
+            if not any([await access_control.functions.hasRole(role, signer.address).call() for role in roles])
+        ]
@@ -0,0 +1,169 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from eth_abi import abi as eth_abi
+from eth_utils import function_signature_to_4byte_selector
+from hexbytes import HexBytes
+from web3._utils.abi import get_abi_input_types
+from web3.exceptions import ContractLogicError
+
+from provider_pool import send_batch
+
+ERROR_SELECTOR = HexBytes('0x08c379a0')
+PANIC_SELECTOR = HexBytes('0x4e487b71')
+PANIC_REASONS = {
+    0x01: 'assertion failed',
+    0x11: 'arithmetic overflow or underflow',
+    0x12: 'division by zero',
+    0x21: 'invalid enum value',
+    0x31: 'pop() on an empty array',
+    0x32: 'array index out of bounds',
+    0x41: 'out of memory',
+}
+
+
+class SimulationFailed(ContractLogicError):
+    """Raised before signing when the pre-flight call reverts."""
+
+    def __init__(self, reason, data=None):
+        super().__init__(f'execution reverted: {reason}', data)
+        self.reason = reason
+
+
+def decode_revert(data, abi=None):
+    """Human-readable reason from revert data: Error(string), Panic(uint256) or a custom error in abi."""
+    data = HexBytes(data or b'')
+    if len(data) < 4:
+        return 'execution reverted'
+    selector, payload = data[:4], data[4:]
+    try:
+        if selector == ERROR_SELECTOR:
+            return eth_abi.decode(['string'], payload)[0]
+        if selector == PANIC_SELECTOR:
+            code = eth_abi.decode(['uint256'], payload)[0]
+            return f'panic 0x{code:02x}: {PANIC_REASONS.get(code, "unknown panic")}'
+        for entry in abi or []:
+            if entry.get('type') != 'error':
+                continue
+            types = get_abi_input_types(entry)
+            if function_signature_to_4byte_selector(f"{entry['name']}({','.join(types)})") == selector:
+                values = eth_abi.decode(types, payload)
+                return f"{entry['name']}({', '.join(_format_arg(value) for value in values)})"
+    except Exception:
+        # Malformed payload: fall through to the raw data
+        pass
+    return f'execution reverted: {data.hex()}'
+
+
+def _format_arg(value):
+    return HexBytes(value).hex() if isinstance(value, bytes) else str(value)
+
+
+def _error_data(error):
+    # Geth/anvil put revert data in error.data; Hardhat nests it as error.data.data
+    data = error.get('data')
+    if isinstance(data, dict):
+        data = data.get('data')
+    return data if isinstance(data, str) and data.startswith('0x') else None
+
+
+class Simulator:
+    """Runs writes as eth_call at the pending block to learn their outcome without sending them.
+
+    simulate() checks one call through web3; simulate_many() sends JSON-RPC batches of
+    eth_call with the real sender (Multicall3 would change msg.sender and break role checks),
+    several batches in parallel. Rows are simulated independently against the same state, so
+    a batch that only fails in combination (e.g. the last seat in a course) is not caught.
+    """
+
+    def __init__(self, w3, session=None, block_identifier='pending', batch_size=200, max_workers=4):
+        self.w3 = w3
+        self.block_identifier = block_identifier
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self._session = session
+        self._request_ids = itertools.count(1)
+
+    def simulate(self, contract_function, sender):
+        try:
+            result = contract_function.call({'from': sender}, block_identifier=self.block_identifier)
+        except ContractLogicError as e:
+            return _reverted(e, contract_function.contract_abi)
+        return {'ok': True, 'result': result}
+
+    def check(self, contract_function, sender):
+        return _checked(self.simulate(contract_function, sender))
+
+    def simulate_many(self, calls, sender):
+        # calls: list of (contract, function_name, args); outcomes come back in the same order
+        calls = list(calls)
+        chunks = [calls[start:start + self.batch_size] for start in range(0, len(calls), self.batch_size)]
+        if len(chunks) <= 1:
+            return self._simulate_batch(chunks[0], sender) if chunks else []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return [outcome for outcomes in executor.map(lambda chunk: self._simulate_batch(chunk, sender), chunks)
+                    for outcome in outcomes]
+
+    def _simulate_batch(self, calls, sender):
+        block_identifier = self.block_identifier
+        if isinstance(block_identifier, int):
+            block_identifier = hex(block_identifier)
+        batch = []
+        for contract, function_name, args in calls:
+            batch.append({
+                'jsonrpc': '2.0',
+                'id': next(self._request_ids),
+                'method': 'eth_call',
+                'params': [
+                    {'from': sender, 'to': contract.address, 'data': contract.encodeABI(fn_name=function_name, args=list(args))},
+                    block_identifier
+                ]
+            })
+        # Batch responses may arrive in any order
+        by_id = {item['id']: item for item in send_batch(self.w3, batch, self._get_session())}
+        outcomes = []
+        for request, (contract, _, _) in zip(batch, calls):
+            item = by_id.get(request['id'], {'error': {'message': 'missing response'}})
+            if 'error' not in item:
+                outcomes.append({'ok': True, 'result': item['result']})
+                continue
+            data = _error_data(item['error'])
+            reason = decode_revert(data, contract.abi) if data else _strip_prefix(item['error'].get('message', ''))
+            outcomes.append({'ok': False, 'reason': reason, 'data': data})
+        return outcomes
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
+
+
+class AsyncSimulator(Simulator):
+    """Single-call simulate() and check() for AsyncWeb3 contract functions."""
+
+    async def simulate(self, contract_function, sender):
+        try:
+            result = await contract_function.call({'from': sender}, block_identifier=self.block_identifier)
+        except ContractLogicError as e:
+            return _reverted(e, contract_function.contract_abi)
+        return {'ok': True, 'result': result}
+
+    async def check(self, contract_function, sender):
+        return _checked(await self.simulate(contract_function, sender))
+
+
+def _reverted(error, abi):
+    data = error.data if isinstance(error.data, str) else None
+    reason = decode_revert(data, abi) if data else _strip_prefix(error.message or str(error))
+    return {'ok': False, 'reason': reason, 'data': data}
+
+
+def _checked(outcome):
+    if not outcome['ok']:
+        raise SimulationFailed(outcome['reason'], outcome['data'])
+    return outcome['result']
+
+
+def _strip_prefix(message):
+    return message.split('execution reverted: ', 1)[-1] or 'execution reverted'
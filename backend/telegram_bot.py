@@ -1,15 +1,106 @@
+import asyncio
+import functools
+import logging
 import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import aiohttp
 from telegram import Update
-from telegram.ext import Updater, CommandHandler, CallbackContext
-from contract_interaction import get_contract_instance, call_contract_function, send_transaction
+from telegram.ext import Application, CommandHandler, ContextTypes
+
+from abi_bundle import load_abis
+from asgi_api import (
+    w3, registry, get_contract_instance, get_signer_pool, call_contract_function, send_transaction,
+    rebroadcast_transaction
+)
+from contract_interaction import load_deployed_addresses
+from event_feed import EVENT_KINDS, EventFeed, SubscriptionStore
+from outbox import FAILED, Outbox, OutboxFull
+from role_cache import RoleCache, required_role
+
+logger = logging.getLogger(__name__)
 
 # Получите токен вашего бота из переменной окружения
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 
-def start(update: Update, context: CallbackContext) -> None:
-    update.message.reply_text('Привет! Я ваш бот для взаимодействия с Ethereum контрактами.')
+# Сколько обновлений обрабатывается одновременно: медленный RPC одного пользователя не блокирует остальных
+CONCURRENT_UPDATES = int(os.getenv('BOT_CONCURRENT_UPDATES', '64'))
+RECEIPT_TIMEOUT = float(os.getenv('TX_RECEIPT_TIMEOUT', '120'))
+
+EVENT_TITLES = {'grades': 'оценки', 'enrollments': 'записи на курсы', 'schedules': 'расписание'}
+JOB_STATES = {'queued': 'в очереди', 'running': 'отправляется', 'sent': 'отправлена', 'failed': 'не выполнена'}
+
+
+class RateLimiter:
+    """Token bucket на пользователя: `burst` запросов сразу, дальше `rate` в секунду.
+
+    Корзины упорядочены по последнему обращению; корзина, простоявшая burst / rate секунд, снова
+    полна и ничем не отличается от новой, поэтому такие корзины удаляются.
+    """
+
+    def __init__(self, rate=1.0, burst=5, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._buckets = OrderedDict()
+
+    def allow(self, key):
+        now = self.clock()
+        self._evict_idle(now)
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        allowed = tokens >= 1
+        self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        return allowed
+
+    def _evict_idle(self, now):
+        refill_time = self.burst / self.rate
+        while self._buckets:
+            key, (_, updated) = next(iter(self._buckets.items()))
+            if now - updated < refill_time:
+                break
+            del self._buckets[key]
+
+    def retry_after(self, key):
+        tokens, _ = self._buckets.get(key, (self.burst, None))
+        return max(0.0, (1 - tokens) / self.rate)
+
+
+rate_limiter = RateLimiter(
+    rate=float(os.getenv('BOT_RATE_LIMIT', '1.0')),
+    burst=int(os.getenv('BOT_RATE_BURST', '5'))
+)
+# Подписки хранятся в файле и переживают перезапуск; BOT_SUBSCRIPTIONS_DB=:memory: держит их только в памяти
+SUBSCRIPTIONS_DB = os.getenv('BOT_SUBSCRIPTIONS_DB', str(Path(__file__).parent / 'telegram-subscriptions.db'))
+# Заполняется в post_init
+subscriptions = None
+# Заполняется в post_init; до первой синхронизации проверка ролей уходит в сам контракт
+role_cache = None
+# Заполняется в post_init при заданном BOT_OUTBOX_DB; без него /send отправляет транзакцию сразу
+outbox = None
+
+
+def rate_limited(handler):
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        user_id = update.effective_user.id if update.effective_user else None
+        if user_id is not None and not rate_limiter.allow(user_id):
+            await update.message.reply_text(
+                f'Слишком много запросов, повторите через {rate_limiter.retry_after(user_id):.0f} с'
+            )
+            return
+        await handler(update, context)
+    return wrapper
 
-def call_function(update: Update, context: CallbackContext) -> None:
+
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    await update.message.reply_text('Привет! Я ваш бот для взаимодействия с Ethereum контрактами.')
+
+
+@rate_limited
+async def call_function(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     try:
         contract_address = context.args[0]
         abi = context.args[1]
@@ -17,12 +108,25 @@ def call_function(update: Update, context: CallbackContext) -> None:
         args = context.args[3:]
 
         contract = get_contract_instance(contract_address, abi)
-        result = call_contract_function(contract, function_name, *args)
-        update.message.reply_text(f'Результат: {result}')
+        result = await call_contract_function(contract, function_name, *args)
+        await update.message.reply_text(f'Результат: {result}')
+    except Exception as e:
+        await update.message.reply_text(f'Ошибка: {e}')
+
+
+async def notify_receipt(bot, chat_id, txn_hash):
+    # Квитанция ждётся в фоне, а результат приходит отдельным сообщением
+    try:
+        receipt = await w3.eth.wait_for_transaction_receipt(txn_hash, timeout=RECEIPT_TIMEOUT)
+        status = 'выполнена' if receipt['status'] == 1 else 'отклонена'
+        text = f'Транзакция {txn_hash} {status} в блоке {receipt["blockNumber"]}'
     except Exception as e:
-        update.message.reply_text(f'Ошибка: {e}')
+        text = f'Не удалось получить квитанцию для {txn_hash}: {e}'
+    await bot.send_message(chat_id, text)
 
-def send_transaction_command(update: Update, context: CallbackContext) -> None:
+
+@rate_limited
+async def send_transaction_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     try:
         contract_address = context.args[0]
         abi = context.args[1]
@@ -30,21 +134,234 @@ def send_transaction_command(update: Update, context: CallbackContext) -> None:
         args = context.args[3:]
 
         contract = get_contract_instance(contract_address, abi)
-        txn_hash = send_transaction(contract, function_name, *args)
-        update.message.reply_text(f'Транзакция отправлена с хэшем: {txn_hash}')
+        # Селектор вида 0x1234abcd заменяется именем функции, иначе проверка роли его не узнает
+        function_name = registry.resolve_function_name(contract, function_name)
+        # Запись, на которую ни у одного подписанта нет роли, отклоняется локально, без обращения к узлу
+        if role_cache is not None and all(
+            role_cache.allows(contract.address, function_name, signer.address) is False
+            for signer in get_signer_pool().signers
+        ):
+            await update.message.reply_text(f'Ошибка: у отправителя нет роли {required_role(function_name)}')
+            return
+        if outbox is not None:
+            # Заявка сохраняется на диск и отправляется воркером; повторная доставка того же сообщения не создаёт дубль
+            job = outbox.enqueue(
+                contract.address, abi, function_name, args,
+                idempotency_key=f'telegram:{update.effective_chat.id}:{update.message.message_id}',
+                meta={'chat_id': update.effective_chat.id}
+            )
+            await update.message.reply_text(f'Заявка #{job.id} принята, статус: /job {job.id}')
+            return
+        txn_hash = await send_transaction(contract, function_name, *args)
+        await update.message.reply_text(f'Транзакция отправлена с хэшем: {txn_hash}')
+        context.application.create_task(notify_receipt(context.bot, update.effective_chat.id, txn_hash))
+    except OutboxFull:
+        await update.message.reply_text('Очередь заявок переполнена, повторите позже')
     except Exception as e:
-        update.message.reply_text(f'Ошибка: {e}')
+        await update.message.reply_text(f'Ошибка: {e}')
+
+
+async def submit_job(job):
+    # Транзакция, подписанная до перезапуска, отправляется повторно, а не подписывается заново
+    if job.raw_transaction is not None:
+        tx_hash = await rebroadcast_transaction(job.lane, job.raw_transaction, job.tx_hash)
+        if tx_hash is not None:
+            return tx_hash
+        # Её nonce занят другой транзакцией, поэтому заявка подписывается заново
+        outbox.clear_signed(job.id)
+    contract = get_contract_instance(job.contract_address, job.abi)
+    # Заявки одного подписанта уходят по очереди с его nonce
+    return await send_transaction(
+        contract, job.function_name, *job.args,
+        sender=job.lane,
+        on_signed=lambda tx_hash, raw_transaction, nonce: outbox.record_signed(job.id, tx_hash, raw_transaction, nonce)
+    )
 
-def main():
-    updater = Updater(TELEGRAM_TOKEN)
-    dispatcher = updater.dispatcher
 
-    dispatcher.add_handler(CommandHandler("start", start))
-    dispatcher.add_handler(CommandHandler("call", call_function))
-    dispatcher.add_handler(CommandHandler("send", send_transaction_command))
+async def job_finished(application, job):
+    chat_id = job.meta.get('chat_id')
+    if chat_id is None:
+        return
+    if job.state == FAILED:
+        await application.bot.send_message(chat_id, f'Заявка #{job.id} не выполнена: {job.error}')
+        return
+    await application.bot.send_message(chat_id, f'Заявка #{job.id}: транзакция отправлена с хэшем {job.tx_hash}')
+    application.create_task(notify_receipt(application.bot, chat_id, job.tx_hash))
+
+
+async def job_status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    # /job <id>; чат видит только свои заявки
+    if outbox is None:
+        await update.message.reply_text('Очередь заявок отключена')
+        return
+    try:
+        job = outbox.get(int(context.args[0]))
+    except (IndexError, ValueError):
+        await update.message.reply_text('Ошибка: укажите номер заявки')
+        return
+    if job is None or job.meta.get('chat_id') != update.effective_chat.id:
+        await update.message.reply_text('Заявка не найдена')
+        return
+    text = f'Заявка #{job.id}: {JOB_STATES[job.state]}, попыток: {job.attempts}'
+    if job.tx_hash:
+        text += f', хэш {job.tx_hash}'
+    if job.error:
+        text += f', ошибка: {job.error}'
+    await update.message.reply_text(text)
 
-    updater.start_polling()
-    updater.idle()
+
+def parse_subscription_args(args):
+    kind = args[0] if args else None
+    if kind is not None and kind not in EVENT_KINDS:
+        raise ValueError(f'неизвестный тип событий {kind}, доступны: {", ".join(EVENT_KINDS)}')
+    course_id = int(args[1]) if len(args) > 1 else None
+    return kind, course_id
+
+
+async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    # /subscribe grades|enrollments|schedules [course_id]
+    try:
+        kind, course_id = parse_subscription_args(context.args)
+        if kind is None:
+            raise ValueError(f'укажите тип событий: {", ".join(EVENT_KINDS)}')
+        subscriptions.subscribe(update.effective_chat.id, kind, course_id)
+        scope = f'курса {course_id}' if course_id is not None else 'всех курсов'
+        await update.message.reply_text(f'Подписка оформлена: {EVENT_TITLES[kind]} для {scope}')
+    except ValueError as e:
+        await update.message.reply_text(f'Ошибка: {e}')
+
+
+async def unsubscribe(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    # Без аргументов снимает все подписки чата
+    try:
+        kind, course_id = parse_subscription_args(context.args)
+        removed = subscriptions.unsubscribe(update.effective_chat.id, kind, course_id)
+        await update.message.reply_text(f'Удалено подписок: {removed}')
+    except ValueError as e:
+        await update.message.reply_text(f'Ошибка: {e}')
+
+
+async def list_subscriptions(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    rows = subscriptions.list(update.effective_chat.id)
+    if not rows:
+        await update.message.reply_text('Подписок нет')
+        return
+    lines = [
+        f'{EVENT_TITLES[kind]}: {"курс " + str(course_id) if course_id is not None else "все курсы"}'
+        for kind, course_id in rows
+    ]
+    await update.message.reply_text('\n'.join(lines))
+
+
+def format_event(kind, args):
+    if kind == 'grades':
+        return f'Новая оценка: курс {args["courseId"]}, студент {args["student"]}, оценка {args["grade"]}'
+    if kind == 'enrollments':
+        return f'Запись на курс {args["courseId"]}: студент {args["student"]}'
+    return f'Расписание курса {args["courseId"]}: {args["date"]} {args["time"]}'
+
+
+async def broadcast_event(bot, kind, args, log=None):
+    # Одно событие рассылается всем подписанным чатам параллельно
+    chat_ids = subscriptions.chats_for(kind, args['courseId'])
+    text = format_event(kind, args)
+    results = await asyncio.gather(*(bot.send_message(chat_id, text) for chat_id in chat_ids), return_exceptions=True)
+    for chat_id, result in zip(chat_ids, results):
+        if isinstance(result, Exception):
+            logger.warning('Не удалось отправить событие в чат %s: %s', chat_id, result)
+
+
+def make_event_feed(addresses):
+    abis = load_abis()
+    contracts = {
+        kind: (get_contract_instance(addresses[address_key], abis[abi_key]), event_name)
+        for kind, (abi_key, address_key, event_name) in EVENT_KINDS.items()
+    }
+    return EventFeed(
+        w3,
+        contracts,
+        poll_interval=float(os.getenv('BOT_EVENT_POLL_INTERVAL', '2.0')),
+        confirmations=int(os.getenv('BOT_EVENT_CONFIRMATIONS', '0'))
+    )
+
+
+async def post_init(application: Application) -> None:
+    global subscriptions, role_cache, outbox
+    subscriptions = SubscriptionStore(SUBSCRIPTIONS_DB)
+
+    # Один пул keep-alive соединений на все RPC-запросы бота
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=int(os.getenv('WEB3_HTTP_POOL_SIZE', '32')), keepalive_timeout=30),
+        timeout=aiohttp.ClientTimeout(total=30)
+    )
+    await w3.provider.cache_async_session(session)
+    application.bot_data['http_session'] = session
+
+    # Один общий фильтр логов для всех подписок вместо опроса каждым пользователем
+    addresses = load_deployed_addresses()
+    feed = make_event_feed(addresses)
+    application.bot_data['event_feed'] = feed
+    application.create_task(feed.run(lambda kind, args, log: broadcast_event(application.bot, kind, args, log)))
+
+    # Роли всех прокси восстанавливаются из событий и дальше обновляются по новым блокам
+    role_cache = RoleCache(
+        w3,
+        [address for name, address in addresses.items() if name.endswith('Proxy')],
+        start_block=int(os.getenv('ROLE_CACHE_START_BLOCK', '0')),
+        confirmations=int(os.getenv('ROLE_CACHE_CONFIRMATIONS', '0'))
+    )
+    application.create_task(role_cache.run_async(float(os.getenv('ROLE_CACHE_POLL_INTERVAL', '2.0'))))
+
+    # Заявки /send переживают перезапуск: незавершённые при старте ставятся в очередь снова
+    if os.getenv('BOT_OUTBOX_DB'):
+        outbox = Outbox(
+            os.getenv('BOT_OUTBOX_DB'),
+            [signer.address for signer in get_signer_pool().signers],
+            max_pending=int(os.getenv('OUTBOX_MAX_PENDING', '10000')),
+            max_attempts=int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5')),
+            retry_delay=float(os.getenv('OUTBOX_RETRY_DELAY', '2.0'))
+        )
+        application.create_task(outbox.run_async(
+            submit_job,
+            workers=int(os.getenv('OUTBOX_WORKERS', '4')),
+            on_finished=lambda job: job_finished(application, job)
+        ))
+
+
+async def post_shutdown(application: Application) -> None:
+    feed = application.bot_data.get('event_feed')
+    if feed is not None:
+        feed.stop()
+    if role_cache is not None:
+        role_cache.stop()
+    if outbox is not None:
+        outbox.stop()
+    session = application.bot_data.get('http_session')
+    if session is not None:
+        await session.close()
+
+
+def build_application(token=TELEGRAM_TOKEN):
+    application = (
+        Application.builder()
+        .token(token)
+        .concurrent_updates(CONCURRENT_UPDATES)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
+    application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("call", call_function))
+    application.add_handler(CommandHandler("send", send_transaction_command))
+    application.add_handler(CommandHandler("subscribe", subscribe))
+    application.add_handler(CommandHandler("unsubscribe", unsubscribe))
+    application.add_handler(CommandHandler("subscriptions", list_subscriptions))
+    application.add_handler(CommandHandler("job", job_status))
+    return application
+
+
+def main():
+    build_application().run_polling()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,57 @@
+import json
+import os
+
+import pytest
+
+from abi_bundle import abi_hash, build_bundle, is_fresh, load_abis
+
+CONTRACTS = {'GradeManagement': 'GradeManagement.sol/GradeManagement.json'}
+ABI = [{'type': 'function', 'name': 'getGrades', 'inputs': [], 'outputs': [], 'stateMutability': 'view'}]
+
+
+@pytest.fixture
+def artifacts_dir(tmp_path):
+    artifact = tmp_path / 'artifacts' / CONTRACTS['GradeManagement']
+    artifact.parent.mkdir(parents=True)
+    artifact.write_text(json.dumps({'abi': ABI, 'bytecode': '0x' + '00' * 1000, 'linkReferences': {}}))
+    return tmp_path / 'artifacts'
+
+
+def test_bundle_keeps_only_abi_and_hash(artifacts_dir, tmp_path):
+    bundle_path = tmp_path / 'abi-bundle.json'
+
+    build_bundle(artifacts_dir, bundle_path, CONTRACTS)
+
+    bundle = json.loads(bundle_path.read_text())
+    assert bundle['contracts'] == {'GradeManagement': {'hash': abi_hash(ABI), 'abi': ABI}}
+    assert is_fresh(artifacts_dir, bundle_path, CONTRACTS)
+
+
+def test_load_abis_builds_missing_bundle(artifacts_dir, tmp_path):
+    bundle_path = tmp_path / 'abi-bundle.json'
+
+    assert load_abis(artifacts_dir, bundle_path, CONTRACTS) == {'GradeManagement': ABI}
+    assert bundle_path.exists()
+
+
+def test_stale_bundle_is_rebuilt(artifacts_dir, tmp_path):
+    bundle_path = tmp_path / 'abi-bundle.json'
+    build_bundle(artifacts_dir, bundle_path, CONTRACTS)
+
+    # Recompile: the artifact now has a newer ABI and mtime than the bundle
+    new_abi = ABI + [{'type': 'event', 'name': 'GradeRecorded', 'inputs': [], 'anonymous': False}]
+    artifact = artifacts_dir / CONTRACTS['GradeManagement']
+    artifact.write_text(json.dumps({'abi': new_abi}))
+    stat = os.stat(bundle_path)
+    os.utime(artifact, (stat.st_atime, stat.st_mtime + 10))
+
+    assert not is_fresh(artifacts_dir, bundle_path, CONTRACTS)
+    assert load_abis(artifacts_dir, bundle_path, CONTRACTS) == {'GradeManagement': new_abi}
+
+
+def test_bundle_used_without_artifacts(artifacts_dir, tmp_path):
+    bundle_path = tmp_path / 'abi-bundle.json'
+    build_bundle(artifacts_dir, bundle_path, CONTRACTS)
+    (artifacts_dir / CONTRACTS['GradeManagement']).unlink()
+
+    assert load_abis(artifacts_dir, bundle_path, CONTRACTS) == {'GradeManagement': ABI}
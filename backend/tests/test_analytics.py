@@ -0,0 +1,132 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+import analytics
+from analytics import (
+    CourseData, attendance_grade_correlation, course_statistics, group_percentiles, report, student_gpa
+)
+from event_indexer import SCHEMA
+
+ALICE = '0x' + '11' * 20
+BOB = '0x' + '22' * 20
+CAROL = '0x' + '33' * 20
+
+GRADES = [
+    (1, ALICE, 90, 0), (1, BOB, 70, 0), (1, CAROL, 50, 0), (1, ALICE, 100, 0),
+    (2, ALICE, 80, 0), (2, BOB, 60, 0),
+    (7, CAROL, 40, 0),
+]
+ATTENDANCE = [
+    (1, ALICE, True), (1, ALICE, True), (1, BOB, True), (1, BOB, False), (1, CAROL, False),
+    (2, ALICE, True), (2, BOB, False),
+]
+
+
+def test_group_percentiles_match_numpy_for_every_group():
+    rng = np.random.default_rng(7)
+    groups = rng.integers(0, 50, size=5000)
+    values = rng.integers(0, 101, size=5000).astype(np.float64)
+    percentiles = (0, 10, 33.3, 50, 90, 100)
+    result = group_percentiles(groups, values, 52, percentiles)
+    for group in range(50):
+        assert result[group] == pytest.approx(np.percentile(values[groups == group], percentiles))
+    assert np.isnan(result[50:]).all()
+
+
+def test_course_statistics_are_exact():
+    data = CourseData.from_records(GRADES, ATTENDANCE, course_ids=[1, 2, 3])
+    stats = course_statistics(data, percentiles=(25, 75), bins=10)
+
+    assert stats['course_id'].tolist() == [1, 2, 3]
+    assert stats['grade_count'].tolist() == [4, 2, 0]
+    assert stats['mean'][:2].tolist() == [77.5, 70.0]
+    assert stats['median'][:2].tolist() == [80.0, 70.0]
+    assert stats['min'][0] == 50 and stats['max'][0] == 100
+    assert stats['percentiles'][0].tolist() == [65.0, 92.5]
+    assert stats['std'][1] == 10.0
+    assert np.isnan(stats['mean'][2])
+    # Course 7 was not asked for
+    assert stats['histogram'].sum() == 6
+    assert stats['histogram'][0, 9] == 2
+    assert stats['attendance_rate'][:2].tolist() == [60.0, 50.0]
+
+
+def test_student_gpa_weights_each_course_once():
+    data = CourseData.from_records(GRADES, ATTENDANCE)
+    gpa = student_gpa(data, scale=4.0)
+    by_student = dict(zip(gpa['student'], zip(gpa['course_count'], gpa['average'], gpa['gpa'])))
+
+    assert by_student[ALICE] == (2, 87.5, 3.5)
+    assert by_student[BOB] == (2, 65.0, 2.6)
+    assert by_student[CAROL] == (2, 45.0, 1.8)
+
+
+def test_attendance_grade_correlation():
+    data = CourseData.from_records(GRADES, ATTENDANCE)
+    correlation = attendance_grade_correlation(data)
+
+    # Pairs (attendance rate, mean grade): (1, 95), (0.5, 70), (0, 50) in course 1; (1, 80), (0, 60) in course 2
+    x = np.array([1, 0.5, 0, 1, 0])
+    y = np.array([95, 70, 50, 80, 60])
+    assert correlation['pairs'] == 5
+    assert correlation['overall'] == pytest.approx(np.corrcoef(x, y)[0, 1])
+    assert correlation['per_course'][:2] == pytest.approx([np.corrcoef(x[:3], y[:3])[0, 1], 1.0])
+    # Course 7 has grades but no attendance
+    assert np.isnan(correlation['per_course'][2])
+
+
+def test_event_index_source_and_report():
+    db = sqlite3.connect(':memory:')
+    db.executescript(SCHEMA)
+    db.executemany(
+        'INSERT INTO grades VALUES (?, ?, ?, ?, ?, ?)',
+        [(block, 0, '0x', course, student, grade) for block, (course, student, grade, _) in enumerate(GRADES)]
+    )
+    db.executemany(
+        'INSERT INTO attendance VALUES (?, ?, ?, ?, ?, ?)',
+        [(block, 0, '0x', course, student, int(attended)) for block, (course, student, attended) in enumerate(ATTENDANCE)]
+    )
+
+    statements = []
+    db.set_trace_callback(statements.append)
+    result = report(CourseData.from_event_index(db, course_ids=[2]), percentiles=(50,), bins=5)
+
+    # Only course 2 is read from the index, one query per table
+    assert len(statements) == 2 and all(statement.endswith('WHERE course_id IN (2)') for statement in statements)
+
+    assert result['bin_edges'] == [0, 20, 40, 60, 80, 100]
+    [course] = result['courses']
+    assert course['grades']['percentiles'] == {'50': 70.0}
+    assert course['grades']['histogram'] == [0, 0, 0, 1, 1]
+    assert course['attendance'] == {'count': 2, 'rate': 50.0}
+    assert course['attendance_grade_correlation'] == pytest.approx(1.0)
+    assert {student['student']: student['gpa'] for student in result['students']} == {ALICE: 3.2, BOB: 2.4}
+
+
+def test_event_index_reads_many_courses_in_chunks(monkeypatch):
+    db = sqlite3.connect(':memory:')
+    db.executescript(SCHEMA)
+    db.executemany('INSERT INTO grades VALUES (?, ?, ?, ?, ?, ?)', [(course, 0, '0x', course, ALICE, 50) for course in range(25)])
+    monkeypatch.setattr(analytics, 'SQL_CHUNK_SIZE', 10)
+    statements = []
+    db.set_trace_callback(statements.append)
+
+    data = CourseData.from_event_index(db, course_ids=range(1, 21))
+
+    # 20 courses in chunks of 10, for each of the two tables
+    assert len(statements) == 4
+    assert report(data)['courses'][19]['grades']['count'] == 1
+
+
+def test_report_handles_no_records():
+    result = report(CourseData.from_records([], [], course_ids=[5]))
+    assert result['courses'][0]['grades']['mean'] is None
+    assert result['students'] == []
+    assert result['attendance_grade_correlation'] is None
+    with pytest.raises(ValueError):
+        report(CourseData.from_records([], []), percentiles=(101,))
+    for percentiles in (['abc'], [None], '50', 50):
+        with pytest.raises(ValueError):
+            report(CourseData.from_records([], []), percentiles=percentiles)
@@ -35,3 +35,90 @@ def test_send_transaction(mock_send_transaction, client: FlaskClient):
     response = client.post('/send', json={'contract_address': '0x123', 'abi': '[]', 'function_name': 'myFunction'})
     assert response.status_code == 200
     assert response.json == {'transaction_hash': 'tx_hash'}
+
+@patch('api.get_receipt_tracker')
+def test_transaction_status(mock_get_receipt_tracker, client: FlaskClient):
+    mock_get_receipt_tracker.return_value.status.side_effect = lambda tx_hash: (
+        {'transactionHash': tx_hash, 'status': 'confirmed', 'blockNumber': 12} if tx_hash == '0xabc' else None
+    )
+
+    response = client.get('/transactions/0xabc')
+    assert response.status_code == 200
+    assert response.json['status'] == 'confirmed'
+
+    assert client.get('/transactions/0xdef').status_code == 404
+
+def test_metrics_endpoint(client: FlaskClient):
+    client.get('/cache-stats')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    assert 'http_request_seconds_count{endpoint="/cache-stats",method="GET",status="200"} 1' in response.get_data(as_text=True)
+
+@patch('api.send_transaction')
+@patch('api.get_contract_instance')
+def test_send_rejected_by_preflight(mock_get_contract_instance, mock_send_transaction, client: FlaskClient):
+    from simulation import SimulationFailed
+    mock_send_transaction.side_effect = SimulationFailed('Course is full')
+
+    response = client.post('/send', json={'contract_address': '0x123', 'abi': '[]', 'function_name': 'enrollInCourse', 'args': [1]})
+    assert response.status_code == 422
+    assert response.json == {'error': 'Transaction would revert', 'reason': 'Course is full'}
+
+@patch('api.send_transaction')
+@patch('api.missing_role')
+@patch('api.get_contract_instance')
+def test_send_refused_without_role(mock_get_contract_instance, mock_missing_role, mock_send_transaction, client: FlaskClient):
+    mock_missing_role.return_value = 'TEACHER_ROLE'
+
+    response = client.post('/send', json={'contract_address': '0x123', 'abi': '[]', 'function_name': 'recordGrade', 'args': [1]})
+    assert response.status_code == 403
+    assert response.json == {'error': 'Missing role', 'role': 'TEACHER_ROLE'}
+    mock_send_transaction.assert_not_called()
+
+@patch('api.get_interaction')
+def test_course_analytics(mock_get_interaction, client: FlaskClient):
+    mock_get_interaction.return_value.course_analytics.return_value = {'courses': []}
+
+    response = client.post('/analytics', json={'course_ids': [1, 2], 'bins': 4, 'source': 'events'})
+    assert response.status_code == 200
+    assert response.json == {'courses': []}
+    mock_get_interaction.return_value.course_analytics.assert_called_once_with(
+        [1, 2], percentiles=(10, 25, 50, 75, 90), bins=4, scale=4.0, source='events'
+    )
+
+    mock_get_interaction.return_value.course_analytics.side_effect = ValueError('EVENT_INDEX_DB is not configured')
+    response = client.post('/analytics', json={})
+    assert response.status_code == 400
+
+    # Malformed fields answer 400 rather than 500
+    response = client.post('/analytics', json={'bins': None})
+    assert response.status_code == 400
+
+@patch('api.get_outbox')
+@patch('api.send_transaction')
+@patch('api.get_contract_instance')
+def test_send_queues_job_in_outbox(mock_get_contract_instance, mock_send_transaction, mock_get_outbox, client: FlaskClient):
+    from outbox import Outbox
+    mock_get_contract_instance.return_value.address = '0xC'
+    mock_get_outbox.return_value = Outbox(':memory:', ['0xS'], max_pending=1)
+    body = {'contract_address': '0xC', 'abi': '[]', 'function_name': 'recordGrade', 'args': [1, '0xD', 90]}
+
+    response = client.post('/send', json=body, headers={'Idempotency-Key': 'grade-1'})
+    assert response.status_code == 202
+    assert response.json == {'job_id': 1, 'state': 'queued', 'status_url': '/jobs/1'}
+    # The retry of the same request maps to the same job; a new one hits the limit
+    assert client.post('/send', json=body, headers={'Idempotency-Key': 'grade-1'}).json['job_id'] == 1
+    assert client.post('/send', json=body).status_code == 429
+    mock_send_transaction.assert_not_called()
+
+    assert client.post('/send', json=dict(body, sender='0xUnknown')).status_code == 400
+
+    status = client.get('/jobs/1').json
+    assert (status['state'], status['signer'], status['args']) == ('queued', '0xS', [1, '0xD', 90])
+    assert client.get('/jobs/2').status_code == 404
+
+def test_profiler_endpoint_needs_explicit_flag(client: FlaskClient):
+    assert client.get('/debug/profiler').status_code == 404
+    assert client.post('/debug/profiler', json={'enabled': True}).status_code == 404
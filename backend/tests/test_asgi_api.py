@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+from hexbytes import HexBytes
+from unittest.mock import AsyncMock, MagicMock, patch
+from starlette.testclient import TestClient
+
+import asgi_api
+from asgi_api import RequestCoalescer, app
+from simulation import SimulationFailed
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.asyncio
+async def test_coalescer_shares_in_flight_call():
+    coalescer = RequestCoalescer()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*(coalescer.run('key', upstream) for _ in range(5)))
+
+    assert results == [42] * 5
+    assert len(calls) == 1
+    assert coalescer.stats() == {'in_flight': 0, 'started': 1, 'coalesced': 4}
+
+    # Once the call has finished the next request goes upstream again
+    assert await coalescer.run('key', upstream) == 42
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_coalescer_propagates_errors_to_all_waiters():
+    coalescer = RequestCoalescer()
+
+    async def upstream():
+        await asyncio.sleep(0.01)
+        raise ValueError('execution reverted')
+
+    results = await asyncio.gather(*(coalescer.run('key', upstream) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert coalescer.stats()['in_flight'] == 0
+
+
+@patch('asgi_api.call_contract_function')
+@patch('asgi_api.get_contract_instance')
+def test_call_function(mock_get_contract_instance, mock_call_contract_function, client):
+    async def result(*args, **kwargs):
+        return 42
+    mock_call_contract_function.side_effect = result
+
+    response = client.post('/call', json={'contract_address': '0x123', 'abi': '[]', 'function_name': 'myFunction', 'args': [1]})
+
+    assert response.status_code == 200
+    assert response.json() == {'result': 42}
+    mock_call_contract_function.assert_called_once_with(
+        mock_get_contract_instance.return_value, 'myFunction', 1, block_identifier='latest'
+    )
+
+
+@patch('asgi_api.get_contract_instance')
+def test_list_functions(mock_get_contract_instance, client):
+    mock_contract = MagicMock()
+    mock_contract.all_functions.return_value = [MagicMock(fn_name='myFunction')]
+    mock_get_contract_instance.return_value = mock_contract
+
+    response = client.post('/list-functions', json={'contract_address': '0x123', 'abi': '[]'})
+
+    assert response.status_code == 200
+    assert response.json() == ['myFunction']
+
+
+@patch('asgi_api.send_transaction')
+@patch('asgi_api.get_contract_instance')
+def test_send_transaction(mock_get_contract_instance, mock_send_transaction, client):
+    async def tx_hash(*args, **kwargs):
+        return '0xabc'
+    mock_send_transaction.side_effect = tx_hash
+
+    response = client.post('/send', json={'contract_address': '0x123', 'abi': '[]', 'function_name': 'myFunction'})
+
+    assert response.status_code == 200
+    assert response.json() == {'transaction_hash': '0xabc'}
+    assert mock_send_transaction.call_args.kwargs == {'preflight': None}
+
+    async def revert(*args, **kwargs):
+        raise SimulationFailed('Not a teacher')
+    mock_send_transaction.side_effect = revert
+
+    response = client.post('/send', json={'contract_address': '0x123', 'abi': '[]', 'function_name': 'myFunction'})
+
+    assert response.status_code == 422
+    assert response.json() == {'error': 'Transaction would revert', 'reason': 'Not a teacher'}
+
+
+@patch('asgi_api.simulate_transaction')
+@patch('asgi_api.send_transaction')
+@patch('asgi_api.get_contract_instance')
+def test_send_dry_run_only_simulates(mock_get_contract_instance, mock_send_transaction, mock_simulate_transaction, client):
+    async def outcome(*args):
+        return {'ok': True, 'result': []}
+    mock_simulate_transaction.side_effect = outcome
+
+    response = client.post('/send', json={
+        'contract_address': '0x123', 'abi': '[]', 'function_name': 'myFunction', 'args': [1], 'dry_run': True
+    })
+
+    assert response.status_code == 200
+    assert response.json() == {'ok': True, 'result': []}
+    mock_simulate_transaction.assert_called_once_with(mock_get_contract_instance.return_value, 'myFunction', 1)
+    mock_send_transaction.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_send_transaction_uses_signer_pool_fee_oracle_and_preflight(monkeypatch):
+    connection = MagicMock()
+    connection.eth.send_raw_transaction = AsyncMock(return_value=HexBytes('0xfeed'))
+    connection.eth.account.sign_transaction.return_value = MagicMock(hash=b'\xfe\xed', rawTransaction=b'raw')
+    signer = MagicMock(address='0xS')
+    signer.nonce_manager.next_nonce = AsyncMock(return_value=7)
+    pool = MagicMock()
+    pool.acquire.return_value = signer
+    oracle = MagicMock()
+    oracle.build_transaction = AsyncMock(return_value={'nonce': 7, 'gas': 60000, 'maxFeePerGas': 10})
+    simulator = MagicMock()
+    simulator.check = AsyncMock()
+    contract = MagicMock()
+    monkeypatch.setattr(asgi_api, 'w3', connection)
+    monkeypatch.setattr(asgi_api, '_signer_pool', pool)
+    monkeypatch.setattr(asgi_api, '_fee_oracle', oracle)
+    monkeypatch.setattr(asgi_api, '_simulator', simulator)
+    monkeypatch.setattr(asgi_api.registry, 'resolve_function_name', lambda contract, name: name)
+
+    assert await asgi_api.send_transaction(contract, 'recordGrade', 1, sender='0xs') == '0xfeed'
+
+    pool.acquire.assert_called_once_with('0xs')
+    simulator.check.assert_awaited_once_with(contract.functions.recordGrade.return_value, '0xS')
+    oracle.build_transaction.assert_awaited_once_with(
+        contract.functions.recordGrade.return_value, {'from': '0xS', 'nonce': 7}
+    )
+    pool.done.assert_called_once_with(signer)
@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from web3.exceptions import ContractLogicError
+from async_contract_interaction import AsyncContractInteraction
+from simulation import SimulationFailed
+
+class Awaitable:
+    # Stands in for AsyncWeb3 properties such as eth.chain_id that are awaited on access
+    def __init__(self, value):
+        self.value = value
+
+    def __await__(self):
+        return asyncio.sleep(0, result=self.value).__await__()
+
+@pytest.fixture
+def async_interaction(mocker):
+    mocker.patch.dict('os.environ', {
+        'INFURA_URL': 'https://mock.infura.io',
+        'PRIVATE_KEY': '0x' + '1' * 64,
+        'TX_PREFLIGHT': '0'
+    })
+    mock_w3 = mocker.patch('async_contract_interaction.AsyncWeb3').return_value
+    mock_w3.provider.cache_async_session = AsyncMock()
+    mock_w3.eth.chain_id = Awaitable(1337)
+    mock_w3.eth.block_number = Awaitable(10)
+    mock_w3.eth.fee_history = AsyncMock(return_value={'baseFeePerGas': [10 ** 9], 'reward': [[10 ** 8]]})
+    mock_w3.eth.estimate_gas = AsyncMock(return_value=50000)
+    mock_w3.eth.get_transaction_count = AsyncMock(return_value=3)
+    mock_w3.eth.send_raw_transaction = AsyncMock(return_value=b'tx_hash')
+    mock_w3.eth.wait_for_transaction_receipt = AsyncMock(return_value={'status': 1})
+    mocker.patch.object(AsyncContractInteraction, '_load_contract_addresses', return_value={
+        'UniversityAccessControlProxy': '0x1',
+        'CourseManagementProxy': '0x2',
+        'GradeManagementProxy': '0x3',
+        'ScheduleManagementProxy': '0x4',
+        'StatisticsTrackerProxy': '0x5'
+    })
+    mocker.patch.object(AsyncContractInteraction, '_load_contract_abis', return_value={})
+    mocker.patch.object(AsyncContractInteraction, '_initialize_contracts', side_effect=lambda: {
+        key: MagicMock() for key in ('access_control', 'course_management', 'grade_management',
+                                     'schedule_management', 'statistics_tracker')
+    })
+    return AsyncContractInteraction(pool_size=4)
+
+@pytest.mark.asyncio
+async def test_reads_run_concurrently(async_interaction):
+    in_flight = 0
+    peak = 0
+
+    async def slow_call(course_id):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return 80 + course_id
+
+    get_average = async_interaction.contracts['statistics_tracker'].functions.getAverageGrade
+    get_average.side_effect = lambda course_id: MagicMock(call=lambda block_identifier: slow_call(course_id))
+
+    async with async_interaction:
+        averages = await asyncio.gather(*(async_interaction.get_average_grade(i) for i in range(5)))
+
+    assert averages == [80, 81, 82, 83, 84]
+    assert peak == 5
+    async_interaction.w3.provider.cache_async_session.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_record_grade_uses_local_nonces(async_interaction):
+    build = AsyncMock(side_effect=lambda params: dict(params, to='0x3', data='0x12345678'))
+    async_interaction.contracts['grade_management'].functions.recordGrade.return_value.build_transaction = build
+    async_interaction.w3.eth.account.sign_transaction.return_value = MagicMock(rawTransaction=b'raw')
+
+    async with async_interaction:
+        receipts = await asyncio.gather(
+            async_interaction.record_grade(1, '0xabc', 85),
+            async_interaction.record_grade(1, '0xdef', 90)
+        )
+
+    assert receipts == [{'status': 1}, {'status': 1}]
+    assert sorted(call.args[0]['nonce'] for call in build.await_args_list) == [3, 4]
+    # Fees and the gas limit come from the fee oracle; the estimate is reused for the second send
+    assert build.await_args.args[0]['maxFeePerGas'] == 21 * 10 ** 8
+    signed = async_interaction.w3.eth.account.sign_transaction.call_args.args[0]
+    assert signed['gas'] == 60000 and 'gasPrice' not in signed
+    async_interaction.w3.eth.estimate_gas.assert_awaited_once()
+    async_interaction.w3.eth.get_transaction_count.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_reads_are_cached_per_block_and_use_the_event_index(async_interaction):
+    call = AsyncMock(return_value=75)
+    async_interaction.contracts['statistics_tracker'].functions.getAttendanceRate.return_value.call = call
+
+    async with async_interaction:
+        assert [await async_interaction.get_attendance_rate(1) for _ in range(3)] == [75] * 3
+        call.assert_awaited_once_with(block_identifier=10)
+
+        async_interaction.event_index = MagicMock()
+        async_interaction.event_index.get_attendance_rate.return_value = 80
+        assert await async_interaction.get_attendance_rate(1) == 80
+        async_interaction.event_index.is_current.return_value = False
+        assert await async_interaction.get_attendance_rate(1) == 75
+
+@pytest.mark.asyncio
+async def test_preflight_stops_a_reverting_write(async_interaction):
+    record = async_interaction.contracts['grade_management'].functions.recordGrade.return_value
+    record.call = AsyncMock(side_effect=ContractLogicError('execution reverted: Only teachers'))
+
+    async with async_interaction:
+        with pytest.raises(SimulationFailed):
+            await async_interaction._send_transaction(
+                async_interaction.contracts['grade_management'], 'recordGrade', 1, '0xabc', 85, preflight=True
+            )
+
+    async_interaction.w3.eth.send_raw_transaction.assert_not_awaited()
+    assert async_interaction.signers.stats() == {async_interaction.account.address: 0}
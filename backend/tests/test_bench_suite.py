@@ -0,0 +1,22 @@
+from benchmarks.bench_suite import compare, summarize
+
+
+def test_summarize_latencies():
+    report = summarize([0.001, 0.002, 0.003, 0.004])
+
+    assert report['count'] == 4
+    assert report['p50_ms'] == 3.0
+    assert report['ops_per_sec'] == 400
+
+
+def test_compare_flags_regressions_by_direction():
+    baseline = {'reads': {'get_grades_uncached': {'p95_ms': 10.0, 'ops_per_sec': 100.0, 'count': 200}}}
+    current = {'reads': {'get_grades_uncached': {'p95_ms': 10.5, 'ops_per_sec': 80.0, 'count': 400}}}
+
+    report = compare(current, baseline, tolerance=0.1)
+
+    assert report['reads.get_grades_uncached.p95_ms']['regressed'] is False
+    assert report['reads.get_grades_uncached.ops_per_sec']['regressed'] is True
+    assert report['reads.get_grades_uncached.ops_per_sec']['change'] == -0.2
+    # Counts and parameters are not performance metrics
+    assert 'reads.get_grades_uncached.count' not in report
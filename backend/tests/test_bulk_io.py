@@ -0,0 +1,144 @@
+import io
+import json
+from concurrent.futures import Future
+
+import pytest
+
+from bulk_io import IMPORTS, BulkImporter, Checkpoint, read_rows, write_rows
+
+STUDENT = '0x' + '11' * 20
+
+
+class FakeHandle(Future):
+    def __init__(self, tx_hash, status=1):
+        super().__init__()
+        self.tx_hash = tx_hash
+        self.set_result({'status': status})
+
+
+class FakeChain:
+    """Records every submission; the n-th transaction gets hash tx-n."""
+
+    def __init__(self, revert=()):
+        self.sent = []
+        self.revert = set(revert)
+
+    def __call__(self, values):
+        self.sent.append(values)
+        tx_hash = f'tx-{len(self.sent)}'
+        return FakeHandle(tx_hash, status=0 if tx_hash in self.revert else 1)
+
+
+def write_csv(path, rows):
+    path.write_text('course_id,student,grade\n' + ''.join(f'{c},{s},{g}\n' for c, s, g in rows))
+    return path
+
+
+def test_read_rows_csv_and_jsonl(tmp_path):
+    csv_path = write_csv(tmp_path / 'grades.csv', [(1, STUDENT, 90), (1, 'nope', 80), (2, STUDENT, 'x')])
+    rows = list(read_rows(csv_path, IMPORTS['grades']['fields']))
+
+    assert rows[0] == (0, (1, STUDENT, 90), None)
+    assert rows[1][1] is None and rows[2][1] is None
+
+    jsonl_path = tmp_path / 'attendance.jsonl'
+    jsonl_path.write_text(json.dumps({'course_id': 3, 'student': STUDENT, 'attended': 'yes'}) + '\n\n'
+                          + json.dumps({'course_id': 3, 'student': STUDENT}) + '\n')
+    rows = list(read_rows(jsonl_path, IMPORTS['attendance']['fields']))
+    assert rows == [(0, (3, STUDENT, True), None), (1, None, "missing field 'attended'")]
+
+
+def test_batches_chunks_and_records_failures(tmp_path):
+    path = write_csv(tmp_path / 'grades.csv', [(1, STUDENT, g) for g in range(5)] + [(1, 'bad', 1)])
+    chain = FakeChain(revert={'tx-2'})
+    progress = []
+    importer = BulkImporter(
+        chain, chunk_size=2, window=1, failures_path=tmp_path / 'failed.jsonl',
+        on_progress=lambda next_row, stats: progress.append(next_row)
+    )
+
+    stats = importer.run(read_rows(path, IMPORTS['grades']['fields']))
+
+    assert [len(values) for values in chain.sent] == [2, 2, 1]
+    assert stats == {'imported': 3, 'failed': 3, 'skipped': 0, 'transactions': 3, 'rejected': []}
+    assert progress == [2, 4, 6]
+    failed = [json.loads(line) for line in (tmp_path / 'failed.jsonl').read_text().splitlines()]
+    assert [(f['row'], f['error']) for f in failed] == [(2, 'transaction reverted'), (3, 'transaction reverted'), (5, failed[2]['error'])]
+
+
+def test_preflight_keeps_reverting_rows_out_of_the_batch(tmp_path):
+    path = write_csv(tmp_path / 'grades.csv', [(1, STUDENT, 90), (1, STUDENT, 101), (1, STUDENT, 80)])
+    chain = FakeChain()
+
+    def preflight(values):
+        return [None if grade <= 100 else 'Invalid grade' for _, _, grade in values]
+
+    importer = BulkImporter(chain, chunk_size=3, failures_path=tmp_path / 'failed.jsonl', preflight=preflight)
+    stats = importer.run(read_rows(path, IMPORTS['grades']['fields']))
+
+    assert chain.sent == [[(1, STUDENT, 90), (1, STUDENT, 80)]]
+    assert stats['imported'] == 2 and stats['failed'] == 1
+    assert stats['rejected'] == [{'row': 1, 'error': 'Invalid grade'}]
+    failed = [json.loads(line) for line in (tmp_path / 'failed.jsonl').read_text().splitlines()]
+    assert [(f['row'], f['error']) for f in failed] == [(1, 'Invalid grade')]
+
+
+def test_per_row_submission_for_unbatched_kinds(tmp_path):
+    path = tmp_path / 'schedules.csv'
+    path.write_text('course_id,date,time\n1,2024-09-01,10:00\n1,2024-09-02,12:00\n')
+    chain = FakeChain()
+
+    stats = BulkImporter(chain, batched=False, chunk_size=10).run(read_rows(path, IMPORTS['schedules']['fields']))
+
+    assert chain.sent == [[(1, '2024-09-01', '10:00')], [(1, '2024-09-02', '12:00')]]
+    assert stats['transactions'] == 2
+
+
+class Interrupted(Future):
+    tx_hash = None
+
+    def result(self, timeout=None):
+        raise KeyboardInterrupt()
+
+
+def test_resumes_from_checkpoint_without_resending_mined_rows(tmp_path):
+    path = write_csv(tmp_path / 'grades.csv', [(1, STUDENT, g) for g in range(6)])
+    chain = FakeChain()
+
+    def submit(values):
+        # The process is killed while waiting on the first receipt
+        handle = chain(values)
+        interrupted = Interrupted()
+        interrupted.tx_hash = handle.tx_hash
+        return interrupted
+
+    importer = BulkImporter(submit, chunk_size=2, window=4, checkpoint=Checkpoint(tmp_path / 'progress.json'))
+    with pytest.raises(KeyboardInterrupt):
+        importer.run(read_rows(path, IMPORTS['grades']['fields']))
+
+    saved = Checkpoint(tmp_path / 'progress.json')
+    assert saved.next_row == 0
+    assert saved.submitted == {0: 'tx-1', 1: 'tx-1', 2: 'tx-2', 3: 'tx-2', 4: 'tx-3', 5: 'tx-3'}
+
+    # Only tx-1 made it on-chain before the crash
+    resumed = FakeChain()
+    stats = BulkImporter(resumed, chunk_size=2, checkpoint=saved, is_confirmed=lambda tx_hash: tx_hash == 'tx-1').run(
+        read_rows(path, IMPORTS['grades']['fields'], start=saved.next_row)
+    )
+
+    assert [[grade for _, _, grade in values] for values in resumed.sent] == [[2, 3], [4, 5]]
+    assert stats['skipped'] == 2 and stats['imported'] == 4
+    final = Checkpoint(tmp_path / 'progress.json')
+    assert final.next_row == 6 and final.submitted == {}
+    assert final.totals == {'imported': 6, 'failed': 0}
+
+
+def test_write_rows():
+    rows = iter([(1, STUDENT, 90, 1700000000), (1, STUDENT, 75, 1700000100)])
+    out = io.StringIO()
+    assert write_rows(rows, out, ('course_id', 'student', 'grade', 'date')) == 2
+    assert out.getvalue().splitlines()[0] == 'course_id,student,grade,date'
+
+    out = io.StringIO()
+    write_rows(iter([(1, '2024-09-01', '10:00')]), out, ('course_id', 'date', 'time'), fmt='jsonl')
+    assert json.loads(out.getvalue()) == {'course_id': 1, 'date': '2024-09-01', 'time': '10:00'}
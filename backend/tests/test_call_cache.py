@@ -0,0 +1,88 @@
+import pytest
+from unittest.mock import MagicMock
+
+from call_cache import BlockCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def contract():
+    contract = MagicMock()
+    contract.address = '0xAbC'
+    contract.functions.getAverageGrade.return_value.call.side_effect = lambda block_identifier: 80 + block_identifier
+    return contract
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def w3():
+    w3 = MagicMock()
+    w3.eth.block_number = 1
+    return w3
+
+
+def test_hits_within_block(w3, contract, clock):
+    cache = BlockCache(w3, clock=clock)
+
+    assert cache.call(contract, 'getAverageGrade', 7) == 81
+    assert cache.call(contract, 'getAverageGrade', 7) == 81
+    assert cache.call(contract, 'getAverageGrade', 8) == 81
+
+    contract.functions.getAverageGrade.return_value.call.assert_called_with(block_identifier=1)
+    assert contract.functions.getAverageGrade.return_value.call.call_count == 2
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 2, 2)
+
+
+def test_new_block_invalidates(w3, contract, clock):
+    cache = BlockCache(w3, block_ttl=1.0, clock=clock)
+    cache.call(contract, 'getAverageGrade', 7)
+
+    w3.eth.block_number = 2
+    # The head is not re-read until the TTL expires
+    assert cache.call(contract, 'getAverageGrade', 7) == 81
+
+    clock.now = 1.5
+    assert cache.call(contract, 'getAverageGrade', 7) == 82
+    assert cache.stats()['invalidations'] == 1
+    assert cache.stats()['block'] == 2
+
+
+def test_refresh_rechecks_head(w3, contract, clock):
+    cache = BlockCache(w3, block_ttl=60, clock=clock)
+    cache.call(contract, 'getAverageGrade', 7)
+
+    w3.eth.block_number = 5
+    cache.refresh()
+
+    assert cache.call(contract, 'getAverageGrade', 7) == 85
+
+
+def test_lru_eviction(w3, contract, clock):
+    cache = BlockCache(w3, max_size=2, clock=clock)
+    for course_id in (1, 2, 3):
+        cache.call(contract, 'getAverageGrade', course_id)
+
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['size'] == 2
+
+
+def test_disabled_cache_calls_through(w3, contract, clock):
+    cache = BlockCache(w3, max_size=0, clock=clock)
+    contract.functions.getAverageGrade.return_value.call.side_effect = None
+    contract.functions.getAverageGrade.return_value.call.return_value = 70
+
+    assert cache.call(contract, 'getAverageGrade', 7) == 70
+    assert cache.call(contract, 'getAverageGrade', 7) == 70
+    assert contract.functions.getAverageGrade.return_value.call.call_count == 2
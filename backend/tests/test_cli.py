@@ -32,3 +32,22 @@ def test_send_transaction(mock_send_transaction, runner):
     result = runner.invoke(cli, ['send', '0x123', '[]', 'myFunction'])
     assert result.exit_code == 0
     assert 'Транзакция отправлена с хэшем: tx_hash' in result.output
+
+@patch('contract_interaction.ContractInteraction')
+def test_import_grades(mock_interaction_class, runner, tmp_path):
+    interaction = mock_interaction_class.return_value
+    handle = MagicMock(tx_hash=b'\x01')
+    handle.result.return_value = {'status': 1}
+    interaction.submit_transaction.return_value = handle
+    # The second row would revert and is kept out of its batch
+    interaction.preflight_rows.side_effect = lambda contract, function_name, values: [None, 'Invalid grade'][:len(values)]
+    path = tmp_path / 'grades.csv'
+    path.write_text('course_id,student,grade\n' + ('1,0x' + '11' * 20 + ',90\n') * 3)
+
+    result = runner.invoke(cli, ['import-grades', str(path), '--chunk-size', '2'])
+    assert result.exit_code == 0
+    assert 'Импортировано: 2' in result.output and 'ошибок: 1' in result.output
+    assert 'Запись 1 отклонена при проверке: Invalid grade' in result.output
+    assert interaction.submit_transaction.call_count == 2
+    assert all(call.kwargs == {'preflight': False} for call in interaction.submit_transaction.call_args_list)
+    assert (tmp_path / 'grades.csv.progress.json').exists()
@@ -1,7 +1,17 @@
+import datetime
+import itertools
+
 import pytest
+from hexbytes import HexBytes
 from unittest.mock import patch, MagicMock
 from pathlib import Path
-from contract_interaction import ContractInteraction, get_contract_instance, call_contract_function, send_transaction
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+from contract_interaction import (
+    ContractInteraction, get_contract_instance, call_contract_function, send_transaction, sign_and_send,
+    rebroadcast_transaction, missing_role, function_label
+)
+from role_cache import RoleCache
 
 @pytest.fixture
 def mock_web3(mocker):
@@ -163,3 +173,237 @@ def test_error_handling(contract_interaction):
     with pytest.raises(Exception) as exc_info:
         contract_interaction.create_course('Math 101', 'Introduction to Mathematics', 30)
     assert str(exc_info.value) == 'Transaction failed'
+
+def mined_receipt(tx_hash, status=1):
+    return {'transactionHash': tx_hash, 'status': status, 'blockNumber': 10, 'blockHash': HexBytes(b'\x0a')}
+
+@pytest.fixture
+def mocked_interaction(mocker):
+    mocker.patch.dict('os.environ', {
+        'INFURA_URL': 'https://mock.infura.io',
+        'PRIVATE_KEY': '0x' + '1' * 64,
+        'TX_POLL_INTERVAL': '0.01',
+        'TX_PREFLIGHT': '0'
+    })
+    mock_w3 = mocker.patch('contract_interaction.Web3').return_value
+    mock_w3.eth.get_transaction_count.return_value = 0
+    mock_w3.eth.block_number = 10
+    mock_w3.eth.fee_history.return_value = {'baseFeePerGas': [10, 12], 'reward': [[2]]}
+    mock_w3.eth.estimate_gas.return_value = 50000
+    tx_counter = itertools.count(1)
+    mock_w3.eth.send_raw_transaction.side_effect = lambda raw: HexBytes(next(tx_counter).to_bytes(32, 'big'))
+    mock_w3.eth.get_transaction_receipt.side_effect = lambda tx_hash: mined_receipt(tx_hash)
+    mocker.patch.object(ContractInteraction, '_load_contract_addresses', return_value={
+        'UniversityAccessControlProxy': '0x1',
+        'CourseManagementProxy': '0x2',
+        'GradeManagementProxy': '0x3',
+        'ScheduleManagementProxy': '0x4',
+        'StatisticsTrackerProxy': '0x5'
+    })
+    mocker.patch.object(ContractInteraction, '_load_contract_abis', return_value={
+        'UniversityAccessControl': [],
+        'CourseManagement': [],
+        'GradeManagement': [],
+        'ScheduleManagement': [],
+        'StatisticsTracker': []
+    })
+    interaction = ContractInteraction()
+    yield interaction
+    interaction.receipts.shutdown()
+
+def test_record_grades_batches_in_chunks(mocked_interaction):
+    records = [(1, f'0x{i:040x}', 80 + i) for i in range(5)]
+
+    results = mocked_interaction.record_grades(records, chunk_size=2)
+
+    record_grades = mocked_interaction.contracts['grade_management'].functions.recordGrades
+    assert record_grades.call_count == 3
+    record_grades.assert_any_call([1, 1], [records[0][1], records[1][1]], [80, 81])
+    assert [result['item'] for result in results] == records
+    assert all(result['status'] == 1 for result in results)
+
+def test_mark_attendance_bulk_reports_failed_chunk(mocked_interaction):
+    # The second batch transaction reverts
+    mocked_interaction.w3.eth.get_transaction_receipt.side_effect = lambda tx_hash: mined_receipt(
+        tx_hash, status=0 if int.from_bytes(tx_hash, 'big') == 2 else 1
+    )
+    records = [(1, '0xabc', True), (1, '0xdef', False), (2, '0xabc', True)]
+
+    results = mocked_interaction.mark_attendance_bulk(records, chunk_size=2)
+
+    assert sorted(result['status'] for result in results) == [0, 1, 1]
+    mocked_interaction.contracts['grade_management'].functions.markAttendanceBatch.assert_any_call([2], ['0xabc'], [True])
+
+def test_preflight_sends_only_rows_that_would_succeed(mocked_interaction):
+    mocked_interaction.preflight = True
+    mocked_interaction.simulator = MagicMock()
+    mocked_interaction.simulator.simulate_many.return_value = [
+        {'ok': True, 'result': '0x'},
+        {'ok': False, 'reason': 'AccessControlUnauthorizedAccount(0xabc, 0x01)', 'data': '0x'},
+        {'ok': True, 'result': '0x'}
+    ]
+    records = [(1, '0xabc', 90), (1, '0xdef', 80), (2, '0xabc', 70)]
+
+    results = mocked_interaction.record_grades(records, chunk_size=10)
+
+    calls = mocked_interaction.simulator.simulate_many.call_args[0][0]
+    assert [args for _, _, args in calls][1] == [[1], ['0xdef'], [80]]
+    record_grades = mocked_interaction.contracts['grade_management'].functions.recordGrades
+    record_grades.assert_called_once_with([1, 2], ['0xabc', '0xabc'], [90, 70])
+    assert [result['status'] for result in results] == [1, 0, 1]
+    assert results[1]['error'].startswith('AccessControlUnauthorizedAccount')
+
+def test_statistics_from_event_index(mocked_interaction):
+    mocked_interaction.event_index = MagicMock()
+    mocked_interaction.event_index.get_average_grade.return_value = 88
+
+    assert mocked_interaction.get_student_average_grade(1, '0xabc') == 88
+    mocked_interaction.event_index.get_average_grade.assert_called_once_with(1, '0xabc')
+    mocked_interaction.contracts['statistics_tracker'].functions.getAverageGradeByStudent.assert_not_called()
+
+    # An index that has not caught up (or stopped syncing) is bypassed for the contract
+    mocked_interaction.event_index.is_current.return_value = False
+    mocked_interaction.get_student_average_grade(1, '0xabc')
+    mocked_interaction.event_index.is_current.assert_called_with(mocked_interaction.event_index_max_age)
+    mocked_interaction.contracts['statistics_tracker'].functions.getAverageGradeByStudent.assert_called_once_with(1, '0xabc')
+
+def test_iter_grades_pages_lazily(mocked_interaction):
+    mocked_interaction.w3.eth.block_number = 42
+    records = [(1, f'0x{i:040x}', 80, 0) for i in range(5)]
+    get_page = mocked_interaction.contracts['grade_management'].functions.getGradesPage
+    get_page.side_effect = lambda course_id, offset, limit: MagicMock(
+        call=MagicMock(return_value=records[offset:offset + limit])
+    )
+
+    grades = mocked_interaction.iter_grades(1, page_size=2)
+    get_page.assert_not_called()
+
+    assert list(grades) == records
+    assert [call.args for call in get_page.call_args_list] == [(1, 0, 2), (1, 2, 2), (1, 4, 2)]
+
+def test_iter_student_grades_follows_next_offset(mocked_interaction):
+    functions = mocked_interaction.contracts['grade_management'].functions
+    functions.getGradeCount.return_value.call.return_value = 5
+    functions.getGradesByStudent.side_effect = lambda course_id, student, offset, limit: MagicMock(
+        call=MagicMock(return_value=([(course_id, student, 90 + offset, 0)], min(offset + limit, 5)))
+    )
+
+    grades = list(mocked_interaction.iter_student_grades(1, '0xabc', page_size=2))
+
+    assert [grade[2] for grade in grades] == [90, 92, 94]
+
+def test_getters_are_cached_per_block(mocked_interaction):
+    mocked_interaction.w3.eth.block_number = 7
+    get_schedule = mocked_interaction.contracts['schedule_management'].functions.getSchedule
+    get_schedule.return_value.call.return_value = [(1, '2024-01-01', '10:00')]
+
+    assert mocked_interaction.get_schedule(1) == mocked_interaction.get_schedule(1)
+
+    get_schedule.return_value.call.assert_called_once_with(block_identifier=7)
+    assert mocked_interaction.call_cache.stats()['hits'] == 1
+
+def test_schedule_range_lookups_pack_dates(mocked_interaction):
+    mocked_interaction.w3.eth.block_number = 7
+    functions = mocked_interaction.contracts['schedule_management'].functions
+    functions.getScheduleInRange.return_value.call.return_value = [(1, '2024-09-04', '10:00')]
+
+    assert mocked_interaction.get_week_schedule(1, '2024-09-04') == [(1, '2024-09-04', '10:00')]
+    functions.getScheduleInRange.assert_called_with(1, 20240902, 20240908)
+    mocked_interaction.get_month_schedule(1, 2024, 2)
+    functions.getScheduleInRange.assert_called_with(1, 20240201, 20240229)
+    mocked_interaction.get_schedule_by_date(1, datetime.date(2024, 9, 4))
+    functions.getScheduleByDate.assert_called_with(1, '2024-09-04')
+
+def test_course_analytics_reads_all_courses_in_one_batch(mocked_interaction):
+    mocked_interaction.w3.eth.block_number = 7
+    mocked_interaction.event_index = None
+    student = '0x' + '11' * 20
+    mocked_interaction.batch_call = MagicMock(return_value=[
+        [(1, student, 80, 0), (1, student, 90, 0)], [],
+        [(1, student, True)], [],
+    ])
+
+    result = mocked_interaction.course_analytics([1, 2], percentiles=(50,), bins=5)
+
+    calls = mocked_interaction.batch_call.call_args
+    assert calls.args[0] == [
+        ('grade_management', 'getGrades', (1,)), ('grade_management', 'getGrades', (2,)),
+        ('grade_management', 'getAttendance', (1,)), ('grade_management', 'getAttendance', (2,)),
+    ]
+    assert calls.kwargs == {'block_identifier': 7}
+    assert [course['grades']['mean'] for course in result['courses']] == [85.0, None]
+    assert result['students'] == [{'student': student, 'courses': 1, 'average': 85.0, 'gpa': 3.4}]
+
+def test_contracts_are_built_lazily(mocked_interaction):
+    ContractInteraction._load_contract_abis.assert_not_called()
+    mocked_interaction.w3.eth.contract.assert_not_called()
+
+    mocked_interaction.contracts['grade_management']
+    mocked_interaction.contracts['grade_management']
+
+    mocked_interaction.w3.eth.contract.assert_called_once_with(address='0x3', abi=[])
+    ContractInteraction._load_contract_abis.assert_called_once()
+
+def test_sign_and_send_keeps_nonce_once_persisted():
+    signer = MagicMock()
+    signer.nonce_manager.next_nonce.return_value = 7
+    connection = MagicMock()
+    connection.eth.send_raw_transaction.side_effect = TimeoutError('no answer')
+    persisted = []
+
+    with pytest.raises(TimeoutError):
+        sign_and_send(connection, MagicMock(), signer, MagicMock(), on_signed=lambda *signed: persisted.append(signed))
+
+    assert persisted[0][2] == 7
+    signer.nonce_manager.release.assert_not_called()
+    signer.nonce_manager.resync.assert_not_called()
+
+@patch('contract_interaction.get_receipt_tracker')
+@patch('contract_interaction.get_signer_pool')
+@patch('contract_interaction.w3')
+def test_rebroadcast_checks_receipt_on_nonce_error(mock_w3, mock_get_signer_pool, mock_get_receipt_tracker):
+    signer = mock_get_signer_pool.return_value.acquire.return_value
+    tracker = mock_get_receipt_tracker.return_value
+    mock_w3.eth.send_raw_transaction.side_effect = ValueError('nonce too low')
+    mock_w3.eth.get_transaction_receipt.side_effect = TransactionNotFound('missing')
+
+    # The nonce went to another transaction: the stored one can never be mined
+    assert rebroadcast_transaction('0xS', '0xf801', '0x1234', 7) is None
+    signer.nonce_manager.resync.assert_called_once()
+    tracker.track.assert_not_called()
+
+    mock_w3.eth.get_transaction_receipt.side_effect = None
+    mock_w3.eth.get_transaction_receipt.return_value = {'status': 1}
+    assert rebroadcast_transaction('0xS', '0xf801', '0x1234', 7) == '0x1234'
+    tracker.track.assert_called_once_with(
+        HexBytes('0x1234'), 7, HexBytes('0xf801'),
+        sender=signer.address, transaction=None, nonce_manager=signer.nonce_manager
+    )
+
+
+@patch('contract_interaction.get_signer_pool')
+@patch('contract_interaction.get_role_cache')
+def test_missing_role_resolves_selectors(mock_get_role_cache, mock_get_signer_pool):
+    contract = Web3().eth.contract(address='0x' + '33' * 20, abi=[{
+        'type': 'function', 'name': 'recordGrade', 'stateMutability': 'nonpayable', 'outputs': [],
+        'inputs': [{'name': 'courseId', 'type': 'uint256'}, {'name': 'student', 'type': 'address'},
+                   {'name': 'grade', 'type': 'uint8'}],
+    }])
+    mock_get_signer_pool.return_value.signers = [MagicMock(address='0x' + '44' * 20)]
+    cache = RoleCache(MagicMock(), [contract.address])
+    cache.synced = True
+    mock_get_role_cache.return_value = cache
+    selector = Web3.keccak(text='recordGrade(uint256,address,uint8)')[:4].hex()
+
+    for name in ('recordGrade', selector, 'recordGrade(uint256,address,uint8)'):
+        assert missing_role(contract, name) == 'TEACHER_ROLE'
+
+
+def test_function_label_only_names_abi_functions():
+    contract = Web3().eth.contract(address='0x' + '33' * 20, abi=[{
+        'type': 'function', 'name': 'getGrades', 'stateMutability': 'view', 'outputs': [], 'inputs': []
+    }])
+
+    assert function_label(contract, 'getGrades') == 'getGrades'
+    for name in ('getGradez', '__class__', 'abi'):
+        assert function_label(contract, name) == 'unknown'
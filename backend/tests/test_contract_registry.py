@@ -0,0 +1,69 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from contract_registry import ContractRegistry, LRUCache
+import contract_interaction
+
+ABI = json.dumps([
+    {
+        'name': 'getAverageGrade',
+        'type': 'function',
+        'stateMutability': 'view',
+        'inputs': [{'name': '_courseId', 'type': 'uint256'}],
+        'outputs': [{'name': '', 'type': 'uint256'}]
+    },
+    {
+        'name': 'GradeRecorded',
+        'type': 'event',
+        'anonymous': False,
+        'inputs': [{'name': 'courseId', 'type': 'uint256', 'indexed': False}]
+    }
+])
+
+@pytest.fixture
+def registry():
+    return ContractRegistry(MagicMock(), max_contracts=2)
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.stats()['evictions'] == 1
+
+def test_get_contract_is_cached(registry):
+    first = registry.get_contract('0xABC', ABI)
+    second = registry.get_contract('0xabc', ABI)
+
+    assert first is second
+    registry.w3.eth.contract.assert_called_once_with(address='0xABC', abi=json.loads(ABI))
+    assert registry.stats()['contracts']['hits'] == 1
+
+def test_contract_cache_is_bounded(registry):
+    for address in ('0x1', '0x2', '0x3'):
+        registry.get_contract(address, ABI)
+    registry.get_contract('0x1', ABI)
+
+    assert registry.w3.eth.contract.call_count == 4
+    assert registry.stats()['contracts']['size'] == 2
+
+def test_parsed_abi_indexes_selectors(registry):
+    parsed = registry.parse_abi(ABI)
+
+    assert parsed is registry.parse_abi(ABI)
+    assert parsed.function_names() == ['getAverageGrade']
+    selector = next(iter(parsed.functions_by_selector))
+    assert parsed.resolve_function_name(selector) == 'getAverageGrade'
+
+def test_call_contract_function_by_selector(mocker):
+    mocker.patch('contract_interaction.w3')
+    contract = MagicMock(abi=json.loads(ABI))
+    contract.functions.getAverageGrade.return_value.call.return_value = 85
+    selector = next(iter(contract_interaction.get_registry().parse_abi(ABI).functions_by_selector))
+
+    assert contract_interaction.call_contract_function(contract, selector, 1) == 85
+    contract.functions.getAverageGrade.assert_called_once_with(1)
@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from eth_abi import abi as eth_abi
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+from web3 import Web3
+
+from event_feed import EventFeed, SubscriptionStore
+
+GRADE_RECORDED = {
+    'type': 'event', 'name': 'GradeRecorded', 'anonymous': False,
+    'inputs': [
+        {'name': 'courseId', 'type': 'uint256', 'indexed': False},
+        {'name': 'student', 'type': 'address', 'indexed': True},
+        {'name': 'grade', 'type': 'uint8', 'indexed': False}
+    ]
+}
+STUDENT_ENROLLED = {
+    'type': 'event', 'name': 'StudentEnrolled', 'anonymous': False,
+    'inputs': [
+        {'name': 'courseId', 'type': 'uint256', 'indexed': False},
+        {'name': 'student', 'type': 'address', 'indexed': False}
+    ]
+}
+GRADES_ADDRESS = Web3.to_checksum_address('0x' + '11' * 20)
+COURSES_ADDRESS = Web3.to_checksum_address('0x' + '22' * 20)
+STUDENT = Web3.to_checksum_address('0x' + '33' * 20)
+
+
+def grade_log(block, course_id, grade):
+    return {
+        'address': GRADES_ADDRESS,
+        'topics': [HexBytes(event_abi_to_log_topic(GRADE_RECORDED)), HexBytes(bytes(12) + HexBytes(STUDENT))],
+        'data': HexBytes(eth_abi.encode(['uint256', 'uint8'], [course_id, grade])),
+        'blockNumber': block, 'blockHash': HexBytes(bytes(32)), 'transactionHash': HexBytes(bytes(32)),
+        'transactionIndex': 0, 'logIndex': 0
+    }
+
+
+@pytest.fixture
+def feed():
+    w3 = Web3()
+    contracts = {
+        'grades': (w3.eth.contract(address=GRADES_ADDRESS, abi=[GRADE_RECORDED]), 'GradeRecorded'),
+        'enrollments': (w3.eth.contract(address=COURSES_ADDRESS, abi=[STUDENT_ENROLLED]), 'StudentEnrolled'),
+    }
+    return EventFeed(MagicMock(), contracts, batch_size=10, start_block=5)
+
+
+@pytest.mark.asyncio
+async def test_poll_uses_one_query_for_all_events(feed):
+    type(feed.w3.eth).block_number = property(lambda _: AsyncMock(return_value=25)())
+    feed.w3.eth.get_logs = AsyncMock(side_effect=[[grade_log(7, 3, 95)], [], []])
+
+    events = await feed.poll()
+
+    assert [(kind, args) for kind, args, _ in events] == [('grades', {'courseId': 3, 'student': STUDENT, 'grade': 95})]
+    # 21 blocks in chunks of 10, each chunk a single query over both contracts and both topics
+    assert feed.w3.eth.get_logs.await_count == 3
+    first = feed.w3.eth.get_logs.await_args_list[0][0][0]
+    assert first['address'] == sorted([GRADES_ADDRESS, COURSES_ADDRESS])
+    assert len(first['topics'][0]) == 2
+    assert feed.next_block == 26
+
+
+def test_subscription_store():
+    store = SubscriptionStore()
+    store.subscribe(1, 'grades')
+    store.subscribe(2, 'grades', 7)
+    store.subscribe(2, 'schedules', 7)
+
+    assert sorted(store.chats_for('grades', 7)) == [1, 2]
+    assert store.chats_for('grades', 8) == [1]
+    assert store.list(2) == [('grades', 7), ('schedules', 7)]
+    assert store.unsubscribe(2, 'grades') == 1
+    assert store.unsubscribe(2) == 1
+    assert store.list(2) == []
@@ -0,0 +1,114 @@
+import time
+import pytest
+from unittest.mock import MagicMock
+from hexbytes import HexBytes
+from web3 import Web3
+from event_indexer import EventIndexer
+
+STUDENT_A = Web3.to_checksum_address('0x' + 'aa' * 20)
+STUDENT_B = Web3.to_checksum_address('0x' + 'bb' * 20)
+
+def grade_log(block_number, log_index, course_id, student, grade):
+    return {
+        'blockNumber': block_number,
+        'blockHash': HexBytes(bytes([block_number]) * 32),
+        'logIndex': log_index,
+        'transactionHash': HexBytes(bytes([block_number, log_index]) * 16),
+        'args': {'courseId': course_id, 'student': student, 'grade': grade}
+    }
+
+def attendance_log(block_number, log_index, course_id, student, attended):
+    log = grade_log(block_number, log_index, course_id, student, 0)
+    log['args'] = {'courseId': course_id, 'student': student, 'attended': attended}
+    return log
+
+@pytest.fixture
+def chain():
+    # block number -> hash, mutable so tests can simulate a reorg
+    return {number: HexBytes(bytes([number]) * 32) for number in range(100)}
+
+@pytest.fixture
+def mock_w3(chain):
+    mock_w3 = MagicMock()
+    mock_w3.eth.block_number = 10
+    mock_w3.eth.get_block.side_effect = lambda number: {'hash': chain[number]}
+    return mock_w3
+
+@pytest.fixture
+def logs():
+    return {'GradeRecorded': [], 'AttendanceMarked': []}
+
+@pytest.fixture
+def mock_contract(logs):
+    def get_logs(name):
+        return lambda fromBlock, toBlock: [log for log in logs[name] if fromBlock <= log['blockNumber'] <= toBlock]
+    mock_contract = MagicMock()
+    mock_contract.events.GradeRecorded.get_logs.side_effect = get_logs('GradeRecorded')
+    mock_contract.events.AttendanceMarked.get_logs.side_effect = get_logs('AttendanceMarked')
+    return mock_contract
+
+@pytest.fixture
+def indexer(mock_w3, mock_contract):
+    return EventIndexer(mock_w3, mock_contract, ':memory:', batch_size=4)
+
+def test_sync_builds_aggregates(indexer, logs):
+    logs['GradeRecorded'] += [
+        grade_log(2, 0, 1, STUDENT_A, 85),
+        grade_log(5, 0, 1, STUDENT_A, 90),
+        grade_log(9, 1, 1, STUDENT_B, 70)
+    ]
+    logs['AttendanceMarked'] += [
+        attendance_log(3, 0, 1, STUDENT_A, True),
+        attendance_log(7, 0, 1, STUDENT_A, False)
+    ]
+
+    assert indexer.sync() == 10
+    assert indexer.get_average_grade(1) == 81
+    assert indexer.get_average_grade(1, STUDENT_A) == 87
+    assert indexer.get_average_grade(1, STUDENT_B.lower()) == 70
+    assert indexer.get_attendance_rate(1) == 50
+    assert indexer.get_average_grade(2) == 0
+
+def test_sync_resumes_from_checkpoint(indexer, mock_w3, mock_contract, logs):
+    logs['GradeRecorded'].append(grade_log(2, 0, 1, STUDENT_A, 80))
+    indexer.sync()
+    mock_contract.events.GradeRecorded.get_logs.reset_mock()
+
+    mock_w3.eth.block_number = 12
+    logs['GradeRecorded'].append(grade_log(12, 0, 1, STUDENT_A, 100))
+    indexer.sync()
+
+    mock_contract.events.GradeRecorded.get_logs.assert_called_once_with(fromBlock=11, toBlock=12)
+    assert indexer.get_average_grade(1, STUDENT_A) == 90
+
+def test_reorg_rolls_back_orphaned_blocks(indexer, mock_w3, chain, logs):
+    logs['GradeRecorded'] += [grade_log(2, 0, 1, STUDENT_A, 80), grade_log(9, 0, 1, STUDENT_A, 40)]
+    indexer.sync()
+    assert indexer.get_average_grade(1) == 60
+
+    # Blocks 9 and 10 are replaced; the grade in block 9 disappears
+    chain[9] = HexBytes(b'\xff' * 32)
+    chain[10] = HexBytes(b'\xfe' * 32)
+    logs['GradeRecorded'].pop()
+    indexer.sync()
+
+    assert indexer.get_average_grade(1) == 80
+    assert indexer.checkpoint == 10
+
+def test_background_sync_and_freshness(mock_w3, mock_contract, logs, tmp_path):
+    now = [100.0]
+    indexer = EventIndexer(mock_w3, mock_contract, str(tmp_path / 'events.db'), batch_size=4, clock=lambda: now[0])
+    logs['GradeRecorded'].append(grade_log(2, 0, 1, STUDENT_A, 80))
+    assert not indexer.is_current(30)
+
+    indexer.start(poll_interval=0.01)
+    deadline = time.monotonic() + 5
+    while indexer.synced_at is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    indexer.stop()
+
+    assert indexer.is_current(30)
+    # The reader connection sees what the sync thread committed
+    assert indexer.get_average_grade(1) == 80
+    now[0] += 31
+    assert not indexer.is_current(30)
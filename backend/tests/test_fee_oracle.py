@@ -0,0 +1,114 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from fee_oracle import AsyncFeeOracle, FeeOracle
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def w3():
+    w3 = MagicMock()
+    w3.eth.fee_history.return_value = {'baseFeePerGas': [90, 100], 'reward': [[1], [3], [2]]}
+    w3.eth.estimate_gas.return_value = 100000
+    return w3
+
+
+def contract_function(data='0x12345678' + '00' * 64):
+    function = MagicMock()
+    function.build_transaction.side_effect = lambda params: dict(params, to='0xAbC', data=data)
+    return function
+
+
+def test_fees_cached_until_next_block(w3, clock):
+    oracle = FeeOracle(w3, block_ttl=2.0, clock=clock)
+
+    assert oracle.fees() == {'maxPriorityFeePerGas': 2, 'maxFeePerGas': 202}
+    oracle.fees()
+    assert w3.eth.fee_history.call_count == 1
+
+    clock.now = 3
+    oracle.fees()
+    assert w3.eth.fee_history.call_count == 2
+
+
+def test_legacy_chain_uses_gas_price(w3, clock):
+    w3.eth.fee_history.return_value = {'baseFeePerGas': [0, 0], 'reward': []}
+    w3.eth.gas_price = 7
+
+    assert FeeOracle(w3, clock=clock).fees() == {'gasPrice': 7}
+
+
+def test_gas_estimate_cached_per_selector_and_size(w3, clock):
+    oracle = FeeOracle(w3, gas_margin=1.2, clock=clock)
+
+    transaction = oracle.build_transaction(contract_function(), {'from': '0x1', 'nonce': 3})
+    assert transaction['gas'] == 120000
+    assert transaction['maxFeePerGas'] == 202
+    assert transaction['nonce'] == 3
+
+    oracle.build_transaction(contract_function(), {'from': '0x1', 'nonce': 4})
+    assert w3.eth.estimate_gas.call_count == 1
+
+    # A bigger batch encodes to longer calldata and gets its own estimate
+    oracle.build_transaction(contract_function('0x12345678' + '00' * 640), {'from': '0x1', 'nonce': 5})
+    assert w3.eth.estimate_gas.call_count == 2
+
+
+def test_gas_estimate_expires_and_is_dropped_after_out_of_gas(w3, clock):
+    oracle = FeeOracle(w3, estimate_ttl=60.0, clock=clock)
+
+    transaction = oracle.build_transaction(contract_function(), {'from': '0x1', 'nonce': 3})
+    clock.now = 61
+    oracle.build_transaction(contract_function(), {'from': '0x1', 'nonce': 4})
+    assert w3.eth.estimate_gas.call_count == 2
+
+    # A revert that did not use up the gas limit keeps the estimate
+    oracle.observe_receipt(transaction, {'status': 0, 'gasUsed': 50000})
+    oracle.build_transaction(contract_function(), {'from': '0x1', 'nonce': 5})
+    assert w3.eth.estimate_gas.call_count == 2
+
+    # Running out of gas drops it, also when the node returns the transaction with 'input' bytes
+    mined = {'to': transaction['to'], 'input': bytes.fromhex(transaction['data'][2:]), 'gas': transaction['gas']}
+    oracle.observe_receipt(mined, {'status': 0, 'gasUsed': transaction['gas']})
+    oracle.build_transaction(contract_function(), {'from': '0x1', 'nonce': 6})
+    assert w3.eth.estimate_gas.call_count == 3
+
+
+def test_bump_raises_both_fees_by_at_least_ten_percent(w3, clock):
+    oracle = FeeOracle(w3, clock=clock)
+    transaction = {'nonce': 3, 'gas': 21000, 'maxFeePerGas': 1000, 'maxPriorityFeePerGas': 10}
+
+    bumped = oracle.bump(transaction, factor=1.05)
+
+    assert bumped['maxFeePerGas'] == 1100
+    assert bumped['maxPriorityFeePerGas'] == 11
+    assert bumped['nonce'] == 3
+
+
+@pytest.mark.asyncio
+async def test_async_oracle_shares_the_caches(clock):
+    w3 = MagicMock()
+    w3.eth.fee_history = AsyncMock(return_value={'baseFeePerGas': [90, 100], 'reward': [[1], [3], [2]]})
+    w3.eth.estimate_gas = AsyncMock(return_value=100000)
+    oracle = AsyncFeeOracle(w3, clock=clock)
+    function = MagicMock()
+    function.build_transaction = AsyncMock(side_effect=lambda params: dict(params, to='0xAbC', data='0x12345678'))
+
+    for nonce in (3, 4):
+        transaction = await oracle.build_transaction(function, {'from': '0x1', 'nonce': nonce})
+    assert (transaction['gas'], transaction['maxFeePerGas'], transaction['nonce']) == (120000, 202, 4)
+    w3.eth.fee_history.assert_awaited_once()
+    w3.eth.estimate_gas.assert_awaited_once()
+    assert (await oracle.bump(transaction))['maxFeePerGas'] == 228
@@ -0,0 +1,69 @@
+import threading
+
+from flask import Flask
+
+from metrics import MetricsRegistry, REGISTRY, SamplingProfiler, instrument_flask, rpc_metrics_middleware
+
+
+def test_render_counters_histograms_and_gauges():
+    registry = MetricsRegistry()
+    registry.inc('rpc_errors_total', help_text='Errors', method='eth_call')
+    registry.inc('rpc_errors_total', method='eth_call')
+    for seconds in (0.004, 0.02, 3):
+        registry.observe('contract_call_seconds', seconds, function='getGrades')
+    registry.gauge('pending_transactions', lambda: 7)
+    registry.gauge('cache_hit_ratio', lambda: {(('cache', 'calls'),): 0.75, (('cache', 'abis'),): None})
+    registry.gauge('broken', lambda: 1 / 0)
+
+    lines = registry.render().splitlines()
+
+    assert '# HELP rpc_errors_total Errors' in lines
+    assert 'rpc_errors_total{method="eth_call"} 2' in lines
+    assert 'contract_call_seconds_bucket{function="getGrades",le="0.005"} 1' in lines
+    assert 'contract_call_seconds_bucket{function="getGrades",le="2.5"} 2' in lines
+    assert 'contract_call_seconds_bucket{function="getGrades",le="+Inf"} 3' in lines
+    assert 'contract_call_seconds_count{function="getGrades"} 3' in lines
+    assert 'pending_transactions 7' in lines
+    assert 'cache_hit_ratio{cache="calls"} 0.75' in lines
+    assert not any(line.startswith('cache_hit_ratio{cache="abis"}') for line in lines)
+    assert not any(line.startswith('broken') for line in lines)
+
+
+def test_flask_requests_count_their_rpc_calls():
+    REGISTRY.clear()
+    make_request = rpc_metrics_middleware(lambda method, params: {'result': '0x1'}, None)
+    app = instrument_flask(Flask(__name__))
+
+    @app.route('/grades/<int:course_id>')
+    def grades(course_id):
+        for _ in range(course_id):
+            make_request('eth_call', [])
+        return 'ok'
+
+    client = app.test_client()
+    client.get('/grades/3')
+    make_request('eth_blockNumber', [])
+
+    calls = REGISTRY.get('http_request_rpc_calls', endpoint='/grades/<int:course_id>')
+    assert (calls.total, calls.sum) == (1, 3)
+    assert REGISTRY.get('rpc_request_seconds', method='eth_call').total == 3
+    assert REGISTRY.get('http_request_seconds', endpoint='/grades/<int:course_id>', method='GET', status=200).total == 1
+
+
+def test_sampling_profiler_sees_other_threads():
+    profiler = SamplingProfiler()
+    stop = threading.Event()
+
+    def busy_worker():
+        while not stop.is_set():
+            stop.wait(0.001)
+
+    thread = threading.Thread(target=busy_worker)
+    thread.start()
+    try:
+        profiler.sample()
+    finally:
+        stop.set()
+        thread.join()
+
+    assert 'test_metrics.py:busy_worker' in profiler.collapsed()
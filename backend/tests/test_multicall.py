@@ -0,0 +1,85 @@
+import pytest
+from unittest.mock import MagicMock
+from web3 import Web3
+from web3.exceptions import ContractLogicError
+from multicall import Multicall
+
+STATISTICS_ABI = [
+    {
+        'name': 'getAverageGrade',
+        'type': 'function',
+        'stateMutability': 'view',
+        'inputs': [{'name': '_courseId', 'type': 'uint256'}],
+        'outputs': [{'name': '', 'type': 'uint256'}]
+    },
+    {
+        'name': 'getCourseDetails',
+        'type': 'function',
+        'stateMutability': 'view',
+        'inputs': [{'name': '_courseId', 'type': 'uint256'}],
+        'outputs': [{
+            'name': '',
+            'type': 'tuple',
+            'components': [
+                {'name': 'id', 'type': 'uint256'},
+                {'name': 'name', 'type': 'string'},
+                {'name': 'instructor', 'type': 'address'}
+            ]
+        }]
+    }
+]
+
+INSTRUCTOR = '0x' + 'ab' * 20
+
+@pytest.fixture
+def w3():
+    return Web3(Web3.HTTPProvider('http://127.0.0.1:8545'))
+
+@pytest.fixture
+def contract(w3):
+    return w3.eth.contract(address='0x' + '11' * 20, abi=STATISTICS_ABI)
+
+def encode_results(w3, results):
+    return w3.codec.encode(['(bool,bytes)[]'], [results])
+
+def test_aggregate3_decodes_results_in_order(mocker, w3, contract):
+    mocker.patch.object(w3.eth, 'get_code', return_value=b'\x60\x80')
+    eth_call = mocker.patch.object(w3.eth, 'call', return_value=encode_results(w3, [
+        (True, w3.codec.encode(['uint256'], [85])),
+        (True, w3.codec.encode(['(uint256,string,address)'], [(1, 'Math 101', INSTRUCTOR)]))
+    ]))
+
+    results = Multicall(w3).call([
+        (contract, 'getAverageGrade', [1]),
+        (contract, 'getCourseDetails', [1])
+    ])
+
+    assert results == [85, (1, 'Math 101', Web3.to_checksum_address(INSTRUCTOR))]
+    eth_call.assert_called_once()
+
+def test_aggregate3_failed_call(mocker, w3, contract):
+    mocker.patch.object(w3.eth, 'get_code', return_value=b'\x60\x80')
+    mocker.patch.object(w3.eth, 'call', return_value=encode_results(w3, [
+        (False, b''),
+        (True, w3.codec.encode(['uint256'], [90]))
+    ]))
+    calls = [(contract, 'getAverageGrade', [1]), (contract, 'getAverageGrade', [2])]
+
+    assert Multicall(w3).call(calls, allow_failure=True) == [None, 90]
+    with pytest.raises(ContractLogicError):
+        Multicall(w3).call(calls)
+
+def test_json_rpc_batch_fallback(mocker, w3, contract):
+    mocker.patch.object(w3.eth, 'get_code', return_value=b'')
+    multicall = Multicall(w3, batch_size=2)
+    session = MagicMock()
+    session.post.side_effect = lambda url, json, timeout: MagicMock(json=MagicMock(return_value=[
+        {'jsonrpc': '2.0', 'id': request['id'], 'result': w3.codec.encode(['uint256'], [request['id']]).hex()}
+        for request in reversed(json)
+    ]))
+    multicall._session = session
+
+    results = multicall.call([(contract, 'getAverageGrade', [course_id]) for course_id in range(3)])
+
+    assert results == [1, 2, 3]
+    assert session.post.call_count == 2
@@ -0,0 +1,159 @@
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import requests
+
+from outbox import FAILED, QUEUED, RUNNING, SENT, Outbox, OutboxFull
+
+ALICE = '0xA'
+BOB = '0xB'
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_outbox(db_path=':memory:', **kwargs):
+    clock = Clock()
+    return Outbox(db_path, [ALICE, BOB], clock=clock, **kwargs), clock
+
+
+def enqueue(outbox, function_name, lane=None, **kwargs):
+    return outbox.enqueue('0xC', '[]', function_name, [1, 'x'], lane=lane, **kwargs)
+
+
+def test_jobs_of_one_signer_go_out_in_order():
+    outbox, _ = make_outbox()
+    first = enqueue(outbox, 'first', ALICE)
+    second = enqueue(outbox, 'second', ALICE)
+    other = enqueue(outbox, 'other', BOB)
+
+    assert outbox.claim().id == first.id
+    # Alice's second job waits for the first; Bob's lane is independent
+    assert outbox.claim().id == other.id
+    assert outbox.claim() is None
+
+    outbox.complete(first.id, '0xabc')
+    job = outbox.claim()
+    assert (job.id, job.function_name, job.args, job.state) == (second.id, 'second', [1, 'x'], RUNNING)
+    assert outbox.get(first.id).tx_hash == '0xabc'
+
+
+def test_new_jobs_go_to_the_least_loaded_signer():
+    outbox, _ = make_outbox()
+    assert [enqueue(outbox, 'f').lane for _ in range(4)] == [ALICE, BOB, ALICE, BOB]
+
+
+def test_retryable_errors_back_off_and_block_the_lane():
+    outbox, clock = make_outbox(max_attempts=2, retry_delay=5)
+    job = enqueue(outbox, 'first', ALICE)
+    enqueue(outbox, 'second', ALICE)
+
+    job = outbox.fail(outbox.claim(), requests.ConnectionError('node unreachable'))
+    assert (job.state, job.next_attempt, job.error) == (QUEUED, 1005.0, 'node unreachable')
+    assert outbox.claim() is None
+
+    clock.now = 1005.0
+    retried = outbox.claim()
+    assert (retried.id, retried.attempts) == (job.id, 2)
+    assert outbox.fail(retried, requests.ConnectionError('still down')).state == FAILED
+    assert outbox.claim().function_name == 'second'
+
+
+def test_signed_job_is_retried_with_the_stored_transaction():
+    outbox, clock = make_outbox()
+    job = enqueue(outbox, 'recordGrade')
+    outbox.claim()
+    outbox.record_signed(job.id, b'\x12\x34', b'\xf8\x01', 3)
+
+    # Normally final, but the stored transaction may already be pooled: resend it instead
+    job = outbox.fail(outbox.get(job.id), ValueError('already known'))
+    assert (job.state, job.raw_transaction, job.tx_hash) == (QUEUED, '0xf801', '0x1234')
+
+    clock.now += 10
+    outbox.clear_signed(outbox.claim().id)
+    assert outbox.get(job.id).raw_transaction is None
+
+
+def test_lanes_are_normalized_and_validated():
+    outbox, _ = make_outbox()
+    assert outbox.lane_for('0xa') == ALICE
+    assert enqueue(outbox, 'f', '0xb').lane == BOB
+    with pytest.raises(ValueError):
+        enqueue(outbox, 'f', '0xD')
+
+
+def test_reverts_fail_without_retry():
+    outbox, _ = make_outbox()
+    enqueue(outbox, 'recordGrade')
+    job = outbox.fail(outbox.claim(), ValueError('execution reverted: Only teachers'))
+    assert (job.state, job.attempts) == (FAILED, 1)
+
+
+def test_idempotency_keys_and_backpressure():
+    outbox, _ = make_outbox(max_pending=2)
+    job = enqueue(outbox, 'f', idempotency_key='request-1')
+    assert enqueue(outbox, 'f', idempotency_key='request-1').id == job.id
+    enqueue(outbox, 'g')
+    with pytest.raises(OutboxFull):
+        enqueue(outbox, 'h')
+    # A known key is still answered when the outbox is full
+    assert enqueue(outbox, 'f', idempotency_key='request-1').id == job.id
+    assert outbox.stats() == {QUEUED: 2, RUNNING: 0, SENT: 0, FAILED: 0}
+
+
+def test_signed_job_is_rebroadcast_after_restart(tmp_path):
+    db_path = str(tmp_path / 'outbox.db')
+    outbox, _ = make_outbox(db_path)
+    job = enqueue(outbox, 'recordGrade', meta={'chat_id': 7})
+    outbox.claim()
+    outbox.record_signed(job.id, b'\x12\x34', b'\xf8\x01', 3)
+    outbox.db.close()
+
+    restarted, _ = make_outbox(db_path)
+    submit = MagicMock(side_effect=lambda job: job.tx_hash)
+    job = restarted.process(submit)
+
+    recovered = submit.call_args.args[0]
+    assert (recovered.raw_transaction, recovered.tx_hash, recovered.nonce, recovered.meta) == (
+        '0xf801', '0x1234', 3, {'chat_id': 7}
+    )
+    assert (job.state, job.tx_hash, job.attempts) == (SENT, '0x1234', 2)
+
+
+def test_workers_drain_the_outbox():
+    outbox, _ = make_outbox()
+    outbox.poll_interval = 0.01
+    finished = []
+    done = threading.Event()
+
+    def on_finished(job):
+        finished.append(job)
+        if len(finished) == 3:
+            done.set()
+
+    outbox.start(lambda job: f'0x{job.id}', workers=2, on_finished=on_finished)
+    for name in ('a', 'b', 'c'):
+        enqueue(outbox, name, ALICE)
+    assert done.wait(5)
+    outbox.stop()
+
+    assert [(job.function_name, job.tx_hash) for job in finished] == [('a', '0x1'), ('b', '0x2'), ('c', '0x3')]
+
+
+@pytest.mark.asyncio
+async def test_process_async():
+    outbox, _ = make_outbox()
+    on_finished = AsyncMock()
+    enqueue(outbox, 'f')
+
+    job = await outbox.process_async(AsyncMock(return_value='0xfeed'), on_finished)
+
+    assert (job.state, job.tx_hash) == (SENT, '0xfeed')
+    on_finished.assert_awaited_once()
+    assert await outbox.process_async(AsyncMock()) is None
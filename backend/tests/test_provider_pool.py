@@ -0,0 +1,180 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from web3 import Web3
+
+import metrics
+from provider_pool import LatencyHistogram, ProviderPool, send_batch
+
+
+class FakeNode:
+    """Tiny JSON-RPC server standing in for a Hardhat/anvil node."""
+
+    def __init__(self, name, head=100, delay=0.0):
+        self.name = name
+        self.head = head
+        self.delay = delay
+        self.down = False
+        self.requests = []
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                # JSON-RPC batches are lists of requests answered with a list
+                batch = payload if isinstance(payload, list) else [payload]
+                node.requests.extend(request['method'] for request in batch)
+                if node.down:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                time.sleep(node.delay)
+                replies = [self.reply(request) for request in batch]
+                body = json.dumps(replies if isinstance(payload, list) else replies[0]).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def reply(self, request):
+                block = request['params'][-1] if request['method'] == 'eth_call' else None
+                if request['method'] == 'eth_blockNumber':
+                    reply = {'result': hex(node.head)}
+                elif isinstance(block, str) and block.startswith('0x') and int(block, 16) > node.head:
+                    reply = {'error': {'code': -32000, 'message': 'header not found'}}
+                else:
+                    # eth_call answers with the node name so tests can see who responded
+                    reply = {'result': '0x' + node.name.encode().hex()}
+                return dict(reply, jsonrpc='2.0', id=request['id'])
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def nodes():
+    started = [FakeNode('a'), FakeNode('b'), FakeNode('c')]
+    yield started
+    for node in started:
+        node.close()
+
+
+def make_pool(nodes, **kwargs):
+    kwargs.setdefault('health_interval', 0)
+    return ProviderPool([node.url for node in nodes], **kwargs)
+
+
+def eth_call(pool):
+    return bytes(Web3(pool).eth.call({'to': '0x' + '00' * 20, 'data': '0x'})).decode()
+
+
+def test_reads_go_to_fastest_endpoint(nodes):
+    nodes[0].delay = 0.05
+    nodes[2].delay = 0.05
+    pool = make_pool(nodes, hedge_after=1)
+    # Let every endpoint get a latency sample
+    for _ in range(3):
+        pool.check_health()
+
+    assert {eth_call(pool) for _ in range(5)} == {'b'}
+    pool.shutdown()
+
+
+def test_fails_over_on_errors(nodes):
+    nodes[0].down = True
+    nodes[1].delay = 0.01
+    nodes[2].delay = 0.01
+    pool = make_pool(nodes, max_failures=1)
+
+    assert eth_call(pool) in ('b', 'c')
+    assert pool.stats()['failovers'] == 1
+    # The failing node is taken out of rotation
+    assert not pool.endpoints[0].healthy
+    pool.shutdown()
+
+
+def test_hedges_slow_eth_call(nodes):
+    nodes[0].delay = 1.0
+    pool = make_pool(nodes[:2], hedge_after=0.05)
+
+    started = time.perf_counter()
+    response = pool.make_request('eth_call', [{'to': '0x' + '00' * 20, 'data': '0x'}, 'latest'])
+    assert bytes.fromhex(response['result'][2:]) == b'b'
+    assert time.perf_counter() - started < 0.9
+    assert pool.stats()['hedges'] == 1
+    pool.shutdown()
+
+
+def test_health_check_drops_lagging_node(nodes):
+    nodes[1].head = 90
+    pool = make_pool(nodes, max_lag=3)
+
+    pool.check_health()
+
+    assert [endpoint.healthy for endpoint in pool.endpoints] == [True, False, True]
+    assert pool.endpoint_uri != nodes[1].url
+    pool.shutdown()
+
+
+def test_block_pinned_reads_avoid_lagging_nodes(nodes):
+    nodes[0].head = 99
+    nodes[2].delay = 0.05
+    pool = make_pool(nodes, max_lag=3)
+    call = [{'to': '0x' + '00' * 20, 'data': '0x'}, hex(100)]
+
+    # Head unknown yet: node a is tried first, answers "header not found" and the call fails over
+    response = pool.make_request('eth_call', call)
+    assert bytes.fromhex(response['result'][2:]) == b'b'
+    assert pool.endpoints[0].head == 99
+
+    # With heads known, pinned reads go straight to a node that has the block
+    pool.check_health()
+    nodes[0].requests.clear()
+    for _ in range(3):
+        assert 'result' in pool.make_request('eth_call', call)
+    assert 'eth_call' not in nodes[0].requests
+    pool.shutdown()
+
+
+def test_batches_fail_over_and_are_recorded_in_metrics(nodes):
+    pool = make_pool(nodes)
+    for endpoint, latency in zip(pool.endpoints, (0.01, 0.02, 0.03)):
+        endpoint.latency = latency
+    nodes[0].down = True
+    nodes[1].head = 90
+    batch = [
+        {'jsonrpc': '2.0', 'id': i, 'method': 'eth_call', 'params': [{'to': '0x' + '00' * 20}, hex(95)]}
+        for i in range(2)
+    ]
+    before = metrics.REGISTRY.get('rpc_request_seconds', method='batch')
+    before = before.total if before is not None else 0
+
+    responses = send_batch(Web3(pool), batch)
+
+    # a is down and b has not reached block 95, so c answers the whole batch
+    assert [bytes.fromhex(response['result'][2:]).decode() for response in responses] == ['c', 'c']
+    assert pool.failovers == 2
+    assert pool.endpoints[0].errors == 1
+    assert metrics.REGISTRY.get('rpc_request_seconds', method='batch').total == before + 1
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    for seconds in (0.004, 0.02, 0.02, 0.3, 20):
+        histogram.observe(seconds)
+
+    assert histogram.quantile(0.5) == 0.025
+    assert histogram.quantile(0.8) == 0.5
+    assert histogram.to_dict()['buckets']['+Inf'] == 1
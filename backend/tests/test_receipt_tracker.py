@@ -0,0 +1,194 @@
+import pytest
+from unittest.mock import MagicMock
+from hexbytes import HexBytes
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+from receipt_tracker import ReceiptTracker, TransactionReplaced
+from transaction_pipeline import NonceManager, TransactionDropped
+
+SENDER = '0xabc'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def tx(i):
+    return HexBytes(i.to_bytes(32, 'big'))
+
+
+def receipt(tx_hash, block_number, status=1, block_hash=b'\x01'):
+    return {'transactionHash': tx_hash, 'blockNumber': block_number, 'blockHash': HexBytes(block_hash), 'status': status}
+
+
+@pytest.fixture
+def chain():
+    # Minimal chain: receipts and blocks are looked up from these dicts
+    chain = MagicMock()
+    chain.receipts = {}
+    chain.blocks = {}
+    chain.eth.block_number = 100
+    chain.eth.get_transaction_count.return_value = 0
+
+    def get_transaction_receipt(tx_hash):
+        if tx_hash not in chain.receipts:
+            raise TransactionNotFound(tx_hash)
+        return chain.receipts[tx_hash]
+
+    chain.eth.get_transaction_receipt.side_effect = get_transaction_receipt
+    chain.eth.get_block.side_effect = lambda number: {'transactions': chain.blocks.get(number, [])}
+    return chain
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_tracker(chain, clock, **kwargs):
+    return ReceiptTracker(chain, NonceManager(chain, SENDER), clock=clock, autostart=False, **kwargs)
+
+
+def test_resolves_all_pending_from_one_block_scan(chain, clock):
+    tracker = make_tracker(chain, clock)
+    handles = [tracker.track(tx(i), nonce=i, sender=SENDER) for i in range(3)]
+    tracker.poll()
+    assert not any(handle.done() for handle in handles)
+
+    chain.eth.block_number = 101
+    chain.blocks[101] = [tx(0), tx(2), tx(99)]
+    chain.receipts.update({tx(0): receipt(tx(0), 101), tx(2): receipt(tx(2), 101, status=0)})
+    tracker.poll()
+
+    chain.eth.get_block.assert_called_once_with(101)
+    assert handles[0].result(timeout=0)['status'] == 1
+    assert handles[2].result(timeout=0)['status'] == 0
+    assert not handles[1].done()
+    assert tracker.status(tx(2))['status'] == 'failed'
+    assert tracker.status(tx(1))['status'] == 'pending'
+
+
+def test_already_mined_transaction_resolves_on_first_poll(chain, clock):
+    chain.receipts[tx(1)] = receipt(tx(1), 99)
+    tracker = make_tracker(chain, clock)
+
+    handle = tracker.track(tx(1))
+    tracker.poll()
+
+    assert handle.result(timeout=0) == chain.receipts[tx(1)]
+
+
+def test_waits_for_confirmations_and_follows_reorg(chain, clock):
+    tracker = make_tracker(chain, clock, confirmations=3)
+    chain.receipts[tx(1)] = receipt(tx(1), 100)
+    handle = tracker.track(tx(1))
+    tracker.poll()
+    assert tracker.status(tx(1)) == {'status': 'mined', 'blockNumber': 100, 'transactionHash': tx(1).hex(), 'confirmations': 1}
+
+    # Reorged into a different block before reaching depth 3
+    chain.eth.block_number = 102
+    chain.receipts[tx(1)] = receipt(tx(1), 101, block_hash=b'\x02')
+    tracker.poll()
+    assert not handle.done()
+
+    chain.eth.block_number = 103
+    tracker.poll()
+    assert handle.result(timeout=0)['blockHash'] == HexBytes(b'\x02')
+    assert tracker.status(tx(1))['status'] == 'confirmed'
+
+
+def test_detects_replacement(chain, clock):
+    tracker = make_tracker(chain, clock)
+    handle = tracker.track(tx(1), nonce=4, sender=SENDER)
+    tracker.poll()
+
+    chain.eth.get_transaction_count.return_value = 5
+    chain.eth.block_number = 101
+    tracker.poll()
+
+    with pytest.raises(TransactionReplaced):
+        handle.result(timeout=0)
+    assert tracker.status(tx(1))['status'] == 'replaced'
+    chain.eth.get_transaction_count.assert_called_with(SENDER, 'pending')
+
+
+def test_rebroadcasts_forgotten_transaction_then_drops(chain, clock):
+    chain.eth.get_transaction.side_effect = TransactionNotFound()
+    tracker = make_tracker(chain, clock, timeout=10, max_rebroadcasts=1)
+    handle = tracker.track(tx(1), nonce=0, raw_transaction=b'raw', sender=SENDER)
+
+    clock.now = 11
+    tracker.poll()
+    chain.eth.send_raw_transaction.assert_called_once_with(b'raw')
+    assert not handle.done()
+
+    clock.now = 22
+    tracker.poll()
+    with pytest.raises(TransactionDropped):
+        handle.result(timeout=0)
+
+
+def test_times_out_stuck_transaction(chain, clock):
+    tracker = make_tracker(chain, clock, timeout=10)
+    handle = tracker.track(tx(1))
+
+    clock.now = 11
+    tracker.poll()
+
+    with pytest.raises(TimeExhausted):
+        handle.result(timeout=0)
+    assert tracker.status(tx(1))['status'] == 'timeout'
+
+
+def test_background_poller(chain, clock):
+    chain.receipts[tx(1)] = receipt(tx(1), 100)
+    tracker = ReceiptTracker(chain, poll_interval=0.01, clock=clock)
+
+    handle = tracker.track(tx(1))
+
+    assert handle.result(timeout=5)['status'] == 1
+    tracker.shutdown()
+
+
+def test_background_poller_logs_errors_and_keeps_polling(chain, clock, caplog):
+    chain.receipts[tx(1)] = receipt(tx(1), 100)
+    heads = iter([ConnectionError('node down')])
+
+    def block_number(_):
+        error = next(heads, None)
+        if error is not None:
+            raise error
+        return 100
+
+    type(chain.eth).block_number = property(block_number)
+    tracker = ReceiptTracker(chain, poll_interval=0.01, clock=clock)
+
+    handle = tracker.track(tx(1))
+
+    assert handle.result(timeout=5)['status'] == 1
+    tracker.shutdown()
+    assert 'Receipt poll failed' in caplog.text and 'node down' in caplog.text
+
+
+def test_stuck_transaction_is_replaced_with_bumped_fees(chain, clock):
+    bumped = {'nonce': 0, 'maxFeePerGas': 220}
+    on_stuck = MagicMock(return_value=(tx(2), b'raw2', bumped))
+    tracker = make_tracker(chain, clock, timeout=10, on_stuck=on_stuck)
+    handle = tracker.track(tx(1), nonce=0, raw_transaction=b'raw1', sender=SENDER, transaction={'nonce': 0, 'maxFeePerGas': 200})
+
+    clock.now = 11
+    tracker.poll()
+    on_stuck.assert_called_once_with(handle)
+    assert handle.tx_hash == tx(2)
+    assert tracker.status(tx(1)) == {'status': 'replaced', 'replacedBy': tx(2).hex(), 'transactionHash': tx(1).hex()}
+
+    # The original still wins the race: the handle resolves with its receipt
+    chain.eth.block_number = 101
+    chain.blocks[101] = [tx(1)]
+    chain.receipts[tx(1)] = receipt(tx(1), 101)
+    tracker.poll()
+    assert handle.result(timeout=0)['transactionHash'] == tx(1)
@@ -0,0 +1,66 @@
+from unittest.mock import MagicMock
+
+from eth_abi import abi as eth_abi
+from hexbytes import HexBytes
+from web3 import Web3
+
+from role_cache import ROLE_ASSIGNED, ROLE_GRANTED, ROLE_HASHES, ROLE_REVOKED, RoleCache
+
+GRADES = Web3.to_checksum_address('0x' + '11' * 20)
+COURSES = Web3.to_checksum_address('0x' + '22' * 20)
+TEACHER = Web3.to_checksum_address('0x' + '33' * 20)
+ADMIN = Web3.to_checksum_address('0x' + '44' * 20)
+
+
+def address_topic(address):
+    return HexBytes(bytes(12) + HexBytes(address))
+
+
+def role_log(event, contract, role, account, block, log_index=0):
+    return {
+        'address': contract, 'blockNumber': block, 'logIndex': log_index, 'data': HexBytes(b''),
+        'topics': [event, ROLE_HASHES[role], address_topic(account), address_topic(ADMIN)]
+    }
+
+
+def assigned_log(contract, account, role_value, block):
+    return {
+        'address': contract, 'blockNumber': block, 'logIndex': 1,
+        'topics': [ROLE_ASSIGNED, address_topic(account)],
+        'data': HexBytes(eth_abi.encode(['uint8'], [role_value]))
+    }
+
+
+def test_grants_and_revokes_apply_in_chain_order():
+    cache = RoleCache(MagicMock(), [GRADES, COURSES])
+    cache.apply([
+        role_log(ROLE_REVOKED, GRADES, 'TEACHER_ROLE', TEACHER, 5),
+        role_log(ROLE_GRANTED, GRADES, 'TEACHER_ROLE', TEACHER, 3),
+        assigned_log(COURSES, TEACHER, 2, 4),
+    ])
+
+    assert not cache.has_role(GRADES, 'TEACHER_ROLE', TEACHER)
+    assert cache.has_role(COURSES, ROLE_HASHES['TEACHER_ROLE'], TEACHER.lower())
+    assert cache.roles_of(TEACHER) == {COURSES: ['TEACHER_ROLE']}
+
+
+def test_sync_replays_history_in_batches_and_answers_permission_checks():
+    w3 = MagicMock()
+    w3.eth.block_number = 25
+    w3.eth.get_logs.side_effect = [
+        [role_log(ROLE_GRANTED, GRADES, 'TEACHER_ROLE', TEACHER, 4)],
+        [role_log(ROLE_GRANTED, GRADES, 'ADMIN_ROLE', ADMIN, 12)],
+        []
+    ]
+    cache = RoleCache(w3, [GRADES, COURSES], batch_size=10)
+    assert cache.allows(GRADES, 'recordGrade', TEACHER) is None
+
+    assert cache.sync() == 25
+    assert w3.eth.get_logs.call_count == 3
+    assert w3.eth.get_logs.call_args_list[0][0][0]['address'] == [GRADES, COURSES]
+
+    assert cache.allows(GRADES, 'recordGrade', TEACHER) is True
+    assert cache.allows(GRADES, 'recordGrade', ADMIN) is False
+    assert cache.allows(GRADES, 'recordGrade(uint256,address,uint8)', ADMIN) is False
+    assert cache.allows(GRADES, 'getGrades', ADMIN) is None
+    assert cache.allows('0x' + '55' * 20, 'recordGrade', ADMIN) is None
@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+from unittest.mock import MagicMock
+from web3 import Web3
+
+from signer_pool import NonceLockService, SharedNonceManager, SignerPool
+
+KEYS = ['0x' + f'{i:064x}' for i in range(1, 4)]
+
+
+@pytest.fixture
+def w3():
+    # Real account derivation, mocked node
+    w3 = MagicMock()
+    w3.eth.account = Web3().eth.account
+    w3.eth.get_transaction_count.return_value = 5
+    return w3
+
+
+def test_routes_to_least_loaded_signer(w3):
+    pool = SignerPool(w3, KEYS)
+
+    first = [pool.acquire() for _ in range(3)]
+    assert len({signer.address for signer in first}) == 3
+
+    pool.done(first[1])
+    assert pool.acquire() is first[1]
+    assert pool.stats()[first[0].address] == 1
+
+
+def test_acquire_pins_requested_signer(w3):
+    pool = SignerPool(w3, KEYS)
+    busy = pool.acquire()
+
+    assert pool.acquire(busy.address.lower()) is busy
+    assert pool.stats()[busy.address] == 2
+
+
+def test_each_signer_has_its_own_nonces(w3):
+    pool = SignerPool(w3, KEYS[:2])
+    a, b = pool.signers
+
+    assert [a.nonce_manager.next_nonce() for _ in range(2)] == [5, 6]
+    assert b.nonce_manager.next_nonce() == 5
+
+
+def test_lock_service_shared_between_replicas(w3, tmp_path):
+    db_path = str(tmp_path / 'nonces.db')
+    # Two "replicas" with their own connections to the same file
+    replicas = [SignerPool(w3, KEYS[:1], NonceLockService(db_path)) for _ in range(2)]
+    nonces = []
+    lock = threading.Lock()
+
+    def send(pool):
+        for _ in range(25):
+            nonce = pool.primary.nonce_manager.next_nonce()
+            with lock:
+                nonces.append(nonce)
+
+    threads = [threading.Thread(target=send, args=(pool,)) for pool in replicas]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(nonces) == list(range(5, 55))
+    # The node is only asked once, for the first reservation
+    assert w3.eth.get_transaction_count.call_count == 1
+
+
+def test_lock_service_release_and_resync(w3, tmp_path):
+    address = w3.eth.account.from_key(KEYS[0]).address
+    manager = SharedNonceManager(w3, address, NonceLockService(str(tmp_path / 'nonces.db')))
+
+    assert [manager.next_nonce() for _ in range(3)] == [5, 6, 7]
+    manager.release(6)
+    assert manager.next_nonce() == 6
+    assert manager.next_nonce() == 8
+
+    w3.eth.get_transaction_count.return_value = 20
+    assert manager.resync() == 20
+    assert manager.next_nonce() == 20
+
+
+def test_lock_service_resync_never_moves_backwards(w3, tmp_path):
+    address = w3.eth.account.from_key(KEYS[0]).address
+    manager = SharedNonceManager(w3, address, NonceLockService(str(tmp_path / 'nonces.db')))
+    assert [manager.next_nonce() for _ in range(4)] == [5, 6, 7, 8]
+    manager.release(6)
+    manager.release(8)
+
+    # The node has seen nonces up to 6, but 7 is still held by another replica
+    w3.eth.get_transaction_count.return_value = 7
+    assert manager.resync() == 9
+    # 6 was taken on chain meanwhile; 8 is still a gap to fill
+    assert manager.next_nonce() == 8
+    assert manager.next_nonce() == 9
+
+
+def test_unauthorized_signers(w3):
+    pool = SignerPool(w3, KEYS[:2])
+    authorized = pool.signers[0].address
+    access_control = MagicMock()
+    access_control.functions.hasRole.side_effect = lambda role, address: MagicMock(
+        call=MagicMock(return_value=role == 'teacher' and address == authorized)
+    )
+
+    assert pool.unauthorized(access_control, ['teacher', 'admin']) == [pool.signers[1].address]
@@ -0,0 +1,65 @@
+import pytest
+from unittest.mock import MagicMock
+from eth_abi import abi as eth_abi
+from eth_utils import function_signature_to_4byte_selector
+from web3.exceptions import ContractLogicError
+
+from simulation import SimulationFailed, Simulator, decode_revert
+
+SENDER = '0x' + '11' * 20
+UNAUTHORIZED_ABI = [{
+    'type': 'error',
+    'name': 'AccessControlUnauthorizedAccount',
+    'inputs': [{'name': 'account', 'type': 'address'}, {'name': 'neededRole', 'type': 'bytes32'}]
+}]
+
+
+def error_data(reason):
+    return '0x08c379a0' + eth_abi.encode(['string'], [reason]).hex()
+
+
+def unauthorized_data():
+    selector = function_signature_to_4byte_selector('AccessControlUnauthorizedAccount(address,bytes32)')
+    return '0x' + (selector + eth_abi.encode(['address', 'bytes32'], [SENDER, b'\x01' * 32])).hex()
+
+
+def test_decode_revert_reasons():
+    assert decode_revert(error_data('Course is full')) == 'Course is full'
+    assert decode_revert('0x4e487b71' + eth_abi.encode(['uint256'], [0x11]).hex()) == 'panic 0x11: arithmetic overflow or underflow'
+    assert decode_revert(unauthorized_data(), UNAUTHORIZED_ABI) == (
+        f'AccessControlUnauthorizedAccount({SENDER}, 0x' + '01' * 32 + ')'
+    )
+    assert decode_revert(None) == 'execution reverted'
+
+
+def test_check_raises_with_decoded_reason():
+    simulator = Simulator(MagicMock())
+    contract_function = MagicMock(contract_abi=[])
+    contract_function.call.side_effect = ContractLogicError('execution reverted: Course is full', error_data('Course is full'))
+
+    with pytest.raises(SimulationFailed) as excinfo:
+        simulator.check(contract_function, SENDER)
+
+    assert excinfo.value.reason == 'Course is full'
+    contract_function.call.assert_called_once_with({'from': SENDER}, block_identifier='pending')
+
+
+def test_simulate_many_batches_with_sender():
+    session = MagicMock()
+    session.post.side_effect = lambda url, json, timeout: MagicMock(json=MagicMock(return_value=[
+        # Hardhat nests the revert data; answers arrive out of order
+        {'id': request['id'], 'error': {'code': -32603, 'message': 'reverted', 'data': {'data': unauthorized_data()}}}
+        if request['params'][0]['data'] == '0xbad' else {'id': request['id'], 'result': '0x'}
+        for request in reversed(json)
+    ]))
+    contract = MagicMock(address='0x' + '22' * 20, abi=UNAUTHORIZED_ABI)
+    contract.encodeABI.side_effect = lambda fn_name, args: '0xbad' if args == ['bad'] else '0x00'
+    simulator = Simulator(MagicMock(), session=session, batch_size=2)
+
+    outcomes = simulator.simulate_many([(contract, 'recordGrades', [arg]) for arg in ('ok', 'bad', 'ok')], SENDER)
+
+    assert [outcome['ok'] for outcome in outcomes] == [True, False, True]
+    assert outcomes[1]['reason'].startswith('AccessControlUnauthorizedAccount(')
+    assert session.post.call_count == 2
+    first_batch = session.post.call_args_list[0].kwargs['json']
+    assert first_batch[0]['params'] == [{'from': SENDER, 'to': contract.address, 'data': '0x00'}, 'pending']
@@ -1,37 +1,154 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from telegram import Update
 from telegram.ext import CallbackContext
-from telegram_bot import start, call_function, send_transaction_command
+import telegram_bot
+from telegram_bot import (
+    RateLimiter, start, call_function, send_transaction_command, subscribe, broadcast_event, job_status, submit_job, job_finished
+)
+from event_feed import SubscriptionStore
+from outbox import Outbox
 
 @pytest.fixture
 def update():
-    return MagicMock(spec=Update)
+    update = MagicMock(spec=Update)
+    update.message.reply_text = AsyncMock()
+    update.effective_user.id = 1
+    update.effective_chat.id = 100
+    return update
 
 @pytest.fixture
 def context():
     return MagicMock(spec=CallbackContext)
 
-def test_start(update, context):
-    start(update, context)
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(telegram_bot, 'rate_limiter', RateLimiter(rate=1.0, burst=5))
+    monkeypatch.setattr(telegram_bot, 'subscriptions', SubscriptionStore())
+
+@pytest.mark.asyncio
+async def test_start(update, context):
+    await start(update, context)
     update.message.reply_text.assert_called_with('Привет! Я ваш бот для взаимодействия с Ethereum контрактами.')
 
+@pytest.mark.asyncio
 @patch('telegram_bot.get_contract_instance')
-@patch('telegram_bot.call_contract_function')
-def test_call_function(mock_call_contract_function, mock_get_contract_instance, update, context):
+@patch('telegram_bot.call_contract_function', new_callable=AsyncMock)
+async def test_call_function(mock_call_contract_function, mock_get_contract_instance, update, context):
     mock_get_contract_instance.return_value = MagicMock()
     mock_call_contract_function.return_value = 42
     context.args = ['0x123', '[]', 'myFunction']
 
-    call_function(update, context)
+    await call_function(update, context)
     update.message.reply_text.assert_called_with('Результат: 42')
 
+@pytest.mark.asyncio
 @patch('telegram_bot.get_contract_instance')
-@patch('telegram_bot.send_transaction')
-def test_send_transaction_command(mock_send_transaction, mock_get_contract_instance, update, context):
+@patch('telegram_bot.send_transaction', new_callable=AsyncMock)
+async def test_send_transaction_command(mock_send_transaction, mock_get_contract_instance, update, context):
     mock_get_contract_instance.return_value = MagicMock()
     mock_send_transaction.return_value = 'tx_hash'
     context.args = ['0x123', '[]', 'myFunction']
 
-    send_transaction_command(update, context)
+    await send_transaction_command(update, context)
     update.message.reply_text.assert_called_with('Транзакция отправлена с хэшем: tx_hash')
+    # Квитанция ожидается в фоновой задаче
+    context.application.create_task.assert_called_once()
+    context.application.create_task.call_args[0][0].close()
+
+@pytest.mark.asyncio
+@patch('telegram_bot.get_contract_instance')
+@patch('telegram_bot.call_contract_function', new_callable=AsyncMock)
+async def test_rate_limit(mock_call_contract_function, mock_get_contract_instance, update, context, monkeypatch):
+    monkeypatch.setattr(telegram_bot, 'rate_limiter', RateLimiter(rate=1.0, burst=2, clock=lambda: 0.0))
+    mock_call_contract_function.return_value = 42
+    context.args = ['0x123', '[]', 'myFunction']
+
+    for _ in range(3):
+        await call_function(update, context)
+    assert mock_call_contract_function.await_count == 2
+    assert update.message.reply_text.call_args[0][0].startswith('Слишком много запросов')
+
+def test_rate_limiter_refills():
+    now = [0.0]
+    limiter = RateLimiter(rate=2.0, burst=1, clock=lambda: now[0])
+    assert limiter.allow('a')
+    assert not limiter.allow('a')
+    assert limiter.allow('b')
+    assert limiter.retry_after('a') == pytest.approx(0.5)
+    now[0] = 0.5
+    assert limiter.allow('a')
+
+def test_rate_limiter_evicts_idle_buckets():
+    now = [0.0]
+    limiter = RateLimiter(rate=1.0, burst=2, clock=lambda: now[0])
+    for chat_id in range(100):
+        limiter.allow(chat_id)
+    now[0] = 1.5
+    limiter.allow('a')
+    assert len(limiter._buckets) == 101
+
+    # After burst / rate seconds every idle bucket is full again and can go
+    now[0] = 2.0
+    assert limiter.allow('b')
+    assert list(limiter._buckets) == ['a', 'b']
+
+@pytest.mark.asyncio
+async def test_subscribe_and_broadcast(update, context):
+    context.args = ['grades', '7']
+    await subscribe(update, context)
+    update.message.reply_text.assert_called_with('Подписка оформлена: оценки для курса 7')
+
+    bot = MagicMock()
+    bot.send_message = AsyncMock()
+    await broadcast_event(bot, 'grades', {'courseId': 7, 'student': '0xabc', 'grade': 90})
+    bot.send_message.assert_awaited_once_with(100, 'Новая оценка: курс 7, студент 0xabc, оценка 90')
+
+    bot.send_message.reset_mock()
+    await broadcast_event(bot, 'grades', {'courseId': 8, 'student': '0xabc', 'grade': 90})
+    bot.send_message.assert_not_awaited()
+
+@pytest.mark.asyncio
+@patch('telegram_bot.get_contract_instance')
+@patch('telegram_bot.get_signer_pool')
+@patch('telegram_bot.send_transaction', new_callable=AsyncMock)
+async def test_send_refused_by_role_cache(mock_send_transaction, mock_get_signer_pool, mock_get_contract_instance, update, context, monkeypatch):
+    mock_get_signer_pool.return_value.signers = [MagicMock(address='0xA'), MagicMock(address='0xB')]
+    cache = MagicMock()
+    cache.allows.return_value = False
+    monkeypatch.setattr(telegram_bot, 'role_cache', cache)
+    context.args = ['0x123', '[]', 'recordGrade', '1']
+
+    await send_transaction_command(update, context)
+    update.message.reply_text.assert_called_with('Ошибка: у отправителя нет роли TEACHER_ROLE')
+    mock_send_transaction.assert_not_awaited()
+
+@pytest.mark.asyncio
+@patch('telegram_bot.get_contract_instance')
+@patch('telegram_bot.send_transaction', new_callable=AsyncMock)
+async def test_send_goes_through_outbox(mock_send_transaction, mock_get_contract_instance, update, context, monkeypatch):
+    outbox = Outbox(':memory:', ['0xS'])
+    monkeypatch.setattr(telegram_bot, 'outbox', outbox)
+    mock_get_contract_instance.return_value.address = '0xC'
+    update.message.message_id = 5
+    context.args = ['0xC', '[]', 'recordGrade', '1']
+
+    await send_transaction_command(update, context)
+    # Telegram redelivering the same message does not queue it twice
+    await send_transaction_command(update, context)
+    update.message.reply_text.assert_called_with('Заявка #1 принята, статус: /job 1')
+    assert outbox.stats()['queued'] == 1
+    mock_send_transaction.assert_not_awaited()
+
+    mock_send_transaction.return_value = '0xfeed'
+    application = MagicMock()
+    application.bot.send_message = AsyncMock()
+    await outbox.process_async(submit_job, lambda job: job_finished(application, job))
+    assert mock_send_transaction.await_args.args[1:] == ('recordGrade', '1')
+    assert mock_send_transaction.await_args.kwargs['sender'] == '0xS'
+    application.bot.send_message.assert_awaited_with(100, 'Заявка #1: транзакция отправлена с хэшем 0xfeed')
+    application.create_task.call_args.args[0].close()
+
+    context.args = ['1']
+    await job_status(update, context)
+    update.message.reply_text.assert_called_with('Заявка #1: отправлена, попыток: 1, хэш 0xfeed')
@@ -0,0 +1,59 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from transaction_pipeline import AsyncNonceManager, NonceManager
+
+@pytest.fixture
+def mock_w3():
+    mock_w3 = MagicMock()
+    mock_w3.eth.get_transaction_count.return_value = 7
+    return mock_w3
+
+@pytest.fixture
+def nonce_manager(mock_w3):
+    return NonceManager(mock_w3, '0xabc')
+
+def test_next_nonce_counts_locally(nonce_manager, mock_w3):
+    assert [nonce_manager.next_nonce() for _ in range(3)] == [7, 8, 9]
+    mock_w3.eth.get_transaction_count.assert_called_once_with('0xabc', 'pending')
+
+def test_release_fills_gap(nonce_manager):
+    nonces = [nonce_manager.next_nonce() for _ in range(3)]
+    nonce_manager.release(nonces[0])
+    assert nonce_manager.next_nonce() == 7
+    assert nonce_manager.next_nonce() == 10
+
+def test_release_top_nonce_rewinds_counter(nonce_manager):
+    nonce_manager.next_nonce()
+    nonce_manager.next_nonce()
+    nonce_manager.release(8)
+    nonce_manager.release(7)
+    assert nonce_manager.next_nonce() == 7
+    assert nonce_manager.next_nonce() == 8
+
+def test_resync(nonce_manager, mock_w3):
+    nonce_manager.next_nonce()
+    mock_w3.eth.get_transaction_count.return_value = 20
+    assert nonce_manager.resync() == 20
+    assert nonce_manager.next_nonce() == 20
+
+def test_resync_keeps_outstanding_reservations(nonce_manager, mock_w3):
+    # 7 and 8 are reserved but not broadcast yet, so the node still reports 7
+    nonce_manager.next_nonce()
+    nonce_manager.next_nonce()
+    assert nonce_manager.resync() == 9
+    assert nonce_manager.next_nonce() == 9
+
+    # A released nonce the chain has moved past is never handed out again
+    nonce_manager.release(7)
+    mock_w3.eth.get_transaction_count.return_value = 8
+    assert nonce_manager.resync() == 10
+    assert nonce_manager.next_nonce() == 10
+
+@pytest.mark.asyncio
+async def test_async_resync_keeps_outstanding_reservations():
+    w3 = MagicMock()
+    w3.eth.get_transaction_count = AsyncMock(return_value=7)
+    nonce_manager = AsyncNonceManager(w3, '0xabc')
+    assert [await nonce_manager.next_nonce() for _ in range(2)] == [7, 8]
+    assert await nonce_manager.resync() == 9
+    assert await nonce_manager.next_nonce() == 9
@@ -0,0 +1,117 @@
+import asyncio
+import heapq
+import threading
+
+
+class TransactionDropped(Exception):
+    pass
+
+
+def is_nonce_error(error):
+    message = str(error).lower()
+    return 'nonce too low' in message or 'nonce has already been used' in message
+
+
+class NonceManager:
+    """Hands out nonces for one account locally instead of asking the node on every send."""
+
+    def __init__(self, w3, address):
+        self.w3 = w3
+        self.address = address
+        self._lock = threading.Lock()
+        self._next_nonce = None
+        # Nonces that were reserved but never reached the node, reused lowest first
+        self._released = []
+
+    def next_nonce(self):
+        with self._lock:
+            if self._released:
+                return heapq.heappop(self._released)
+            if self._next_nonce is None:
+                self._next_nonce = self.w3.eth.get_transaction_count(self.address, 'pending')
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    def release(self, nonce):
+        # Give back a nonce whose transaction never reached the node so the gap gets filled
+        with self._lock:
+            if self._next_nonce is None or nonce >= self._next_nonce or nonce in self._released:
+                return
+            heapq.heappush(self._released, nonce)
+            # Released nonces directly below the counter collapse back into it
+            while self._released and max(self._released) == self._next_nonce - 1:
+                self._released.remove(self._next_nonce - 1)
+                heapq.heapify(self._released)
+                self._next_nonce -= 1
+
+    def resync(self):
+        # Catch up with the node's pending count. Never moves backwards: nonces reserved but not
+        # broadcast yet are above that count. Released nonces the chain has passed are dropped
+        chain_nonce = self.w3.eth.get_transaction_count(self.address, 'pending')
+        with self._lock:
+            self._next_nonce, self._released = _resynced(self._next_nonce, self._released, chain_nonce)
+            return self._next_nonce
+
+
+class AsyncNonceManager:
+    """asyncio variant of NonceManager for AsyncWeb3 clients."""
+
+    def __init__(self, w3, address):
+        self.w3 = w3
+        self.address = address
+        self._lock = asyncio.Lock()
+        self._next_nonce = None
+        self._released = []
+
+    async def next_nonce(self):
+        async with self._lock:
+            if self._released:
+                return heapq.heappop(self._released)
+            if self._next_nonce is None:
+                self._next_nonce = await self.w3.eth.get_transaction_count(self.address, 'pending')
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    async def release(self, nonce):
+        async with self._lock:
+            if self._next_nonce is None or nonce >= self._next_nonce or nonce in self._released:
+                return
+            heapq.heappush(self._released, nonce)
+            while self._released and max(self._released) == self._next_nonce - 1:
+                self._released.remove(self._next_nonce - 1)
+                heapq.heapify(self._released)
+                self._next_nonce -= 1
+
+    async def resync(self):
+        chain_nonce = await self.w3.eth.get_transaction_count(self.address, 'pending')
+        async with self._lock:
+            self._next_nonce, self._released = _resynced(self._next_nonce, self._released, chain_nonce)
+            return self._next_nonce
+
+
+def _resynced(next_nonce, released, chain_nonce):
+    # New (next_nonce, released) after seeing the node's pending count
+    released = [nonce for nonce in released if nonce >= chain_nonce]
+    heapq.heapify(released)
+    return chain_nonce if next_nonce is None else max(next_nonce, chain_nonce), released
+
+
+class PendingTransaction:
+    """Handle for a broadcast transaction; result() blocks until its receipt is available."""
+
+    def __init__(self, tx_hash, nonce, raw_transaction):
+        self.tx_hash = tx_hash
+        self.nonce = nonce
+        self.raw_transaction = raw_transaction
+        self.future = None
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    def add_done_callback(self, callback):
+        self.future.add_done_callback(lambda _: callback(self))
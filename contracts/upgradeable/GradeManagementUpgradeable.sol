@@ -2,6 +2,7 @@
 pragma solidity ^0.8.9;
 
 import "./UniversityAccessControlUpgradeable.sol";
+import "./Pagination.sol";
 import "@openzeppelin/contracts-upgradeable/proxy/utils/Initializable.sol";
 
 contract GradeManagementUpgradeable is Initializable, UniversityAccessControlUpgradeable {
@@ -18,8 +19,8 @@ contract GradeManagementUpgradeable is Initializable, UniversityAccessControlUpg
         bool attended;
     }
 
-    mapping(uint256 => Grade[]) private grades;
-    mapping(uint256 => Attendance[]) private attendanceRecords;
+    mapping(uint256 => Grade[]) internal grades;
+    mapping(uint256 => Attendance[]) internal attendanceRecords;
 
     event GradeRecorded(uint256 courseId, address indexed student, uint8 grade);
     event AttendanceMarked(uint256 courseId, address indexed student, bool attended);
@@ -34,25 +35,140 @@ contract GradeManagementUpgradeable is Initializable, UniversityAccessControlUpg
         _grantRole(ADMIN_ROLE, msg.sender);
     }
 
-    function recordGrade(uint256 _courseId, address _student, uint8 _grade) external onlyRole(TEACHER_ROLE) {
+    function recordGrade(uint256 _courseId, address _student, uint8 _grade) external virtual onlyRole(TEACHER_ROLE) {
         require(hasRole(TEACHER_ROLE, msg.sender), "Assigned teacher must have Teacher role");
+        _recordGrade(_courseId, _student, _grade);
+    }
+
+    function markAttendance(uint256 _courseId, address _student, bool _attended) external virtual onlyRole(TEACHER_ROLE) {
+        require(hasRole(TEACHER_ROLE, msg.sender), "Assigned teacher must have Teacher role");
+        _markAttendance(_courseId, _student, _attended);
+    }
+
+    function recordGrades(
+        uint256[] calldata _courseIds,
+        address[] calldata _students,
+        uint8[] calldata _grades
+    ) external onlyRole(TEACHER_ROLE) {
+        require(
+            _courseIds.length == _students.length && _students.length == _grades.length,
+            "Array length mismatch"
+        );
+        for (uint256 i = 0; i < _courseIds.length; i++) {
+            _recordGrade(_courseIds[i], _students[i], _grades[i]);
+        }
+    }
+
+    function markAttendanceBatch(
+        uint256[] calldata _courseIds,
+        address[] calldata _students,
+        bool[] calldata _attended
+    ) external onlyRole(TEACHER_ROLE) {
+        require(
+            _courseIds.length == _students.length && _students.length == _attended.length,
+            "Array length mismatch"
+        );
+        for (uint256 i = 0; i < _courseIds.length; i++) {
+            _markAttendance(_courseIds[i], _students[i], _attended[i]);
+        }
+    }
+
+    function _recordGrade(uint256 _courseId, address _student, uint8 _grade) internal virtual {
         grades[_courseId].push(Grade(_courseId, _student, _grade, block.timestamp));
         emit GradeRecorded(_courseId, _student, _grade);
     }
 
-    function markAttendance(uint256 _courseId, address _student, bool _attended) external onlyRole(TEACHER_ROLE) {
-        require(hasRole(TEACHER_ROLE, msg.sender), "Assigned teacher must have Teacher role");
+    function _markAttendance(uint256 _courseId, address _student, bool _attended) internal virtual {
         attendanceRecords[_courseId].push(Attendance(_courseId, _student, _attended));
         emit AttendanceMarked(_courseId, _student, _attended);
     }
 
-    function getGrades(uint256 _courseId) public view returns (Grade[] memory) {
+    function getGrades(uint256 _courseId) public view virtual returns (Grade[] memory) {
         return grades[_courseId];
     }
 
-    function getAttendance(uint256 _courseId) public view returns (Attendance[] memory) {
+    function getAttendance(uint256 _courseId) public view virtual returns (Attendance[] memory) {
         return attendanceRecords[_courseId];
     }
 
+    function getGradeCount(uint256 _courseId) external view virtual returns (uint256) {
+        return grades[_courseId].length;
+    }
+
+    function getAttendanceCount(uint256 _courseId) external view virtual returns (uint256) {
+        return attendanceRecords[_courseId].length;
+    }
+
+    function getGradesPage(uint256 _courseId, uint256 _offset, uint256 _limit) external view virtual returns (Grade[] memory) {
+        Grade[] storage courseGrades = grades[_courseId];
+        uint256 end = Pagination.pageEnd(courseGrades.length, _offset, _limit);
+        Grade[] memory page = new Grade[](end - _offset);
+        for (uint256 i = _offset; i < end; i++) {
+            page[i - _offset] = courseGrades[i];
+        }
+        return page;
+    }
+
+    function getAttendancePage(uint256 _courseId, uint256 _offset, uint256 _limit) external view virtual returns (Attendance[] memory) {
+        Attendance[] storage courseAttendance = attendanceRecords[_courseId];
+        uint256 end = Pagination.pageEnd(courseAttendance.length, _offset, _limit);
+        Attendance[] memory page = new Attendance[](end - _offset);
+        for (uint256 i = _offset; i < end; i++) {
+            page[i - _offset] = courseAttendance[i];
+        }
+        return page;
+    }
+
+    // Scans at most _limit records starting at _offset; continue from nextOffset until it reaches getGradeCount
+    function getGradesByStudent(
+        uint256 _courseId,
+        address _student,
+        uint256 _offset,
+        uint256 _limit
+    ) external view virtual returns (Grade[] memory, uint256 nextOffset) {
+        Grade[] storage courseGrades = grades[_courseId];
+        nextOffset = Pagination.pageEnd(courseGrades.length, _offset, _limit);
+        uint256 count = 0;
+        for (uint256 i = _offset; i < nextOffset; i++) {
+            if (courseGrades[i].student == _student) {
+                count++;
+            }
+        }
+        Grade[] memory studentGrades = new Grade[](count);
+        uint256 index = 0;
+        for (uint256 i = _offset; i < nextOffset; i++) {
+            if (courseGrades[i].student == _student) {
+                studentGrades[index] = courseGrades[i];
+                index++;
+            }
+        }
+        return (studentGrades, nextOffset);
+    }
+
+    function getAttendanceByStudent(
+        uint256 _courseId,
+        address _student,
+        uint256 _offset,
+        uint256 _limit
+    ) external view virtual returns (Attendance[] memory, uint256 nextOffset) {
+        Attendance[] storage courseAttendance = attendanceRecords[_courseId];
+        nextOffset = Pagination.pageEnd(courseAttendance.length, _offset, _limit);
+        uint256 count = 0;
+        for (uint256 i = _offset; i < nextOffset; i++) {
+            if (courseAttendance[i].student == _student) {
+                count++;
+            }
+        }
+        Attendance[] memory studentAttendance = new Attendance[](count);
+        uint256 index = 0;
+        for (uint256 i = _offset; i < nextOffset; i++) {
+            if (courseAttendance[i].student == _student) {
+                studentAttendance[index] = courseAttendance[i];
+                index++;
+            }
+        }
+        return (studentAttendance, nextOffset);
+    }
+
     uint256[50] private __gap;
 }
@@ -0,0 +1,213 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.9;
+
+import "./GradeManagementUpgradeable.sol";
+
+/// @custom:oz-upgrades-from GradeManagementUpgradeable
+contract GradeManagementV2Upgradeable is GradeManagementUpgradeable {
+    // One storage slot per record: the course id is the mapping key, the timestamp fits in 40 bits
+    struct PackedGrade {
+        address student;
+        uint8 grade;
+        uint40 date;
+    }
+
+    struct PackedAttendance {
+        address student;
+        bool attended;
+    }
+
+    // A course's records are packed[0..) followed by the legacy records [migrated, length).
+    // New records stay in the legacy array until migrateRecords has caught up, so order is kept.
+    mapping(uint256 => PackedGrade[]) internal packedGrades;
+    mapping(uint256 => PackedAttendance[]) internal packedAttendance;
+    mapping(uint256 => uint256) public migratedGrades;
+    mapping(uint256 => uint256) public migratedAttendance;
+
+    event RecordsMigrated(uint256 courseId, uint256 migratedGrades, uint256 migratedAttendance);
+
+    /// @custom:oz-upgrades-unsafe-allow constructor
+    constructor() {
+        _disableInitializers();
+    }
+
+    // onlyRole already checks TEACHER_ROLE; V1 repeated the hasRole lookup in the body
+    function recordGrade(uint256 _courseId, address _student, uint8 _grade) external virtual override onlyRole(TEACHER_ROLE) {
+        _recordGrade(_courseId, _student, _grade);
+    }
+
+    function markAttendance(uint256 _courseId, address _student, bool _attended) external virtual override onlyRole(TEACHER_ROLE) {
+        _markAttendance(_courseId, _student, _attended);
+    }
+
+    function migrateRecords(uint256 _courseId, uint256 _maxRecords) external onlyRole(ADMIN_ROLE) {
+        Grade[] storage legacyGrades = grades[_courseId];
+        PackedGrade[] storage courseGrades = packedGrades[_courseId];
+        uint256 gradeEnd = _min(legacyGrades.length, migratedGrades[_courseId] + _maxRecords);
+        for (uint256 i = migratedGrades[_courseId]; i < gradeEnd; i++) {
+            Grade storage legacy = legacyGrades[i];
+            courseGrades.push(PackedGrade(legacy.student, legacy.grade, uint40(legacy.date)));
+            // Clearing the old slots refunds part of the copy
+            delete legacyGrades[i];
+        }
+        migratedGrades[_courseId] = gradeEnd;
+
+        Attendance[] storage legacyAttendance = attendanceRecords[_courseId];
+        PackedAttendance[] storage courseAttendance = packedAttendance[_courseId];
+        uint256 attendanceEnd = _min(legacyAttendance.length, migratedAttendance[_courseId] + _maxRecords);
+        for (uint256 i = migratedAttendance[_courseId]; i < attendanceEnd; i++) {
+            Attendance storage legacy = legacyAttendance[i];
+            courseAttendance.push(PackedAttendance(legacy.student, legacy.attended));
+            delete legacyAttendance[i];
+        }
+        migratedAttendance[_courseId] = attendanceEnd;
+
+        emit RecordsMigrated(_courseId, gradeEnd, attendanceEnd);
+    }
+
+    function isMigrated(uint256 _courseId) public view returns (bool) {
+        return migratedGrades[_courseId] == grades[_courseId].length
+            && migratedAttendance[_courseId] == attendanceRecords[_courseId].length;
+    }
+
+    function _recordGrade(uint256 _courseId, address _student, uint8 _grade) internal virtual override {
+        if (migratedGrades[_courseId] != grades[_courseId].length) {
+            super._recordGrade(_courseId, _student, _grade);
+            return;
+        }
+        packedGrades[_courseId].push(PackedGrade(_student, _grade, uint40(block.timestamp)));
+        emit GradeRecorded(_courseId, _student, _grade);
+    }
+
+    function _markAttendance(uint256 _courseId, address _student, bool _attended) internal virtual override {
+        if (migratedAttendance[_courseId] != attendanceRecords[_courseId].length) {
+            super._markAttendance(_courseId, _student, _attended);
+            return;
+        }
+        packedAttendance[_courseId].push(PackedAttendance(_student, _attended));
+        emit AttendanceMarked(_courseId, _student, _attended);
+    }
+
+    function _gradeCount(uint256 _courseId) internal view returns (uint256) {
+        return packedGrades[_courseId].length + grades[_courseId].length - migratedGrades[_courseId];
+    }
+
+    function _attendanceCount(uint256 _courseId) internal view returns (uint256) {
+        return packedAttendance[_courseId].length + attendanceRecords[_courseId].length - migratedAttendance[_courseId];
+    }
+
+    // While unmigrated records remain, packed length equals the migrated count, so legacy index == logical index
+    function _gradeAt(uint256 _courseId, uint256 _index) internal view returns (Grade memory) {
+        PackedGrade[] storage courseGrades = packedGrades[_courseId];
+        if (_index < courseGrades.length) {
+            PackedGrade memory packed = courseGrades[_index];
+            return Grade(_courseId, packed.student, packed.grade, packed.date);
+        }
+        return grades[_courseId][_index];
+    }
+
+    function _attendanceAt(uint256 _courseId, uint256 _index) internal view returns (Attendance memory) {
+        PackedAttendance[] storage courseAttendance = packedAttendance[_courseId];
+        if (_index < courseAttendance.length) {
+            PackedAttendance memory packed = courseAttendance[_index];
+            return Attendance(_courseId, packed.student, packed.attended);
+        }
+        return attendanceRecords[_courseId][_index];
+    }
+
+    function getGrades(uint256 _courseId) public view virtual override returns (Grade[] memory) {
+        return _gradesPage(_courseId, 0, _gradeCount(_courseId));
+    }
+
+    function getAttendance(uint256 _courseId) public view virtual override returns (Attendance[] memory) {
+        return _attendancePage(_courseId, 0, _attendanceCount(_courseId));
+    }
+
+    function getGradeCount(uint256 _courseId) external view virtual override returns (uint256) {
+        return _gradeCount(_courseId);
+    }
+
+    function getAttendanceCount(uint256 _courseId) external view virtual override returns (uint256) {
+        return _attendanceCount(_courseId);
+    }
+
+    function getGradesPage(uint256 _courseId, uint256 _offset, uint256 _limit) external view virtual override returns (Grade[] memory) {
+        return _gradesPage(_courseId, _offset, _limit);
+    }
+
+    function getAttendancePage(uint256 _courseId, uint256 _offset, uint256 _limit) external view virtual override returns (Attendance[] memory) {
+        return _attendancePage(_courseId, _offset, _limit);
+    }
+
+    function getGradesByStudent(
+        uint256 _courseId,
+        address _student,
+        uint256 _offset,
+        uint256 _limit
+    ) external view virtual override returns (Grade[] memory, uint256 nextOffset) {
+        nextOffset = Pagination.pageEnd(_gradeCount(_courseId), _offset, _limit);
+        uint256 count = 0;
+        for (uint256 i = _offset; i < nextOffset; i++) {
+            if (_gradeAt(_courseId, i).student == _student) {
+                count++;
+            }
+        }
+        Grade[] memory studentGrades = new Grade[](count);
+        uint256 index = 0;
+        for (uint256 i = _offset; i < nextOffset; i++) {
+            Grade memory grade = _gradeAt(_courseId, i);
+            if (grade.student == _student) {
+                studentGrades[index] = grade;
+                index++;
+            }
+        }
+        return (studentGrades, nextOffset);
+    }
+
+    function getAttendanceByStudent(
+        uint256 _courseId,
+        address _student,
+        uint256 _offset,
+        uint256 _limit
+    ) external view virtual override returns (Attendance[] memory, uint256 nextOffset) {
+        nextOffset = Pagination.pageEnd(_attendanceCount(_courseId), _offset, _limit);
+        uint256 count = 0;
+        for (uint256 i = _offset; i < nextOffset; i++) {
+            if (_attendanceAt(_courseId, i).student == _student) {
+                count++;
+            }
+        }
+        Attendance[] memory studentAttendance = new Attendance[](count);
+        uint256 index = 0;
+        for (uint256 i = _offset; i < nextOffset; i++) {
+            Attendance memory record = _attendanceAt(_courseId, i);
+            if (record.student == _student) {
+                studentAttendance[index] = record;
+                index++;
+            }
+        }
+        return (studentAttendance, nextOffset);
+    }
+
+    function _gradesPage(uint256 _courseId, uint256 _offset, uint256 _limit) internal view returns (Grade[] memory page) {
+        uint256 end = Pagination.pageEnd(_gradeCount(_courseId), _offset, _limit);
+        page = new Grade[](end - _offset);
+        for (uint256 i = _offset; i < end; i++) {
+            page[i - _offset] = _gradeAt(_courseId, i);
+        }
+    }
+
+    function _attendancePage(uint256 _courseId, uint256 _offset, uint256 _limit) internal view returns (Attendance[] memory page) {
+        uint256 end = Pagination.pageEnd(_attendanceCount(_courseId), _offset, _limit);
+        page = new Attendance[](end - _offset);
+        for (uint256 i = _offset; i < end; i++) {
+            page[i - _offset] = _attendanceAt(_courseId, i);
+        }
+    }
+
+    function _min(uint256 a, uint256 b) private pure returns (uint256) {
+        return a < b ? a : b;
+    }
+
+    uint256[46] private __gapV2;
+}
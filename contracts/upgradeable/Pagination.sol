@@ -0,0 +1,12 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.9;
+
+library Pagination {
+    // End index (exclusive) of the window [_offset, _offset + _limit) clamped to _length
+    function pageEnd(uint256 _length, uint256 _offset, uint256 _limit) internal pure returns (uint256) {
+        if (_offset >= _length) {
+            return _offset;
+        }
+        return _limit > _length - _offset ? _length : _offset + _limit;
+    }
+}
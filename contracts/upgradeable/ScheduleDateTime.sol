@@ -0,0 +1,63 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.9;
+
+// Fixed-width schedule dates and times: "YYYY-MM-DD" <-> uint32 YYYYMMDD, "HH:MM" <-> uint16 HHMM.
+// Both encodings sort in calendar order, so ranges can be compared as plain integers.
+library ScheduleDateTime {
+    function isValidDate(uint32 _date) internal pure returns (bool) {
+        uint32 month = (_date / 100) % 100;
+        uint32 day = _date % 100;
+        return _date >= 10000101 && _date <= 99991231 && month >= 1 && month <= 12 && day >= 1 && day <= 31;
+    }
+
+    function isValidTime(uint16 _time) internal pure returns (bool) {
+        return _time / 100 < 24 && _time % 100 < 60;
+    }
+
+    function parseDate(string memory _date) internal pure returns (uint32 packed) {
+        bytes memory raw = bytes(_date);
+        require(raw.length == 10 && raw[4] == "-" && raw[7] == "-", "Date must be YYYY-MM-DD");
+        packed = uint32(_digits(raw, 0, 4) * 10000 + _digits(raw, 5, 2) * 100 + _digits(raw, 8, 2));
+        require(isValidDate(packed), "Invalid date");
+    }
+
+    function parseTime(string memory _time) internal pure returns (uint16 packed) {
+        bytes memory raw = bytes(_time);
+        require(raw.length == 5 && raw[2] == ":", "Time must be HH:MM");
+        packed = uint16(_digits(raw, 0, 2) * 100 + _digits(raw, 3, 2));
+        require(isValidTime(packed), "Invalid time");
+    }
+
+    function formatDate(uint32 _date) internal pure returns (string memory) {
+        bytes memory raw = new bytes(10);
+        _writeDigits(raw, 0, 4, _date / 10000);
+        raw[4] = "-";
+        _writeDigits(raw, 5, 2, (_date / 100) % 100);
+        raw[7] = "-";
+        _writeDigits(raw, 8, 2, _date % 100);
+        return string(raw);
+    }
+
+    function formatTime(uint16 _time) internal pure returns (string memory) {
+        bytes memory raw = new bytes(5);
+        _writeDigits(raw, 0, 2, _time / 100);
+        raw[2] = ":";
+        _writeDigits(raw, 3, 2, _time % 100);
+        return string(raw);
+    }
+
+    function _digits(bytes memory _raw, uint256 _start, uint256 _count) private pure returns (uint256 value) {
+        for (uint256 i = _start; i < _start + _count; i++) {
+            uint8 digit = uint8(_raw[i]);
+            require(digit >= 48 && digit <= 57, "Expected a digit");
+            value = value * 10 + (digit - 48);
+        }
+    }
+
+    function _writeDigits(bytes memory _raw, uint256 _start, uint256 _count, uint256 _value) private pure {
+        for (uint256 i = _start + _count; i > _start; i--) {
+            _raw[i - 1] = bytes1(uint8(48 + (_value % 10)));
+            _value /= 10;
+        }
+    }
+}
@@ -2,6 +2,7 @@
 pragma solidity ^0.8.9;
 
 import "./UniversityAccessControlUpgradeable.sol";
+import "./Pagination.sol";
 import "@openzeppelin/contracts-upgradeable/proxy/utils/Initializable.sol";
 
 contract ScheduleManagementUpgradeable is Initializable, UniversityAccessControlUpgradeable {
@@ -11,7 +12,7 @@ contract ScheduleManagementUpgradeable is Initializable, UniversityAccessControl
         string time;
     }
 
-    mapping(uint256 => Schedule[]) private schedules;
+    mapping(uint256 => Schedule[]) internal schedules;
 
     event ScheduleCreated(uint256 courseId, string date, string time);
 
@@ -26,21 +27,43 @@ contract ScheduleManagementUpgradeable is Initializable, UniversityAccessControl
     }
 
     function createSchedule(uint256 _courseId, string memory _date, string memory _time) external onlyRole(TEACHER_ROLE) {
+        _createSchedule(_courseId, _date, _time);
+    }
+
+    function _createSchedule(uint256 _courseId, string memory _date, string memory _time) internal virtual {
         schedules[_courseId].push(Schedule(_courseId, _date, _time));
         emit ScheduleCreated(_courseId, _date, _time);
     }
 
-    function getSchedule(uint256 _courseId) external view returns (Schedule[] memory) {
+    function getSchedule(uint256 _courseId) external view virtual returns (Schedule[] memory) {
         return schedules[_courseId];
     }
 
+    function getScheduleCount(uint256 _courseId) external view virtual returns (uint256) {
+        return schedules[_courseId].length;
+    }
+
+    function getSchedulePage(uint256 _courseId, uint256 _offset, uint256 _limit) external view virtual returns (Schedule[] memory) {
+        Schedule[] storage courseSchedules = schedules[_courseId];
+        uint256 end = Pagination.pageEnd(courseSchedules.length, _offset, _limit);
+        Schedule[] memory page = new Schedule[](end - _offset);
+        for (uint256 i = _offset; i < end; i++) {
+            page[i - _offset] = courseSchedules[i];
+        }
+        return page;
+    }
+
     function editSchedule(uint256 _courseId, uint256 _scheduleIndex, string memory _newDate, string memory _newTime) external onlyRole(TEACHER_ROLE) {
+        _editSchedule(_courseId, _scheduleIndex, _newDate, _newTime);
+    }
+
+    function _editSchedule(uint256 _courseId, uint256 _scheduleIndex, string memory _newDate, string memory _newTime) internal virtual {
         Schedule storage schedule = schedules[_courseId][_scheduleIndex];
         schedule.date = _newDate;
         schedule.time = _newTime;
     }
 
-    function getScheduleByDate(uint256 _courseId, string memory _date) external view returns (Schedule[] memory) {
+    function getScheduleByDate(uint256 _courseId, string memory _date) external view virtual returns (Schedule[] memory) {
         Schedule[] memory courseSchedules = schedules[_courseId];
         uint256 count = 0;
         for (uint256 i = 0; i < courseSchedules.length; i++) {
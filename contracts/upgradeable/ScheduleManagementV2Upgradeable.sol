@@ -0,0 +1,257 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.9;
+
+import "./ScheduleManagementUpgradeable.sol";
+import "./ScheduleDateTime.sol";
+
+/// @custom:oz-upgrades-from ScheduleManagementUpgradeable
+contract ScheduleManagementV2Upgradeable is ScheduleManagementUpgradeable {
+    // One storage slot per entry instead of a course id plus two strings
+    struct PackedSchedule {
+        uint32 date; // YYYYMMDD
+        uint16 time; // HHMM
+    }
+
+    // Same layout rule as GradeManagementV2Upgradeable: packed[0..) then legacy [migrated, length)
+    mapping(uint256 => PackedSchedule[]) internal packedSchedules;
+    mapping(uint256 => uint256) public migratedSchedules;
+    // Date index over the packed entries: ascending entry indices per (course, date), and each
+    // course's distinct dates in ascending order for range scans. Dates whose entries were all
+    // moved by editSchedule stay listed with an empty index list.
+    mapping(uint256 => mapping(uint32 => uint256[])) internal schedulesByDate;
+    mapping(uint256 => uint32[]) internal scheduleDates;
+
+    event SchedulesMigrated(uint256 courseId, uint256 migratedSchedules);
+
+    /// @custom:oz-upgrades-unsafe-allow constructor
+    constructor() {
+        _disableInitializers();
+    }
+
+    // Compact calldata variants; the string functions keep working and are parsed on-chain
+    function createScheduleAt(uint256 _courseId, uint32 _date, uint16 _time) external onlyRole(TEACHER_ROLE) {
+        require(ScheduleDateTime.isValidDate(_date) && ScheduleDateTime.isValidTime(_time), "Invalid date or time");
+        _createPackedSchedule(_courseId, _date, _time);
+    }
+
+    function editScheduleAt(uint256 _courseId, uint256 _scheduleIndex, uint32 _newDate, uint16 _newTime) external onlyRole(TEACHER_ROLE) {
+        require(ScheduleDateTime.isValidDate(_newDate) && ScheduleDateTime.isValidTime(_newTime), "Invalid date or time");
+        _editPackedSchedule(_courseId, _scheduleIndex, _newDate, _newTime);
+    }
+
+    // Legacy entries must be "YYYY-MM-DD" / "HH:MM"; fix others with editSchedule before migrating
+    function migrateSchedules(uint256 _courseId, uint256 _maxRecords) external onlyRole(ADMIN_ROLE) {
+        Schedule[] storage legacySchedules = schedules[_courseId];
+        uint256 end = _min(legacySchedules.length, migratedSchedules[_courseId] + _maxRecords);
+        for (uint256 i = migratedSchedules[_courseId]; i < end; i++) {
+            Schedule storage legacy = legacySchedules[i];
+            uint32 date = ScheduleDateTime.parseDate(legacy.date);
+            packedSchedules[_courseId].push(PackedSchedule(date, ScheduleDateTime.parseTime(legacy.time)));
+            _indexSchedule(_courseId, date, i);
+            delete legacySchedules[i];
+        }
+        migratedSchedules[_courseId] = end;
+        emit SchedulesMigrated(_courseId, end);
+    }
+
+    function isMigrated(uint256 _courseId) public view returns (bool) {
+        return migratedSchedules[_courseId] == schedules[_courseId].length;
+    }
+
+    // String inputs are validated even while legacy entries remain, so migration cannot hit bad data later
+    function _createSchedule(uint256 _courseId, string memory _date, string memory _time) internal virtual override {
+        _createPackedSchedule(_courseId, ScheduleDateTime.parseDate(_date), ScheduleDateTime.parseTime(_time));
+    }
+
+    function _createPackedSchedule(uint256 _courseId, uint32 _date, uint16 _time) internal virtual {
+        string memory dateText = ScheduleDateTime.formatDate(_date);
+        string memory timeText = ScheduleDateTime.formatTime(_time);
+        if (migratedSchedules[_courseId] != schedules[_courseId].length) {
+            super._createSchedule(_courseId, dateText, timeText);
+            return;
+        }
+        _indexSchedule(_courseId, _date, packedSchedules[_courseId].length);
+        packedSchedules[_courseId].push(PackedSchedule(_date, _time));
+        // Event stays string-typed so existing subscribers keep decoding it
+        emit ScheduleCreated(_courseId, dateText, timeText);
+    }
+
+    function _editSchedule(uint256 _courseId, uint256 _scheduleIndex, string memory _newDate, string memory _newTime) internal virtual override {
+        _editPackedSchedule(_courseId, _scheduleIndex, ScheduleDateTime.parseDate(_newDate), ScheduleDateTime.parseTime(_newTime));
+    }
+
+    function _editPackedSchedule(uint256 _courseId, uint256 _scheduleIndex, uint32 _newDate, uint16 _newTime) internal virtual {
+        if (_scheduleIndex >= packedSchedules[_courseId].length) {
+            super._editSchedule(
+                _courseId, _scheduleIndex, ScheduleDateTime.formatDate(_newDate), ScheduleDateTime.formatTime(_newTime)
+            );
+            return;
+        }
+        PackedSchedule storage schedule = packedSchedules[_courseId][_scheduleIndex];
+        if (schedule.date != _newDate) {
+            _unindexSchedule(_courseId, schedule.date, _scheduleIndex);
+            _indexSchedule(_courseId, _newDate, _scheduleIndex);
+        }
+        schedule.date = _newDate;
+        schedule.time = _newTime;
+    }
+
+    function _indexSchedule(uint256 _courseId, uint32 _date, uint256 _scheduleIndex) internal {
+        uint256[] storage entries = schedulesByDate[_courseId][_date];
+        if (entries.length == 0) {
+            _addScheduleDate(_courseId, _date);
+        }
+        // Entries are almost always appended in order; edits shift the new one into place
+        entries.push(_scheduleIndex);
+        uint256 i = entries.length - 1;
+        while (i > 0 && entries[i - 1] > _scheduleIndex) {
+            entries[i] = entries[i - 1];
+            i--;
+        }
+        entries[i] = _scheduleIndex;
+    }
+
+    function _unindexSchedule(uint256 _courseId, uint32 _date, uint256 _scheduleIndex) internal {
+        uint256[] storage entries = schedulesByDate[_courseId][_date];
+        uint256 i = 0;
+        while (entries[i] != _scheduleIndex) {
+            i++;
+        }
+        for (; i + 1 < entries.length; i++) {
+            entries[i] = entries[i + 1];
+        }
+        entries.pop();
+    }
+
+    function _addScheduleDate(uint256 _courseId, uint32 _date) internal {
+        uint32[] storage dates = scheduleDates[_courseId];
+        uint256 position = _lowerBound(dates, _date);
+        if (position < dates.length && dates[position] == _date) {
+            return;
+        }
+        dates.push(_date);
+        for (uint256 i = dates.length - 1; i > position; i--) {
+            dates[i] = dates[i - 1];
+        }
+        dates[position] = _date;
+    }
+
+    // First position in the sorted dates whose value is >= _date
+    function _lowerBound(uint32[] storage _dates, uint32 _date) internal view returns (uint256 low) {
+        uint256 high = _dates.length;
+        while (low < high) {
+            uint256 middle = (low + high) / 2;
+            if (_dates[middle] < _date) {
+                low = middle + 1;
+            } else {
+                high = middle;
+            }
+        }
+    }
+
+    function _scheduleCount(uint256 _courseId) internal view returns (uint256) {
+        return packedSchedules[_courseId].length + schedules[_courseId].length - migratedSchedules[_courseId];
+    }
+
+    function _scheduleAt(uint256 _courseId, uint256 _index) internal view returns (Schedule memory) {
+        PackedSchedule[] storage courseSchedules = packedSchedules[_courseId];
+        if (_index < courseSchedules.length) {
+            PackedSchedule memory packed = courseSchedules[_index];
+            return Schedule(_courseId, ScheduleDateTime.formatDate(packed.date), ScheduleDateTime.formatTime(packed.time));
+        }
+        return schedules[_courseId][_index];
+    }
+
+    function getSchedule(uint256 _courseId) external view virtual override returns (Schedule[] memory) {
+        return _schedulePage(_courseId, 0, _scheduleCount(_courseId));
+    }
+
+    function getScheduleCount(uint256 _courseId) external view virtual override returns (uint256) {
+        return _scheduleCount(_courseId);
+    }
+
+    function getSchedulePage(uint256 _courseId, uint256 _offset, uint256 _limit) external view virtual override returns (Schedule[] memory) {
+        return _schedulePage(_courseId, _offset, _limit);
+    }
+
+    // Raw packed entries, 64 bytes of return data each instead of a struct with two strings
+    function getPackedSchedulePage(uint256 _courseId, uint256 _offset, uint256 _limit) external view returns (PackedSchedule[] memory) {
+        uint256 end = Pagination.pageEnd(_scheduleCount(_courseId), _offset, _limit);
+        PackedSchedule[] memory page = new PackedSchedule[](end - _offset);
+        for (uint256 i = _offset; i < end; i++) {
+            page[i - _offset] = _packedScheduleAt(_courseId, i);
+        }
+        return page;
+    }
+
+    // Indexed lookup for migrated entries; only the unmigrated legacy tail is still scanned
+    function getScheduleByDate(uint256 _courseId, string memory _date) external view virtual override returns (Schedule[] memory) {
+        uint256[] storage entries = schedulesByDate[_courseId][ScheduleDateTime.parseDate(_date)];
+        uint256 packedCount = packedSchedules[_courseId].length;
+        uint256 total = _scheduleCount(_courseId);
+        bytes32 dateHash = keccak256(bytes(_date));
+        uint256 count = entries.length;
+        for (uint256 i = packedCount; i < total; i++) {
+            if (keccak256(bytes(schedules[_courseId][i].date)) == dateHash) {
+                count++;
+            }
+        }
+        Schedule[] memory filteredSchedules = new Schedule[](count);
+        uint256 index = 0;
+        for (; index < entries.length; index++) {
+            filteredSchedules[index] = _scheduleAt(_courseId, entries[index]);
+        }
+        for (uint256 i = packedCount; i < total; i++) {
+            if (keccak256(bytes(schedules[_courseId][i].date)) == dateHash) {
+                filteredSchedules[index] = schedules[_courseId][i];
+                index++;
+            }
+        }
+        return filteredSchedules;
+    }
+
+    // Entries dated within [_fromDate, _toDate] (YYYYMMDD, inclusive), ordered by date, e.g. a week or month view
+    function getScheduleInRange(uint256 _courseId, uint32 _fromDate, uint32 _toDate) external view returns (Schedule[] memory) {
+        require(isMigrated(_courseId), "Schedules not migrated");
+        uint32[] storage dates = scheduleDates[_courseId];
+        uint256 first = _lowerBound(dates, _fromDate);
+        uint256 count = 0;
+        uint256 last = first;
+        for (; last < dates.length && dates[last] <= _toDate; last++) {
+            count += schedulesByDate[_courseId][dates[last]].length;
+        }
+        Schedule[] memory rangeSchedules = new Schedule[](count);
+        uint256 index = 0;
+        for (uint256 d = first; d < last; d++) {
+            uint256[] storage entries = schedulesByDate[_courseId][dates[d]];
+            for (uint256 i = 0; i < entries.length; i++) {
+                rangeSchedules[index] = _scheduleAt(_courseId, entries[i]);
+                index++;
+            }
+        }
+        return rangeSchedules;
+    }
+
+    function _packedScheduleAt(uint256 _courseId, uint256 _index) internal view returns (PackedSchedule memory) {
+        PackedSchedule[] storage courseSchedules = packedSchedules[_courseId];
+        if (_index < courseSchedules.length) {
+            return courseSchedules[_index];
+        }
+        Schedule storage legacy = schedules[_courseId][_index];
+        return PackedSchedule(ScheduleDateTime.parseDate(legacy.date), ScheduleDateTime.parseTime(legacy.time));
+    }
+
+    function _schedulePage(uint256 _courseId, uint256 _offset, uint256 _limit) internal view returns (Schedule[] memory page) {
+        uint256 end = Pagination.pageEnd(_scheduleCount(_courseId), _offset, _limit);
+        page = new Schedule[](end - _offset);
+        for (uint256 i = _offset; i < end; i++) {
+            page[i - _offset] = _scheduleAt(_courseId, i);
+        }
+    }
+
+    function _min(uint256 a, uint256 b) private pure returns (uint256) {
+        return a < b ? a : b;
+    }
+
+    uint256[46] private __gapV2;
+}
@@ -17,7 +17,7 @@ contract StatisticsTrackerUpgradeable is Initializable, GradeManagementUpgradeab
         _grantRole(ADMIN_ROLE, msg.sender);
     }
 
-    function getAverageGrade(uint256 _courseId) external view returns (uint256) {
+    function getAverageGrade(uint256 _courseId) public view virtual returns (uint256) {
         Grade[] memory courseGrades = getGrades(_courseId);
         uint256 total = 0;
         for (uint256 i = 0; i < courseGrades.length; i++) {
@@ -26,7 +26,7 @@ contract StatisticsTrackerUpgradeable is Initializable, GradeManagementUpgradeab
         return courseGrades.length > 0 ? total / courseGrades.length : 0;
     }
 
-    function getAttendanceRate(uint256 _courseId) external view returns (uint256) {
+    function getAttendanceRate(uint256 _courseId) public view virtual returns (uint256) {
         Attendance[] memory courseAttendance = getAttendance(_courseId);
         uint256 attendedCount = 0;
         for (uint256 i = 0; i < courseAttendance.length; i++) {
@@ -37,7 +37,7 @@ contract StatisticsTrackerUpgradeable is Initializable, GradeManagementUpgradeab
         return courseAttendance.length > 0 ? (attendedCount * 100) / courseAttendance.length : 0;
     }
 
-    function getAverageGradeByStudent(uint256 _courseId, address _student) external view returns (uint256) {
+    function getAverageGradeByStudent(uint256 _courseId, address _student) public view virtual returns (uint256) {
         Grade[] memory courseGrades = getGrades(_courseId);
         uint256 total = 0;
         uint256 count = 0;
@@ -50,7 +50,7 @@ contract StatisticsTrackerUpgradeable is Initializable, GradeManagementUpgradeab
         return count > 0 ? total / count : 0;
     }
 
-    function getAttendanceRateByStudent(uint256 _courseId, address _student) external view returns (uint256) {
+    function getAttendanceRateByStudent(uint256 _courseId, address _student) public view virtual returns (uint256) {
         Attendance[] memory courseAttendance = getAttendance(_courseId);
         uint256 attendedCount = 0;
         uint256 totalCount = 0;
@@ -0,0 +1,132 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.9;
+
+import "./StatisticsTrackerUpgradeable.sol";
+
+/// @custom:oz-upgrades-from StatisticsTrackerUpgradeable
+contract StatisticsTrackerV2Upgradeable is StatisticsTrackerUpgradeable {
+    struct Totals {
+        uint128 sum;
+        uint128 count;
+    }
+
+    // Running totals cover records [0, aggregated) of each course array.
+    // Records written before the upgrade are folded in by backfillAggregates.
+    mapping(uint256 => Totals) private courseGradeTotals;
+    mapping(uint256 => mapping(address => Totals)) private studentGradeTotals;
+    mapping(uint256 => Totals) private courseAttendanceTotals;
+    mapping(uint256 => mapping(address => Totals)) private studentAttendanceTotals;
+    mapping(uint256 => uint256) public aggregatedGrades;
+    mapping(uint256 => uint256) public aggregatedAttendance;
+
+    event AggregatesBackfilled(uint256 courseId, uint256 aggregatedGrades, uint256 aggregatedAttendance);
+
+    /// @custom:oz-upgrades-unsafe-allow constructor
+    constructor() {
+        _disableInitializers();
+    }
+
+    // onlyRole already checks TEACHER_ROLE; V1 repeated the hasRole lookup in the body
+    function recordGrade(uint256 _courseId, address _student, uint8 _grade) external virtual override onlyRole(TEACHER_ROLE) {
+        _recordGrade(_courseId, _student, _grade);
+    }
+
+    function markAttendance(uint256 _courseId, address _student, bool _attended) external virtual override onlyRole(TEACHER_ROLE) {
+        _markAttendance(_courseId, _student, _attended);
+    }
+
+    function backfillAggregates(uint256 _courseId, uint256 _maxRecords) external onlyRole(ADMIN_ROLE) {
+        Grade[] storage courseGrades = grades[_courseId];
+        uint256 gradeEnd = _min(courseGrades.length, aggregatedGrades[_courseId] + _maxRecords);
+        for (uint256 i = aggregatedGrades[_courseId]; i < gradeEnd; i++) {
+            _addGrade(_courseId, courseGrades[i].student, courseGrades[i].grade);
+        }
+        aggregatedGrades[_courseId] = gradeEnd;
+
+        Attendance[] storage courseAttendance = attendanceRecords[_courseId];
+        uint256 attendanceEnd = _min(courseAttendance.length, aggregatedAttendance[_courseId] + _maxRecords);
+        for (uint256 i = aggregatedAttendance[_courseId]; i < attendanceEnd; i++) {
+            _addAttendance(_courseId, courseAttendance[i].student, courseAttendance[i].attended);
+        }
+        aggregatedAttendance[_courseId] = attendanceEnd;
+
+        emit AggregatesBackfilled(_courseId, gradeEnd, attendanceEnd);
+    }
+
+    function isBackfilled(uint256 _courseId) public view returns (bool) {
+        return aggregatedGrades[_courseId] == grades[_courseId].length
+            && aggregatedAttendance[_courseId] == attendanceRecords[_courseId].length;
+    }
+
+    function getAverageGrade(uint256 _courseId) public view override returns (uint256) {
+        if (aggregatedGrades[_courseId] != grades[_courseId].length) {
+            return super.getAverageGrade(_courseId);
+        }
+        Totals storage totals = courseGradeTotals[_courseId];
+        return totals.count > 0 ? totals.sum / totals.count : 0;
+    }
+
+    function getAttendanceRate(uint256 _courseId) public view override returns (uint256) {
+        if (aggregatedAttendance[_courseId] != attendanceRecords[_courseId].length) {
+            return super.getAttendanceRate(_courseId);
+        }
+        Totals storage totals = courseAttendanceTotals[_courseId];
+        return totals.count > 0 ? (uint256(totals.sum) * 100) / totals.count : 0;
+    }
+
+    function getAverageGradeByStudent(uint256 _courseId, address _student) public view override returns (uint256) {
+        if (aggregatedGrades[_courseId] != grades[_courseId].length) {
+            return super.getAverageGradeByStudent(_courseId, _student);
+        }
+        Totals storage totals = studentGradeTotals[_courseId][_student];
+        return totals.count > 0 ? totals.sum / totals.count : 0;
+    }
+
+    function getAttendanceRateByStudent(uint256 _courseId, address _student) public view override returns (uint256) {
+        if (aggregatedAttendance[_courseId] != attendanceRecords[_courseId].length) {
+            return super.getAttendanceRateByStudent(_courseId, _student);
+        }
+        Totals storage totals = studentAttendanceTotals[_courseId][_student];
+        return totals.count > 0 ? (uint256(totals.sum) * 100) / totals.count : 0;
+    }
+
+    function _recordGrade(uint256 _courseId, address _student, uint8 _grade) internal override {
+        // Only extend the totals while they are contiguous with the array; otherwise backfill picks it up
+        bool caughtUp = aggregatedGrades[_courseId] == grades[_courseId].length;
+        super._recordGrade(_courseId, _student, _grade);
+        if (caughtUp) {
+            _addGrade(_courseId, _student, _grade);
+            aggregatedGrades[_courseId]++;
+        }
+    }
+
+    function _markAttendance(uint256 _courseId, address _student, bool _attended) internal override {
+        bool caughtUp = aggregatedAttendance[_courseId] == attendanceRecords[_courseId].length;
+        super._markAttendance(_courseId, _student, _attended);
+        if (caughtUp) {
+            _addAttendance(_courseId, _student, _attended);
+            aggregatedAttendance[_courseId]++;
+        }
+    }
+
+    function _addGrade(uint256 _courseId, address _student, uint8 _grade) private {
+        courseGradeTotals[_courseId].sum += _grade;
+        courseGradeTotals[_courseId].count++;
+        studentGradeTotals[_courseId][_student].sum += _grade;
+        studentGradeTotals[_courseId][_student].count++;
+    }
+
+    function _addAttendance(uint256 _courseId, address _student, bool _attended) private {
+        uint128 attended = _attended ? 1 : 0;
+        courseAttendanceTotals[_courseId].sum += attended;
+        courseAttendanceTotals[_courseId].count++;
+        studentAttendanceTotals[_courseId][_student].sum += attended;
+        studentAttendanceTotals[_courseId][_student].count++;
+    }
+
+    function _min(uint256 a, uint256 b) private pure returns (uint256) {
+        return a < b ? a : b;
+    }
+
+    uint256[44] private __gapV2;
+}
@@ -44,6 +44,13 @@ module.exports = {
     coverage: "./coverage",
     coverageJson: "./coverage.json"
   },
+  gasReporter: {
+    // REPORT_GAS=true npx hardhat test prints per-function gas usage
+    enabled: !!process.env.REPORT_GAS,
+    currency: "USD",
+    outputFile: process.env.GAS_REPORT_FILE,
+    noColors: !!process.env.GAS_REPORT_FILE
+  },
   mocha: {
     timeout: 20000
   }
@@ -0,0 +1,45 @@
+const { ethers, upgrades } = require("hardhat");
+const fs = require("fs");
+const path = require("path");
+
+// Upgrades GradeManagementProxy and ScheduleManagementProxy to the packed v2 layouts and
+// moves existing records into it.
+//   COURSE_IDS=1,2,3  courses to migrate (defaults to 1..COURSE_COUNT)
+//   MIGRATION_CHUNK   records per migration transaction (default 200)
+async function main() {
+  const addresses = JSON.parse(
+    fs.readFileSync(path.join(__dirname, "../.deployed/addresses.json"))
+  );
+
+  const GradeManagementV2 = await ethers.getContractFactory("GradeManagementV2Upgradeable");
+  const gradeManagement = await upgrades.upgradeProxy(addresses.GradeManagementProxy, GradeManagementV2);
+  await gradeManagement.waitForDeployment();
+  console.log("GradeManagement Proxy upgraded at:", await gradeManagement.getAddress());
+
+  const ScheduleManagementV2 = await ethers.getContractFactory("ScheduleManagementV2Upgradeable");
+  const scheduleManagement = await upgrades.upgradeProxy(addresses.ScheduleManagementProxy, ScheduleManagementV2);
+  await scheduleManagement.waitForDeployment();
+  console.log("ScheduleManagement Proxy upgraded at:", await scheduleManagement.getAddress());
+
+  const courseIds = process.env.COURSE_IDS
+    ? process.env.COURSE_IDS.split(",").map(Number)
+    : Array.from({ length: Number(process.env.COURSE_COUNT || 0) }, (_, i) => i + 1);
+  const chunk = Number(process.env.MIGRATION_CHUNK || 200);
+
+  for (const courseId of courseIds) {
+    while (!(await gradeManagement.isMigrated(courseId))) {
+      await (await gradeManagement.migrateRecords(courseId, chunk)).wait();
+    }
+    while (!(await scheduleManagement.isMigrated(courseId))) {
+      await (await scheduleManagement.migrateSchedules(courseId, chunk)).wait();
+    }
+    console.log(`Course ${courseId} migrated`);
+  }
+}
+
+main()
+  .then(() => process.exit(0))
+  .catch((error) => {
+    console.error(error);
+    process.exit(1);
+  });
@@ -0,0 +1,38 @@
+const { ethers, upgrades } = require("hardhat");
+const fs = require("fs");
+const path = require("path");
+
+// Upgrades StatisticsTrackerProxy to StatisticsTrackerV2Upgradeable and backfills
+// the running totals for courses that already have records.
+//   COURSE_IDS=1,2,3  courses to backfill (defaults to 1..COURSE_COUNT)
+//   BACKFILL_CHUNK    records per backfill transaction (default 200)
+async function main() {
+  const addresses = JSON.parse(
+    fs.readFileSync(path.join(__dirname, "../.deployed/addresses.json"))
+  );
+
+  const StatisticsTrackerV2 = await ethers.getContractFactory("StatisticsTrackerV2Upgradeable");
+  const statisticsTracker = await upgrades.upgradeProxy(addresses.StatisticsTrackerProxy, StatisticsTrackerV2);
+  await statisticsTracker.waitForDeployment();
+  console.log("StatisticsTracker Proxy upgraded at:", await statisticsTracker.getAddress());
+
+  const courseIds = process.env.COURSE_IDS
+    ? process.env.COURSE_IDS.split(",").map(Number)
+    : Array.from({ length: Number(process.env.COURSE_COUNT || 0) }, (_, i) => i + 1);
+  const chunk = Number(process.env.BACKFILL_CHUNK || 200);
+
+  for (const courseId of courseIds) {
+    while (!(await statisticsTracker.isBackfilled(courseId))) {
+      const tx = await statisticsTracker.backfillAggregates(courseId, chunk);
+      await tx.wait();
+    }
+    console.log(`Course ${courseId} backfilled`);
+  }
+}
+
+main()
+  .then(() => process.exit(0))
+  .catch((error) => {
+    console.error(error);
+    process.exit(1);
+  });
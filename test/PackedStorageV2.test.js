@@ -0,0 +1,138 @@
+const { expect } = require("chai");
+const { ethers, upgrades } = require("hardhat");
+
+describe("PackedStorageV2", function () {
+  let owner, teacher, student, otherStudent;
+
+  beforeEach(async function () {
+    [owner, teacher, student, otherStudent] = await ethers.getSigners();
+  });
+
+  async function deploy(name) {
+    const Factory = await ethers.getContractFactory(name);
+    const contract = await upgrades.deployProxy(Factory, [], { initializer: "initialize" });
+    await contract.waitForDeployment();
+    await contract.assignRole(teacher.address, 2);
+    return contract;
+  }
+
+  async function upgrade(contract, name) {
+    const Factory = await ethers.getContractFactory(name);
+    return upgrades.upgradeProxy(await contract.getAddress(), Factory);
+  }
+
+  describe("GradeManagementV2", function () {
+    it("Should store new records packed and read them back unchanged", async function () {
+      const gradeManagement = await upgrade(await deploy("GradeManagementUpgradeable"), "GradeManagementV2Upgradeable");
+      await gradeManagement.connect(teacher).recordGrade(1, student.address, 85);
+      await gradeManagement.connect(teacher).markAttendance(1, student.address, true);
+
+      const grades = await gradeManagement.getGrades(1);
+      expect(grades.length).to.equal(1);
+      expect(grades[0].courseId).to.equal(1);
+      expect(grades[0].student).to.equal(student.address);
+      expect(grades[0].grade).to.equal(85);
+      expect(grades[0].date).to.be.greaterThan(0);
+      expect((await gradeManagement.getAttendance(1))[0].attended).to.be.true;
+      expect(await gradeManagement.isMigrated(1)).to.be.true;
+    });
+
+    it("Should migrate legacy records in order", async function () {
+      const legacy = await deploy("GradeManagementUpgradeable");
+      await legacy.connect(teacher).recordGrade(1, student.address, 70);
+      await legacy.connect(teacher).recordGrade(1, otherStudent.address, 80);
+      await legacy.connect(teacher).markAttendance(1, student.address, false);
+
+      const gradeManagement = await upgrade(legacy, "GradeManagementV2Upgradeable");
+      // Written to the legacy array until migration has caught up
+      await gradeManagement.connect(teacher).recordGrade(1, student.address, 90);
+      expect(await gradeManagement.isMigrated(1)).to.be.false;
+
+      await gradeManagement.migrateRecords(1, 2);
+      expect((await gradeManagement.getGrades(1)).map((grade) => grade.grade)).to.deep.equal([70n, 80n, 90n]);
+      await gradeManagement.migrateRecords(1, 2);
+      expect(await gradeManagement.isMigrated(1)).to.be.true;
+
+      await gradeManagement.connect(teacher).recordGrade(1, otherStudent.address, 60);
+      expect((await gradeManagement.getGrades(1)).map((grade) => grade.grade)).to.deep.equal([70n, 80n, 90n, 60n]);
+      expect(await gradeManagement.getGradeCount(1)).to.equal(4);
+      const [studentGrades] = await gradeManagement.getGradesByStudent(1, student.address, 0, 10);
+      expect(studentGrades.map((grade) => grade.grade)).to.deep.equal([70n, 90n]);
+      expect((await gradeManagement.getAttendance(1))[0].attended).to.be.false;
+    });
+
+    it("Should restrict migration to admins", async function () {
+      const gradeManagement = await upgrade(await deploy("GradeManagementUpgradeable"), "GradeManagementV2Upgradeable");
+      await expect(gradeManagement.connect(teacher).migrateRecords(1, 10)).to.be.reverted;
+    });
+
+    it("Should cut write and read gas", async function () {
+      const count = 30;
+      const legacy = await deploy("GradeManagementUpgradeable");
+      const packed = await upgrade(await deploy("GradeManagementUpgradeable"), "GradeManagementV2Upgradeable");
+
+      const gas = {};
+      for (const [label, contract] of [["v1", legacy], ["v2", packed]]) {
+        const grade = await (await contract.connect(teacher).recordGrade(1, student.address, 85)).wait();
+        const attendance = await (await contract.connect(teacher).markAttendance(1, student.address, true)).wait();
+        await contract.connect(teacher).recordGrades(Array(count).fill(1), Array(count).fill(student.address), Array(count).fill(90));
+        gas[label] = {
+          recordGrade: grade.gasUsed,
+          markAttendance: attendance.gasUsed,
+          getGrades: await contract.getGrades.estimateGas(1)
+        };
+      }
+
+      for (const name of ["recordGrade", "markAttendance", "getGrades"]) {
+        console.log(`      ${name}: v1 ${gas.v1[name]} gas, v2 ${gas.v2[name]} gas`);
+        expect(gas.v2[name]).to.be.lessThan(gas.v1[name]);
+      }
+    });
+  });
+
+  describe("ScheduleManagementV2", function () {
+    it("Should pack dates and times and keep the string interface", async function () {
+      const scheduleManagement = await upgrade(await deploy("ScheduleManagementUpgradeable"), "ScheduleManagementV2Upgradeable");
+      await expect(scheduleManagement.connect(teacher).createSchedule(1, "2024-09-01", "10:00"))
+        .to.emit(scheduleManagement, "ScheduleCreated").withArgs(1, "2024-09-01", "10:00");
+      await scheduleManagement.connect(teacher).createScheduleAt(1, 20240902, 930);
+
+      const schedule = await scheduleManagement.getSchedule(1);
+      expect(schedule.map((entry) => [entry.date, entry.time])).to.deep.equal([["2024-09-01", "10:00"], ["2024-09-02", "09:30"]]);
+      const packed = await scheduleManagement.getPackedSchedulePage(1, 0, 10);
+      expect(packed.map((entry) => [entry.date, entry.time])).to.deep.equal([[20240901n, 1000n], [20240902n, 930n]]);
+      expect((await scheduleManagement.getScheduleByDate(1, "2024-09-02")).length).to.equal(1);
+
+      await scheduleManagement.connect(teacher).editSchedule(1, 0, "2024-09-03", "11:15");
+      expect((await scheduleManagement.getSchedule(1))[0].date).to.equal("2024-09-03");
+      await expect(scheduleManagement.connect(teacher).createSchedule(1, "1 Sept", "10:00")).to.be.revertedWith("Date must be YYYY-MM-DD");
+      await expect(scheduleManagement.connect(teacher).createScheduleAt(1, 20241301, 1000)).to.be.revertedWith("Invalid date or time");
+    });
+
+    it("Should migrate legacy string schedules", async function () {
+      const legacy = await deploy("ScheduleManagementUpgradeable");
+      await legacy.connect(teacher).createSchedule(1, "2024-09-01", "10:00");
+      await legacy.connect(teacher).createSchedule(1, "2024-09-08", "12:30");
+
+      const scheduleManagement = await upgrade(legacy, "ScheduleManagementV2Upgradeable");
+      await scheduleManagement.connect(teacher).createSchedule(1, "2024-09-15", "10:00");
+      expect(await scheduleManagement.isMigrated(1)).to.be.false;
+      expect((await scheduleManagement.getScheduleByDate(1, "2024-09-08")).length).to.equal(1);
+
+      await scheduleManagement.migrateSchedules(1, 10);
+      expect(await scheduleManagement.isMigrated(1)).to.be.true;
+      const schedule = await scheduleManagement.getSchedule(1);
+      expect(schedule.map((entry) => entry.date)).to.deep.equal(["2024-09-01", "2024-09-08", "2024-09-15"]);
+    });
+
+    it("Should cut createSchedule gas", async function () {
+      const legacy = await deploy("ScheduleManagementUpgradeable");
+      const packed = await upgrade(await deploy("ScheduleManagementUpgradeable"), "ScheduleManagementV2Upgradeable");
+
+      const v1 = (await (await legacy.connect(teacher).createSchedule(1, "2024-09-01", "10:00")).wait()).gasUsed;
+      const v2 = (await (await packed.connect(teacher).createScheduleAt(1, 20240901, 1000)).wait()).gasUsed;
+      console.log(`      createSchedule: v1 ${v1} gas, v2 createScheduleAt ${v2} gas`);
+      expect(v2).to.be.lessThan(v1);
+    });
+  });
+});
@@ -101,6 +101,64 @@ describe("Proxy Contracts", function () {
       expect(grades[0].grade).to.equal(85);
       expect(grades[0].student).to.equal(student.address);
     });
+
+    it("Should record grades and attendance in batches", async function () {
+      await gradeManagementProxy.connect(teacher).recordGrades([1, 1, 2], [student.address, teacher.address, student.address], [85, 90, 70]);
+      await gradeManagementProxy.connect(teacher).markAttendanceBatch([1, 1], [student.address, teacher.address], [true, false]);
+
+      const grades = await gradeManagementProxy.getGrades(1);
+      expect(grades.length).to.equal(2);
+      expect(grades[1].grade).to.equal(90);
+      expect((await gradeManagementProxy.getGrades(2))[0].grade).to.equal(70);
+
+      const attendance = await gradeManagementProxy.getAttendance(1);
+      expect(attendance.length).to.equal(2);
+      expect(attendance[1].attended).to.be.false;
+    });
+
+    it("Should reject batches with mismatched lengths", async function () {
+      await expect(
+        gradeManagementProxy.connect(teacher).recordGrades([1, 1], [student.address], [85, 90])
+      ).to.be.revertedWith("Array length mismatch");
+    });
+
+    it("Should use less gas for a batch than for single calls", async function () {
+      const count = 20;
+      const courseIds = Array(count).fill(1);
+      const students = Array(count).fill(student.address);
+      const gradeValues = Array.from({ length: count }, (_, i) => 60 + i);
+
+      let singleGas = 0n;
+      for (let i = 0; i < count; i++) {
+        const tx = await gradeManagementProxy.connect(teacher).recordGrade(courseIds[i], students[i], gradeValues[i]);
+        singleGas += (await tx.wait()).gasUsed;
+      }
+
+      const batchTx = await gradeManagementProxy.connect(teacher).recordGrades(courseIds, students, gradeValues);
+      const batchGas = (await batchTx.wait()).gasUsed;
+
+      console.log(`      recordGrade x${count}: ${singleGas} gas, recordGrades(${count}): ${batchGas} gas`);
+      expect(batchGas).to.be.lessThan(singleGas);
+    });
+
+    it("Should page through grades and attendance", async function () {
+      await gradeManagementProxy.connect(teacher).recordGrades([1, 1, 1, 1, 1], [student.address, teacher.address, student.address, teacher.address, student.address], [50, 60, 70, 80, 90]);
+      await gradeManagementProxy.connect(teacher).markAttendanceBatch([1, 1, 1], [student.address, teacher.address, student.address], [true, true, false]);
+
+      expect(await gradeManagementProxy.getGradeCount(1)).to.equal(5);
+      const page = await gradeManagementProxy.getGradesPage(1, 2, 2);
+      expect(page.map((grade) => grade.grade)).to.deep.equal([70n, 80n]);
+      expect((await gradeManagementProxy.getGradesPage(1, 4, 10)).length).to.equal(1);
+      expect((await gradeManagementProxy.getGradesPage(1, 10, 10)).length).to.equal(0);
+      expect((await gradeManagementProxy.getAttendancePage(1, 1, 5)).length).to.equal(2);
+
+      const [studentGrades, nextOffset] = await gradeManagementProxy.getGradesByStudent(1, student.address, 0, 3);
+      expect(studentGrades.map((grade) => grade.grade)).to.deep.equal([50n, 70n]);
+      expect(nextOffset).to.equal(3);
+
+      const [studentAttendance] = await gradeManagementProxy.getAttendanceByStudent(1, student.address, 0, 10);
+      expect(studentAttendance.length).to.equal(2);
+    });
   });
 
   describe("ScheduleManagement", function () {
@@ -113,6 +171,16 @@ describe("Proxy Contracts", function () {
       schedules = await scheduleManagementProxy.getSchedule(1);
       expect(schedules[0].date).to.equal("2024-01-02");
     });
+
+    it("Should page through schedules", async function () {
+      await scheduleManagementProxy.connect(teacher).createSchedule(1, "2024-01-01", "10:00");
+      await scheduleManagementProxy.connect(teacher).createSchedule(1, "2024-01-02", "10:00");
+      await scheduleManagementProxy.connect(teacher).createSchedule(1, "2024-01-03", "10:00");
+
+      expect(await scheduleManagementProxy.getScheduleCount(1)).to.equal(3);
+      const page = await scheduleManagementProxy.getSchedulePage(1, 1, 5);
+      expect(page.map((schedule) => schedule.date)).to.deep.equal(["2024-01-02", "2024-01-03"]);
+    });
   });
 
   describe("StatisticsTracker", function () {
@@ -0,0 +1,85 @@
+const { expect } = require("chai");
+const { ethers, upgrades } = require("hardhat");
+
+describe("ScheduleDateIndex", function () {
+  let owner, teacher;
+
+  beforeEach(async function () {
+    [owner, teacher] = await ethers.getSigners();
+  });
+
+  async function deploy(name) {
+    const ScheduleManagement = await ethers.getContractFactory("ScheduleManagementUpgradeable");
+    let contract = await upgrades.deployProxy(ScheduleManagement, [], { initializer: "initialize" });
+    await contract.waitForDeployment();
+    await contract.assignRole(teacher.address, 2);
+    if (name !== "ScheduleManagementUpgradeable") {
+      contract = await upgrades.upgradeProxy(await contract.getAddress(), await ethers.getContractFactory(name));
+    }
+    return contract;
+  }
+
+  function day(offset) {
+    const date = new Date(Date.UTC(2024, 8, 1 + offset));
+    return date.toISOString().slice(0, 10);
+  }
+
+  it("Should keep the date index current across edits", async function () {
+    const scheduleManagement = await deploy("ScheduleManagementV2Upgradeable");
+    await scheduleManagement.connect(teacher).createSchedule(1, "2024-09-02", "10:00");
+    await scheduleManagement.connect(teacher).createSchedule(1, "2024-09-01", "12:00");
+    await scheduleManagement.connect(teacher).createSchedule(1, "2024-09-02", "14:00");
+
+    let entries = await scheduleManagement.getScheduleByDate(1, "2024-09-02");
+    expect(entries.map((entry) => entry.time)).to.deep.equal(["10:00", "14:00"]);
+
+    await scheduleManagement.connect(teacher).editSchedule(1, 0, "2024-09-03", "10:00");
+    entries = await scheduleManagement.getScheduleByDate(1, "2024-09-02");
+    expect(entries.map((entry) => entry.time)).to.deep.equal(["14:00"]);
+    expect((await scheduleManagement.getScheduleByDate(1, "2024-09-03")).length).to.equal(1);
+
+    const week = await scheduleManagement.getScheduleInRange(1, 20240901, 20240907);
+    expect(week.map((entry) => entry.date)).to.deep.equal(["2024-09-01", "2024-09-02", "2024-09-03"]);
+    expect((await scheduleManagement.getScheduleInRange(1, 20240902, 20240902)).length).to.equal(1);
+    expect((await scheduleManagement.getScheduleInRange(1, 20241001, 20241031)).length).to.equal(0);
+  });
+
+  it("Should index migrated entries and require migration for ranges", async function () {
+    const legacy = await deploy("ScheduleManagementUpgradeable");
+    await legacy.connect(teacher).createSchedule(1, "2024-09-05", "10:00");
+    await legacy.connect(teacher).createSchedule(1, "2024-09-01", "10:00");
+
+    const scheduleManagement = await upgrades.upgradeProxy(
+      await legacy.getAddress(), await ethers.getContractFactory("ScheduleManagementV2Upgradeable")
+    );
+    // The unmigrated tail is still found by scanning
+    expect((await scheduleManagement.getScheduleByDate(1, "2024-09-05")).length).to.equal(1);
+    await expect(scheduleManagement.getScheduleInRange(1, 20240901, 20240930)).to.be.revertedWith("Schedules not migrated");
+
+    await scheduleManagement.migrateSchedules(1, 10);
+    const month = await scheduleManagement.getScheduleInRange(1, 20240901, 20240930);
+    expect(month.map((entry) => entry.date)).to.deep.equal(["2024-09-01", "2024-09-05"]);
+  });
+
+  it("Should keep date lookup cost flat as the schedule grows", async function () {
+    const sizes = [10, 40, 160];
+    const gas = { v1: [], v2: [] };
+    for (const [label, name] of [["v1", "ScheduleManagementUpgradeable"], ["v2", "ScheduleManagementV2Upgradeable"]]) {
+      const scheduleManagement = await deploy(name);
+      let created = 0;
+      for (const size of sizes) {
+        for (; created < size; created++) {
+          await scheduleManagement.connect(teacher).createSchedule(1, day(created % 30), "10:00");
+        }
+        gas[label].push(await scheduleManagement.getScheduleByDate.estimateGas(1, day(0)));
+      }
+    }
+
+    sizes.forEach((size, i) => {
+      console.log(`      getScheduleByDate over ${size} entries: v1 scan ${gas.v1[i]} gas, v2 index ${gas.v2[i]} gas`);
+    });
+    // The scan grows with every entry; the index only with the entries on the requested date
+    expect(gas.v2[2] - gas.v2[0]).to.be.lessThan((gas.v1[2] - gas.v1[0]) / 4n);
+    expect(gas.v2[2]).to.be.lessThan(gas.v1[2]);
+  });
+});
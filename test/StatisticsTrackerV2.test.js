@@ -0,0 +1,81 @@
+const { expect } = require("chai");
+const { ethers, upgrades } = require("hardhat");
+
+describe("StatisticsTrackerV2", function () {
+  let statisticsTracker, owner, teacher, student, otherStudent;
+
+  beforeEach(async function () {
+    [owner, teacher, student, otherStudent] = await ethers.getSigners();
+    const StatisticsTracker = await ethers.getContractFactory("StatisticsTrackerUpgradeable");
+    statisticsTracker = await upgrades.deployProxy(StatisticsTracker, [], { initializer: "initialize" });
+    await statisticsTracker.waitForDeployment();
+
+    await statisticsTracker.assignRole(teacher.address, 2);
+  });
+
+  async function upgradeToV2() {
+    const StatisticsTrackerV2 = await ethers.getContractFactory("StatisticsTrackerV2Upgradeable");
+    return upgrades.upgradeProxy(await statisticsTracker.getAddress(), StatisticsTrackerV2);
+  }
+
+  it("Should keep running totals for new records", async function () {
+    const upgraded = await upgradeToV2();
+    await upgraded.connect(teacher).recordGrade(1, student.address, 85);
+    await upgraded.connect(teacher).recordGrade(1, student.address, 90);
+    await upgraded.connect(teacher).recordGrade(1, otherStudent.address, 60);
+    await upgraded.connect(teacher).markAttendance(1, student.address, true);
+    await upgraded.connect(teacher).markAttendance(1, otherStudent.address, false);
+
+    expect(await upgraded.isBackfilled(1)).to.be.true;
+    expect(await upgraded.getAverageGrade(1)).to.equal(78);
+    expect(await upgraded.getAverageGradeByStudent(1, student.address)).to.equal(87);
+    expect(await upgraded.getAttendanceRate(1)).to.equal(50);
+    expect(await upgraded.getAttendanceRateByStudent(1, student.address)).to.equal(100);
+  });
+
+  it("Should backfill records written before the upgrade", async function () {
+    await statisticsTracker.connect(teacher).recordGrade(1, student.address, 70);
+    await statisticsTracker.connect(teacher).recordGrade(1, student.address, 80);
+    await statisticsTracker.connect(teacher).markAttendance(1, student.address, true);
+
+    const upgraded = await upgradeToV2();
+    await upgraded.connect(teacher).recordGrade(1, student.address, 90);
+    expect(await upgraded.isBackfilled(1)).to.be.false;
+    // Falls back to scanning until the backfill has caught up
+    expect(await upgraded.getAverageGrade(1)).to.equal(80);
+
+    await upgraded.backfillAggregates(1, 2);
+    expect(await upgraded.isBackfilled(1)).to.be.false;
+    await upgraded.backfillAggregates(1, 2);
+    expect(await upgraded.isBackfilled(1)).to.be.true;
+
+    expect(await upgraded.aggregatedGrades(1)).to.equal(3);
+    expect(await upgraded.getAverageGrade(1)).to.equal(80);
+    expect(await upgraded.getAttendanceRate(1)).to.equal(100);
+  });
+
+  it("Should restrict backfill to admins", async function () {
+    const upgraded = await upgradeToV2();
+    await expect(upgraded.connect(teacher).backfillAggregates(1, 10)).to.be.reverted;
+  });
+
+  it("Should make statistics reads constant-cost", async function () {
+    const count = 50;
+    const courseIds = Array(count).fill(1);
+    const students = Array.from({ length: count }, (_, i) => (i % 2 ? student.address : otherStudent.address));
+    const gradeValues = Array.from({ length: count }, (_, i) => 50 + i);
+
+    await statisticsTracker.connect(teacher).recordGrades(courseIds, students, gradeValues);
+    const scanGas = await statisticsTracker.getAverageGradeByStudent.estimateGas(1, student.address);
+
+    const upgraded = await upgradeToV2();
+    await upgraded.backfillAggregates(1, count);
+    const aggregateGas = await upgraded.getAverageGradeByStudent.estimateGas(1, student.address);
+
+    const singleWrite = await (await upgraded.connect(teacher).recordGrade(1, student.address, 99)).wait();
+
+    console.log(`      getAverageGradeByStudent over ${count} records: scan ${scanGas} gas, aggregate ${aggregateGas} gas`);
+    console.log(`      recordGrade with running totals: ${singleWrite.gasUsed} gas`);
+    expect(aggregateGas).to.be.lessThan(scanGas);
+  });
+});